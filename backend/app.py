@@ -1,195 +1,107 @@
 from __future__ import annotations
 
+import hashlib
 import json
+import logging
 import os
 import random
+import time
 import uuid
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from functools import wraps
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 
+import click
 from dotenv import load_dotenv
-from flask import Flask, jsonify, request, g, send_file
+from flask import Blueprint, Flask, Response, current_app, jsonify, request, g, send_file
 from werkzeug.utils import secure_filename
 from flask_cors import CORS
 from flask_jwt_extended import (
-    JWTManager,
     create_access_token,
     get_jwt_identity,
     jwt_required,
+    verify_jwt_in_request,
 )
-from flask_migrate import Migrate
-from flask_sqlalchemy import SQLAlchemy
 from marshmallow import Schema, ValidationError, fields, validate, validates_schema
-try:
-    from groq import Groq  # type: ignore
-except ImportError:
-    Groq = None  # type: ignore
-    print("[WARNING] Thư viện 'groq' chưa được cài. Chạy: pip install groq")
-from sqlalchemy import func
+from sqlalchemy import bindparam, func
 from werkzeug.security import check_password_hash, generate_password_hash
 
-BASE_DIR = Path(__file__).resolve().parent
+import archive
+import fastjson
+import profiler as profiling
+from compression import CompressedPayload
+from db_engine import configure_engine, engine_options, normalize_database_url
+from db_routing import read_only
+from events import BOOKING_CREATED, BOOKING_DELETED, BOOKING_STATUS_CHANGED
+from extensions import (
+    app_logging,
+    booking_events,
+    cache,
+    compressor,
+    db,
+    jobs,
+    jwt,
+    limiter,
+    metrics,
+    migrate,
+    profiler,
+    recommender,
+    replica_router,
+)
+from gunicorn_profile import recommended_event_streams, recommended_threads
+from jobs import jobs_table
+from metrics import Metrics, observe_upstream
+from models import (
+    BOOKING_STATUSES,
+    STATUS_LABELS,
+    STATUS_TRANSITIONS,
+    AdminUser,
+    Booking,
+    BookingItem,
+    ChatLog,
+    Food,
+    Tombstone,
+)
+from validation import compile_schema
 
-# Load .env đặt cùng thư mục với app.py (backend/.env)
-load_dotenv(BASE_DIR / ".env")
+BASE_DIR = Path(__file__).resolve().parent
 
 # ============================================
 # APP & DATABASE CONFIGURATION
 # ============================================
 DATA_DIR = BASE_DIR / "data"
-DATA_DIR.mkdir(exist_ok=True)
-
 UPLOAD_DIR = BASE_DIR / "uploads" / "foods"
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
 
 DEFAULT_DB_PATH = DATA_DIR / "mtp_food.db"
 
-app = Flask(__name__)
-CORS(app, 
-     resources={r"/api/*": {"origins": "*"}},
-     allow_headers=["Content-Type", "Authorization"],
-     methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-     supports_credentials=True)
-
-# Fix DATABASE_URL: Render trả về postgres:// nhưng SQLAlchemy 2.0+ cần postgresql://
-database_url = os.getenv("DATABASE_URL", f"sqlite:///{DEFAULT_DB_PATH.as_posix()}")
-if database_url.startswith("postgres://"):
-    database_url = database_url.replace("postgres://", "postgresql://", 1)
-    print(f"[DB] Đã convert DATABASE_URL từ postgres:// sang postgresql://")
-
-app.config.update(
-    SQLALCHEMY_DATABASE_URI=database_url,
-    SQLALCHEMY_TRACK_MODIFICATIONS=False,
-    JWT_SECRET_KEY=os.getenv("JWT_SECRET_KEY", "mtp-dev-secret"),
-    JSON_SORT_KEYS=False,
-)
-
-
-
-db = SQLAlchemy(app)
-migrate = Migrate(app, db)
-jwt = JWTManager(app)
-
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")  # Free model tốt nhất của Groq
-
-print(f"[AI CONFIG] GROQ_API_KEY loaded: {bool(GROQ_API_KEY)} | MODEL: {GROQ_MODEL}")
-
-groq_client: Optional[Groq] = None
-
-# Khởi tạo Groq client (FREE, không cần credit card)
-if GROQ_API_KEY and Groq is not None:
-    try:
-        groq_client = Groq(api_key=GROQ_API_KEY)  # type: ignore
-        print("[AI CONFIG] Groq client initialized thành công (FREE API)")
-    except Exception as e:
-        print(f"[AI CONFIG] Lỗi khởi tạo Groq client: {e}")
-        groq_client = None
-elif not GROQ_API_KEY:
-    print("[AI CONFIG] Groq client KHÔNG được khởi tạo (thiếu GROQ_API_KEY trong .env?)")
-elif Groq is None:
-    print("[AI CONFIG] Groq client KHÔNG được khởi tạo (chưa cài thư viện: pip install groq)")
-
-
-BOOKING_STATUSES = ["pending", "confirmed", "completed", "cancelled"]
-STATUS_LABELS = {
-    "pending": "Chờ xác nhận",
-    "confirmed": "Đã xác nhận",
-    "completed": "Hoàn tất",
-    "cancelled": "Đã hủy",
-}
-
-
-# ============================================
-# DATABASE MODELS
-# ============================================
-class TimestampMixin:
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = db.Column(
-        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
-    )
-
-
-class Food(TimestampMixin, db.Model):
-    __tablename__ = "foods"
-
-    id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(120), nullable=False)
-    price = db.Column(db.Integer, nullable=False)
-    image = db.Column(db.String(500), nullable=False)
-    description = db.Column(db.Text, default="")
-    is_active = db.Column(db.Boolean, default=True)
-
-
-class Booking(TimestampMixin, db.Model):
-    __tablename__ = "bookings"
-
-    id = db.Column(db.Integer, primary_key=True)
-    code = db.Column(db.String(20), unique=True, nullable=False)
-    customer_name = db.Column(db.String(120), nullable=False)
-    customer_phone = db.Column(db.String(20), nullable=False)
-    customer_email = db.Column(db.String(120), nullable=False)
-    guests = db.Column(db.Integer, nullable=False)
-    booking_datetime = db.Column(db.DateTime, nullable=False)
-    note = db.Column(db.Text, default="")
-    status = db.Column(db.String(20), default="pending", nullable=False)
-    total_amount = db.Column(db.Integer, default=0)
-    status_history = db.Column(db.Text, default="[]")
-
-    items = db.relationship(
-        "BookingItem",
-        cascade="all, delete-orphan",
-        backref="booking",
-        lazy="joined",
-    )
+api = Blueprint("api", __name__)
 
-    def update_status(self, new_status: str, note: str = "") -> None:
-        history = json.loads(self.status_history or "[]")
-        history.append(
-            {
-                "status": new_status,
-                "label": STATUS_LABELS.get(new_status, new_status),
-                "note": note,
-                "time": datetime.utcnow().isoformat(),
-            }
-        )
-        self.status_history = json.dumps(history)
-        self.status = new_status
+logger = logging.getLogger("mtp.app")
+ai_logger = logging.getLogger("mtp.ai")
 
 
-class BookingItem(db.Model):
-    __tablename__ = "booking_items"
+def get_groq_client():
+    """Groq client được tạo lười ở lần chat đầu tiên của mỗi worker."""
+    state = current_app.extensions.setdefault("groq", {})
+    if "client" in state:
+        return state["client"]
 
-    id = db.Column(db.Integer, primary_key=True)
-    booking_id = db.Column(db.Integer, db.ForeignKey("bookings.id"), nullable=False)
-    food_id = db.Column(db.Integer, db.ForeignKey("foods.id"), nullable=True)
-    food_name = db.Column(db.String(120), nullable=False)
-    price = db.Column(db.Integer, nullable=False)
-    quantity = db.Column(db.Integer, default=1, nullable=False)
-
-
-class AdminUser(TimestampMixin, db.Model):
-    __tablename__ = "admin_users"
-
-    id = db.Column(db.Integer, primary_key=True)
-    full_name = db.Column(db.String(120), nullable=False)
-    email = db.Column(db.String(120), unique=True, nullable=False)
-    password_hash = db.Column(db.String(255), nullable=False)
-    is_active = db.Column(db.Boolean, default=True)
-
-
-class ChatLog(TimestampMixin, db.Model):
-    __tablename__ = "chat_logs"
+    client = None
+    api_key = current_app.config.get("GROQ_API_KEY")
+    if api_key:
+        try:
+            from groq import Groq  # type: ignore
 
-    id = db.Column(db.Integer, primary_key=True)
-    session_id = db.Column(db.String(36), index=True, nullable=False)
-    role = db.Column(db.String(20), nullable=False)  # user / assistant
-    message = db.Column(db.Text, nullable=False)
-    food_snapshot = db.Column(db.Text, default="[]")
+            client = Groq(api_key=api_key)
+        except ImportError:
+            ai_logger.warning("Thư viện 'groq' chưa được cài. Chạy: pip install groq")
+        except Exception:
+            ai_logger.exception("Lỗi khởi tạo Groq client")
+    state["client"] = client
+    return client
 
 
 # ============================================
@@ -240,8 +152,35 @@ class BookingSchema(Schema):
             raise ValidationError("Cần chọn ít nhất một món", "orders")
 
 
+MAX_BULK_STATUS = 500
+
+
+class BookingFilterSchema(Schema):
+    status = fields.Str(validate=validate.OneOf(BOOKING_STATUSES, error="Trạng thái không hợp lệ"))
+    before = fields.DateTime()
+    after = fields.DateTime()
+
+
+class BulkStatusSchema(Schema):
+    status = fields.Str(
+        required=True, validate=validate.OneOf(BOOKING_STATUSES, error="Trạng thái không hợp lệ")
+    )
+    codes = fields.List(fields.Str(), validate=validate.Length(min=1, max=MAX_BULK_STATUS))
+    filter = fields.Nested(BookingFilterSchema)
+    note = fields.Str(load_default="")
+
+    @validates_schema
+    def validate_target(self, data, **kwargs):
+        if ("codes" in data) == ("filter" in data):
+            raise ValidationError("Cần truyền codes hoặc filter (chỉ một trong hai)", "codes")
+
+
 food_schema = FoodSchema()
 booking_schema = BookingSchema()
+bulk_status_schema = BulkStatusSchema()
+# Bản biên dịch sẵn cho đường nóng: cùng luật và thông báo lỗi với schema.load()
+food_validator = compile_schema(food_schema)
+booking_validator = compile_schema(booking_schema)
 
 
 # ============================================
@@ -259,14 +198,32 @@ booking_schema = BookingSchema()
 #         return func(*args, **kwargs)
 
 #     return wrapper
+def admin_principal(admin_id) -> Optional[Dict]:
+    """Admin đang hoạt động theo id trong JWT, cache chung giữa các worker.
+
+    Chỉ admin hợp lệ được cache (TTL ADMIN_CACHE_SECONDS); sửa admin thì gọi
+    ``cache.invalidate("admin")``.
+    """
+    try:
+        admin_id = int(admin_id)
+    except (TypeError, ValueError):
+        return None
+
+    def load() -> Optional[Dict]:
+        admin = db.session.get(AdminUser, admin_id)
+        if not admin or not admin.is_active:
+            return None
+        return {"id": admin.id, "email": admin.email, "fullName": admin.full_name}
+
+    return cache.get_or_set("admin", str(admin_id), load, ttl=current_app.config["ADMIN_CACHE_SECONDS"])
+
+
 def admin_required(func):
     @wraps(func)
     @jwt_required()
     def wrapper(*args, **kwargs):
-        admin_id = get_jwt_identity()
-        # FIX: Convert string back to int
-        admin = db.session.get(AdminUser, int(admin_id))
-        if not admin or not admin.is_active:
+        admin = admin_principal(get_jwt_identity())
+        if admin is None:
             return jsonify({"error": "Không có quyền truy cập"}), 403
         g.current_admin = admin
         return func(*args, **kwargs)
@@ -274,10 +231,22 @@ def admin_required(func):
     return wrapper
 
 
+def _is_admin_request() -> bool:
+    """Request hiện tại có JWT của admin đang hoạt động (không raise)."""
+    try:
+        verify_jwt_in_request(optional=True)
+        admin_id = get_jwt_identity()
+    except Exception:
+        return False
+    if admin_id is None:
+        return False
+    return admin_principal(admin_id) is not None
+
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def serialize_food(food: Food) -> Dict:
+def _food_row(food: Food, write_dt: Callable) -> Dict:
     # Nếu image là URL (external), dùng trực tiếp
     # Nếu là path local, convert thành URL
     image_url = food.image
@@ -291,12 +260,13 @@ def serialize_food(food: Food) -> Dict:
         "image": image_url,
         "description": food.description,
         "isActive": food.is_active,
-        "createdAt": food.created_at.isoformat(),
-        "updatedAt": food.updated_at.isoformat() if food.updated_at else None,
+        "createdAt": write_dt(food.created_at),
+        "updatedAt": write_dt(food.updated_at),
     }
 
 
-def serialize_booking(booking: Booking) -> Dict:
+def _booking_row(booking: Booking, write_dt: Callable) -> Dict:
+    """Booking không kèm statusTimeline (cột JSON, xử lý riêng)."""
     return {
         "id": booking.code,
         "status": booking.status,
@@ -308,7 +278,7 @@ def serialize_booking(booking: Booking) -> Dict:
         },
         "booking": {
             "guests": booking.guests,
-            "dateTime": booking.booking_datetime.isoformat(),
+            "dateTime": write_dt(booking.booking_datetime),
             "note": booking.note,
         },
         "orders": [
@@ -321,16 +291,62 @@ def serialize_booking(booking: Booking) -> Dict:
             for item in booking.items
         ],
         "totalAmount": booking.total_amount,
-        "createdAt": booking.created_at.isoformat(),
-        "updatedAt": booking.updated_at.isoformat() if booking.updated_at else None,
-        "statusTimeline": json.loads(booking.status_history or "[]"),
+        "createdAt": write_dt(booking.created_at),
+        "updatedAt": write_dt(booking.updated_at),
     }
 
 
+def serialize_food(food: Food) -> Dict:
+    return _food_row(food, _isoformat)
+
+
+def serialize_booking(booking: Booking) -> Dict:
+    row = _booking_row(booking, _isoformat)
+    row["statusTimeline"] = fastjson.loads(booking.status_history or "[]")
+    return row
+
+
+def encode_foods(foods: List[Food]) -> bytes:
+    """JSON array của serialize_food(), encode thẳng ra bytes."""
+    write_dt = fastjson.datetime_writer()
+    return fastjson.dumps([_food_row(food, write_dt) for food in foods])
+
+
+def encode_bookings(bookings: List[Booking]) -> bytes:
+    """JSON array của serialize_booking(); status_history được chép nguyên văn."""
+    write_dt = fastjson.datetime_writer()
+    return fastjson.dumps_list(
+        fastjson.dumps_with_raw(_booking_row(booking, write_dt), "statusTimeline", booking.status_history)
+        for booking in bookings
+    )
+
+
+def json_bytes_response(data: bytes, status: int = 200):
+    return current_app.response_class(data + b"\n", status=status, mimetype="application/json")
+
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
 def generate_booking_code() -> str:
     return f"BK{uuid.uuid4().hex[:8].upper()}"
 
 
+def recommended_foods(message_lower: str, foods: List[Dict], limit: int) -> List[Dict]:
+    """Gợi ý trong ``foods`` (menu client gửi lên): món hay được đặt cùng các món
+    được nhắc tới trong câu hỏi, nếu không có thì món được đặt nhiều gần đây."""
+    by_id = {food["id"]: food for food in foods if isinstance(food.get("id"), int)}
+    if not by_id:
+        return []
+    mentioned = [food_id for food_id, food in by_id.items() if str(food.get("name", "")).lower() in message_lower]
+    picks = recommender.for_cart(mentioned, limit * 3) if mentioned else []
+    picks = [food_id for food_id in picks if food_id in by_id][:limit]
+    if len(picks) < limit:
+        picks += recommender.popular(limit - len(picks), among=set(by_id) - set(mentioned) - set(picks))
+    return [by_id[food_id] for food_id in picks]
+
+
 def fallback_ai_response(message: str, foods: List[Dict]) -> str:
     message_lower = message.lower()
 
@@ -349,7 +365,7 @@ def fallback_ai_response(message: str, foods: List[Dict]) -> str:
 
     if any(word in message_lower for word in ["gợi ý", "recommend", "món nào", "ăn gì"]):
         if len(foods) >= 3:
-            picks = random.sample(foods, k=min(3, len(foods)))
+            picks = recommended_foods(message_lower, foods, 3) or random.sample(foods, k=3)
             lines = [f"- {food['name']} ({food['price']:,}đ)" for food in picks]
             return "Bạn có thể thử:\n" + "\n".join(lines)
         return "Tôi cần thêm món ăn để gợi ý chính xác hơn."
@@ -364,7 +380,7 @@ def fallback_ai_response(message: str, foods: List[Dict]) -> str:
 # ============================================
 # AUTH ROUTES
 # ============================================
-@app.post("/api/auth/register")
+@api.post("/api/auth/register")
 @jwt_required(optional=True)
 # def register_admin():
 #     """Allow first admin to register freely, subsequent ones require login."""
@@ -418,6 +434,7 @@ def register_admin():
     )
     db.session.add(admin)
     db.session.commit()
+    cache.invalidate("admin")
 
     # FIX: Tự động tạo token cho admin đầu tiên
     token = create_access_token(
@@ -431,7 +448,8 @@ def register_admin():
         "admin": {"id": admin.id, "fullName": admin.full_name, "email": admin.email}
     }), 201
 
-@app.post("/api/auth/login")
+@api.post("/api/auth/login")
+@limiter.limit("login", per_ip="5/minute", per_route="120/minute", concurrency=2)
 # def login_admin():
 #     data = request.get_json() or {}
 #     email = (data.get("email") or "").lower().strip()
@@ -476,27 +494,197 @@ def login_admin():
 # ============================================
 # STATIC FILES (Uploaded images)
 # ============================================
-@app.route("/uploads/foods/<filename>")
+@api.route("/uploads/foods/<filename>")
 def uploaded_file(filename):
     try:
         file_path = UPLOAD_DIR / filename
         if not file_path.exists():
             return jsonify({"error": "File not found"}), 404
         return send_file(str(file_path))
-    except Exception as e:
-        print(f"Error serving file {filename}: {e}")
+    except Exception:
+        logger.exception("Error serving file %s", filename)
         return jsonify({"error": "Error serving file"}), 500
 
 # ============================================
 # FOODS API
 # ============================================
-@app.get("/api/foods")
-def get_foods():
+def catalog_version() -> str:
+    """Phiên bản menu: đổi khi thêm, sửa hoặc xóa bất kỳ món nào."""
+    count, max_id, latest = db.session.query(
+        func.count(Food.id), func.max(Food.id), func.max(Food.updated_at)
+    ).one()
+    return f"{count}-{max_id or 0}-{latest.timestamp() if latest else 0}"
+
+
+class Catalog:
+    """Ảnh chụp menu (món đang bán) theo một catalog_version()."""
+
+    def __init__(self, version: str, foods: List[Food]):
+        write_dt = fastjson.datetime_writer()
+        self.rows = [_food_row(food, write_dt) for food in foods]
+        self.by_id = {row["id"]: row for row in self.rows}
+        self.payload = CompressedPayload(fastjson.dumps(self.rows) + b"\n", version)
+
+
+def catalog() -> Catalog:
+    """Catalog được cache theo catalog_version(); dựng lại bằng một query khi đổi."""
+    version = catalog_version()
+    cached = current_app.extensions.get("catalog")
+    if cached is not None and cached.payload.etag == version:
+        return cached
+
     foods = Food.query.filter_by(is_active=True).order_by(Food.created_at.desc()).all()
-    return jsonify([serialize_food(food) for food in foods])
+    cached = Catalog(version, foods)
+    current_app.extensions["catalog"] = cached
+    return cached
+
+
+def menu_payload() -> CompressedPayload:
+    """JSON menu (kèm bản nén) được cache theo catalog_version()."""
+    return catalog().payload
+
+
+MAX_IDS_PER_LOOKUP = 100
+
 
+def parse_food_ids(raw: str, field: str = "ids") -> List[int]:
+    """"1,5,9" -> [1, 5, 9] (bỏ trùng, giữ thứ tự)."""
+    try:
+        ids = [int(part) for part in raw.split(",") if part.strip()]
+    except ValueError:
+        raise ValidationError(f"{field} phải là danh sách số nguyên, ví dụ {field}=1,5,9", field)
+    ids = list(dict.fromkeys(ids))
+    if not ids or len(ids) > MAX_IDS_PER_LOOKUP:
+        raise ValidationError(f"{field} cần từ 1 đến {MAX_IDS_PER_LOOKUP} món", field)
+    return ids
+
+
+def foods_by_ids(ids: List[int], snapshot: Optional[Catalog] = None) -> List[Dict]:
+    """Món theo thứ tự ``ids`` (id không tồn tại bị bỏ qua).
+
+    Món đang bán lấy từ catalog; chỉ món còn thiếu (đã ẩn) mới cần một query.
+    """
+    snapshot = snapshot or catalog()
+    found = {food_id: snapshot.by_id[food_id] for food_id in ids if food_id in snapshot.by_id}
+    missing = [food_id for food_id in ids if food_id not in found]
+    if missing:
+        write_dt = fastjson.datetime_writer()
+        for food in Food.query.filter(Food.id.in_(missing)).all():
+            found[food.id] = _food_row(food, write_dt)
+    return [found[food_id] for food_id in ids if food_id in found]
+
+
+# ============================================
+# DELTA SYNC
+# ============================================
+# ?updated_since=<cursor> trả các bản ghi có updated_at sau cursor (kể cả món
+# đã ẩn) và khóa của các bản ghi đã xóa (tombstones), kèm cursor cho lần sau:
+#   {"items": [...], "deleted": [...], "cursor": "2026-01-01T10:00:00"}
+# Cursor lùi DELTA_SYNC_LAG_SECONDS so với lúc truy vấn để không lỡ các
+# transaction commit trễ; bản ghi trả trùng được client ghi đè theo id.
+def parse_updated_since() -> Optional[datetime]:
+    raw = request.args.get("updated_since")
+    if not raw:
+        return None
+    try:
+        value = datetime.fromisoformat(raw.replace("Z", "+00:00"))
+    except ValueError:
+        raise ValidationError("updated_since phải là thời điểm ISO 8601", "updated_since")
+    if value.tzinfo is not None:
+        # updated_at lưu dạng UTC không kèm timezone
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def delta_response(entity: str, since: datetime, encode_items: Callable[[datetime], bytes]):
+    now = datetime.utcnow()
+    retention = timedelta(days=current_app.config["TOMBSTONE_RETENTION_DAYS"])
+    if since < now - retention:
+        # Tombstone cũ hơn đã bị dọn: client phải tải lại toàn bộ
+        return jsonify({"error": "Cursor quá cũ, cần đồng bộ lại toàn bộ", "resync": True}), 410
+
+    cursor = max(since, now - timedelta(seconds=current_app.config["DELTA_SYNC_LAG_SECONDS"]))
+    deleted = db.session.scalars(
+        db.select(Tombstone.entity_key)
+        .where(Tombstone.entity == entity, Tombstone.deleted_at > since)
+        .order_by(Tombstone.deleted_at)
+    ).all()
+    body = fastjson.dumps_with_raw(
+        {"deleted": deleted, "cursor": cursor.isoformat()}, "items", encode_items(since)
+    )
+    return json_bytes_response(body)
 
-@app.get("/api/foods/<int:food_id>")
+
+@api.get("/api/foods")
+@read_only
+def get_foods():
+    if request.args.get("ids"):
+        return json_bytes_response(fastjson.dumps(foods_by_ids(parse_food_ids(request.args["ids"]))))
+    since = parse_updated_since()
+    if since is not None:
+        return delta_response(
+            "food", since,
+            lambda since: encode_foods(
+                Food.query.filter(Food.updated_at > since).order_by(Food.updated_at).all()
+            ),
+        )
+    return menu_payload().to_response()
+
+
+def recommended_rows(food_ids: List[int], limit: int, snapshot: Optional[Catalog] = None) -> List[Dict]:
+    """Món đang bán hay được đặt cùng ``food_ids``; thiếu thì bổ sung bằng món mới nhất."""
+    snapshot = snapshot or catalog()
+    # Lấy dư để bù các món đã ẩn
+    rows = [
+        snapshot.by_id[food_id] for food_id in recommender.for_cart(food_ids, limit * 2 + 5)
+        if food_id in snapshot.by_id
+    ][:limit]
+    # Chưa đủ dữ liệu đặt món: bổ sung bằng các món mới nhất trong menu
+    seen = {*food_ids, *(row["id"] for row in rows)}
+    for row in snapshot.rows:
+        if len(rows) >= limit:
+            break
+        if row["id"] not in seen:
+            rows.append(row)
+    return rows
+
+
+def _recommendation_limit(default: int) -> int:
+    return min(max(request.args.get("limit", default, type=int), 0), 12)
+
+
+@api.get("/api/foods/<int:food_id>/detail")
+@read_only
+def get_food_detail(food_id: int):
+    """Món + gợi ý "hay được đặt cùng" trong một request cho trang chi tiết."""
+    limit = _recommendation_limit(3)
+    snapshot = catalog()
+    found = foods_by_ids([food_id], snapshot)
+    if not found:
+        return jsonify({"error": "Không tìm thấy món ăn"}), 404
+    suggestions = recommended_rows([food_id], limit, snapshot)
+    return json_bytes_response(fastjson.dumps({"food": found[0], "oftenOrderedWith": suggestions}))
+
+
+@api.get("/api/foods/<int:food_id>/recommendations")
+@read_only
+def get_food_recommendations(food_id: int):
+    snapshot = catalog()
+    if not foods_by_ids([food_id], snapshot):
+        return jsonify({"error": "Không tìm thấy món ăn"}), 404
+    return json_bytes_response(fastjson.dumps(recommended_rows([food_id], _recommendation_limit(4), snapshot)))
+
+
+@api.get("/api/foods/recommendations")
+@read_only
+def get_cart_recommendations():
+    """Gợi ý cho cả giỏ hàng: ?cart=1,5,9."""
+    cart = parse_food_ids(request.args.get("cart", ""), "cart")
+    return json_bytes_response(fastjson.dumps(recommended_rows(cart, _recommendation_limit(4))))
+
+
+@api.get("/api/foods/<int:food_id>")
+@read_only
 def get_food(food_id: int):
     food = db.session.get(Food, food_id)
     if not food:
@@ -504,7 +692,7 @@ def get_food(food_id: int):
     return jsonify(serialize_food(food))
 
 
-@app.post("/api/foods")
+@api.post("/api/foods")
 @admin_required
 def create_food():
     try:
@@ -514,8 +702,8 @@ def create_food():
             if file and file.filename and allowed_file(file.filename):
                 filename = secure_filename(file.filename)
                 # Thêm timestamp để tránh trùng tên
-                import time
                 filename = f"{int(time.time())}_{filename}"
+                UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
                 file.save(UPLOAD_DIR / filename)
                 image_path = filename
             else:
@@ -545,6 +733,7 @@ def create_food():
         )
         db.session.add(food)
         db.session.commit()
+        cache.invalidate("stats")
         return jsonify(serialize_food(food)), 201
     except ValidationError as err:  
         return jsonify({"error": err.messages}), 400
@@ -552,8 +741,8 @@ def create_food():
         return jsonify({"error": str(e)}), 500  
 
 
-# @app.put("/api/foods/<int:food_id>")
-@app.route("/api/foods/<int:food_id>", methods=["PUT"])
+# @api.put("/api/foods/<int:food_id>")
+@api.route("/api/foods/<int:food_id>", methods=["PUT"])
 @admin_required
 def update_food(food_id: int):
     food = db.session.get(Food, food_id)
@@ -573,14 +762,14 @@ def update_food(food_id: int):
                 
                 # Lưu ảnh mới
                 filename = secure_filename(file.filename)
-                import time
                 filename = f"{int(time.time())}_{filename}"
+                UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
                 file.save(UPLOAD_DIR / filename)
                 food.image = filename
         
         # Cập nhật các field khác
         if request.is_json:
-            payload = food_schema.load(request.get_json() or {}, partial=True)
+            payload = food_validator.load(request.get_json() or {}, partial=True)
             for key, value in payload.items():
                 if key == "isActive":
                     food.is_active = value
@@ -598,6 +787,7 @@ def update_food(food_id: int):
                 food.is_active = request.form.get('isActive').lower() == 'true'
         
         db.session.commit()
+        cache.invalidate("stats")
         return jsonify(serialize_food(food))
     except ValidationError as err:  
         return jsonify({"error": err.messages}), 400
@@ -605,7 +795,7 @@ def update_food(food_id: int):
         return jsonify({"error": str(e)}), 500  
 
 
-@app.delete("/api/foods/<int:food_id>")
+@api.delete("/api/foods/<int:food_id>")
 @admin_required
 def delete_food(food_id: int):
     food = db.session.get(Food, food_id)
@@ -619,13 +809,29 @@ def delete_food(food_id: int):
             image_path.unlink()
     
     db.session.delete(food)
+    db.session.add(Tombstone(entity="food", entity_key=str(food_id)))
     db.session.commit()
+    cache.invalidate("stats")
     return jsonify({"message": "Xóa món ăn thành công"})
 
 
 # ============================================
 # BOOKINGS API
 # ============================================
+def _booking_item_rows(after_id: int):
+    """Loader cho recommender: booking_items có id > after_id, sắp theo đơn."""
+    return db.session.execute(
+        db.select(
+            BookingItem.id, BookingItem.booking_id, BookingItem.food_id, BookingItem.quantity,
+            Booking.created_at,
+        )
+        .join(Booking, Booking.id == BookingItem.booking_id)
+        .where(BookingItem.id > after_id)
+        .order_by(BookingItem.booking_id, BookingItem.id)
+        .execution_options(yield_per=5000)
+    )
+
+
 def _hydrate_orders(orders: List[Dict]) -> List[Dict]:
     """Fetch food data to ensure price integrity."""
     grouped: Dict[int, int] = {}
@@ -633,9 +839,11 @@ def _hydrate_orders(orders: List[Dict]) -> List[Dict]:
         food_id = order["foodId"]
         grouped[food_id] = grouped.get(food_id, 0) + order.get("quantity", 1)
 
+    # Một query cho mọi món trong đơn thay vì một query mỗi món
+    foods = {food.id: food for food in Food.query.filter(Food.id.in_(list(grouped))).all()}
     hydrated = []
     for food_id, quantity in grouped.items():
-        food = db.session.get(Food, food_id)
+        food = foods.get(food_id)
         if not food:
             raise ValidationError(f"Món với ID {food_id} không tồn tại", "orders")
         hydrated.append(
@@ -649,23 +857,61 @@ def _hydrate_orders(orders: List[Dict]) -> List[Dict]:
     return hydrated
 
 
-@app.get("/api/bookings")
+@api.get("/api/bookings")
+@read_only
 def get_bookings():
+    since = parse_updated_since()
+    if since is not None:
+        return delta_response(
+            "booking", since,
+            lambda since: encode_bookings(
+                Booking.query.filter(Booking.updated_at > since).order_by(Booking.updated_at).all()
+            ),
+        )
     bookings = Booking.query.order_by(Booking.created_at.desc()).all()
-    return jsonify([serialize_booking(booking) for booking in bookings])
+    return json_bytes_response(encode_bookings(bookings))
+
+
+@api.post("/api/bookings/events/ticket")
+@admin_required
+def booking_event_ticket():
+    """Ticket ngắn hạn để mở SSE: EventSource không gửi được header nên JWT
+    sẽ phải nằm trên URL (và trong access log) nếu không có bước này."""
+    return jsonify({
+        "ticket": booking_events.issue_ticket(str(g.current_admin["id"])),
+        "expiresIn": current_app.config["EVENTS_TICKET_SECONDS"],
+    })
+
+
+@api.get("/api/bookings/events")
+def booking_event_stream():
+    """SSE cho dashboard admin: ?ticket= (từ /events/ticket) hoặc header Bearer."""
+    ticket = request.args.get("ticket")
+    if ticket:
+        subject = booking_events.check_ticket(ticket)
+        allowed = subject is not None and admin_principal(subject) is not None
+    else:
+        allowed = _is_admin_request()
+    if not allowed:
+        return jsonify({"error": "Không có quyền truy cập"}), 403
+    # Trả connection DB về pool trước khi giữ request mở
+    db.session.close()
+    return booking_events.stream()
 
 
-@app.get("/api/bookings/<string:code>")
+@api.get("/api/bookings/<string:code>")
+@read_only
 def get_booking(code: str):
-    booking = Booking.query.filter_by(code=code).first()
+    booking = Booking.query.filter_by(code=code).first() or archive.find_archived(code)
     if not booking:
         return jsonify({"error": "Không tìm thấy đặt bàn"}), 404
     return jsonify(serialize_booking(booking))
 
 
-@app.post("/api/bookings")
+@api.post("/api/bookings")
+@limiter.limit("bookings", per_ip="10/minute", per_route="300/minute", concurrency=8)
 def create_booking():
-    payload = booking_schema.load(request.get_json() or {})
+    payload = booking_validator.load(request.get_json() or {})
 
     hydrated_orders = _hydrate_orders(payload["orders"])
     booking_info = payload["booking"]
@@ -698,11 +944,29 @@ def create_booking():
     booking.total_amount = total
     db.session.add(booking)
     db.session.commit()
+    cache.invalidate("stats")
 
-    return jsonify(serialize_booking(booking)), 201
+    recommender.record(
+        booking.id, booking.created_at, [(item.id, item.food_id, item.quantity) for item in booking.items]
+    )
+    data = serialize_booking(booking)
+    # Event gọn như booking.status_changed: không đưa thông tin khách/món vào
+    # bảng events dùng chung; dashboard tự tải chi tiết qua GET /api/bookings/<code>
+    booking_events.publish(
+        BOOKING_CREATED,
+        {
+            "id": data["id"],
+            "status": data["status"],
+            "statusLabel": data["statusLabel"],
+            "bookingDatetime": data["booking"]["dateTime"],
+            "totalAmount": data["totalAmount"],
+            "createdAt": data["createdAt"],
+        },
+    )
+    return jsonify(data), 201
 
 
-@app.put("/api/bookings/<string:code>")
+@api.put("/api/bookings/<string:code>")
 @admin_required
 def update_booking(code: str):
     booking = Booking.query.filter_by(code=code).first()
@@ -716,24 +980,134 @@ def update_booking(code: str):
     note = request.json.get("note", "")
     booking.update_status(status, note or f"Cập nhật trạng thái: {status}")
     db.session.commit()
-    return jsonify(serialize_booking(booking))
+    cache.invalidate("stats")
+
+    data = serialize_booking(booking)
+    booking_events.publish(
+        BOOKING_STATUS_CHANGED,
+        {
+            "id": data["id"],
+            "status": data["status"],
+            "statusLabel": data["statusLabel"],
+            "updatedAt": data["updatedAt"],
+            "timelineEntry": data["statusTimeline"][-1],
+        },
+    )
+    return jsonify(data)
 
 
-@app.delete("/api/bookings/<string:code>")
+def _append_history(raw: Optional[str], entry: str) -> str:
+    """Nối một entry (JSON) vào status_history mà không parse lại cả mảng."""
+    raw = (raw or "[]").rstrip()
+    return f"[{entry}]" if raw == "[]" else f"{raw[:-1]},{entry}]"
+
+
+@api.post("/api/bookings/bulk-status")
+@admin_required
+def bulk_update_booking_status():
+    """Đổi trạng thái nhiều đơn trong một transaction.
+
+    Body: {"status": "completed", "codes": [...]} hoặc
+    {"status": "completed", "filter": {"status": "confirmed", "before": "...T22:00"}}.
+    Trả về kết quả từng mã: updated / unchanged / invalid_transition / not_found / conflict.
+    """
+    payload = bulk_status_schema.load(request.get_json() or {})
+    status = payload["status"]
+    table = Booking.__table__
+    query = db.select(table.c.id, table.c.code, table.c.status, table.c.status_history)
+    results: Dict[str, str] = {}
+    if "codes" in payload:
+        codes = list(dict.fromkeys(payload["codes"]))
+        results = {code: "not_found" for code in codes}
+        query = query.where(table.c.code.in_(codes))
+    else:
+        filters = payload["filter"]
+        if "status" in filters:
+            query = query.where(table.c.status == filters["status"])
+        # booking_datetime lưu giờ như client gửi, không kèm timezone
+        if "before" in filters:
+            query = query.where(table.c.booking_datetime < filters["before"].replace(tzinfo=None))
+        if "after" in filters:
+            query = query.where(table.c.booking_datetime >= filters["after"].replace(tzinfo=None))
+        query = query.order_by(table.c.booking_datetime).limit(MAX_BULK_STATUS + 1)
+    rows = db.session.execute(query).all()
+    if len(rows) > MAX_BULK_STATUS:
+        return jsonify({"error": f"Bộ lọc khớp quá {MAX_BULK_STATUS} đơn, hãy thu hẹp lại"}), 400
+
+    now = datetime.utcnow()
+    entry = {
+        "status": status,
+        "label": STATUS_LABELS[status],
+        "note": payload["note"] or f"Cập nhật trạng thái: {status}",
+        "time": now.isoformat(),
+    }
+    entry_json = json.dumps(entry)
+    updates = []
+    for row in rows:
+        if row.status == status:
+            results[row.code] = "unchanged"
+        elif status not in STATUS_TRANSITIONS.get(row.status, ()):
+            results[row.code] = "invalid_transition"
+        else:
+            results[row.code] = "updated"
+            updates.append(
+                {"b_id": row.id, "b_code": row.code, "b_old": row.status,
+                 "b_history": _append_history(row.status_history, entry_json)}
+            )
+
+    if updates:
+        # Một UPDATE (executemany); điều kiện status cũ chặn ghi đè cập nhật đồng thời
+        result = db.session.execute(
+            table.update()
+            .where(table.c.id == bindparam("b_id"), table.c.status == bindparam("b_old"))
+            .values(status=status, status_history=bindparam("b_history"), updated_at=now),
+            updates,
+        )
+        if result.rowcount != len(updates) or not db.session.get_bind().dialect.supports_sane_multi_rowcount:
+            current = dict(
+                db.session.execute(
+                    db.select(table.c.id, table.c.status).where(table.c.id.in_([u["b_id"] for u in updates]))
+                ).all()
+            )
+            for update in updates:
+                if current.get(update["b_id"]) != status:
+                    results[update["b_code"]] = "conflict"
+        db.session.commit()
+        cache.invalidate("stats")
+
+    updated = [code for code, outcome in results.items() if outcome == "updated"]
+    for code in updated:
+        booking_events.publish(
+            BOOKING_STATUS_CHANGED,
+            {
+                "id": code,
+                "status": status,
+                "statusLabel": STATUS_LABELS[status],
+                "updatedAt": now.isoformat(),
+                "timelineEntry": entry,
+            },
+        )
+    return jsonify({"status": status, "updated": len(updated), "results": results})
+
+
+@api.delete("/api/bookings/<string:code>")
 @admin_required
 def delete_booking(code: str):
     booking = Booking.query.filter_by(code=code).first()
     if not booking:
         return jsonify({"error": "Không tìm thấy đặt bàn"}), 404
     db.session.delete(booking)
+    db.session.add(Tombstone(entity="booking", entity_key=code))
     db.session.commit()
+    cache.invalidate("stats")
+    booking_events.publish(BOOKING_DELETED, {"id": code})
     return jsonify({"message": "Xóa đơn thành công"})
 
 
 # ============================================
 # AI CHATBOT API
 # ============================================
-@app.post("/api/ai/chat")
+@api.post("/api/ai/chat")
 # def ai_chat():
 #     data = request.get_json() or {}
 #     message = (data.get("message") or "").strip()
@@ -791,7 +1165,8 @@ def delete_booking(code: str):
 
 #     return jsonify({"sessionId": session_id, "response": response_text})
 
-@app.post("/api/ai/chat")
+@api.post("/api/ai/chat")
+@limiter.limit("ai_chat", per_ip="20/minute", per_route="120/minute", concurrency=4)
 def ai_chat():
     data = request.get_json() or {}
     message = (data.get("message") or "").strip()
@@ -809,11 +1184,20 @@ def ai_chat():
     )
     
     # Chỉ dùng Groq (FREE API)
-    if groq_client:
+    # Cùng câu hỏi trên cùng menu: dùng lại câu trả lời Groq đã cache ở mọi worker
+    chat_key = hashlib.sha256(fastjson.dumps({"message": message.lower(), "menu": foods[:10]})).hexdigest()
+    cached_reply, chat_version = cache.lookup("chat", chat_key)
+    groq_client = get_groq_client()
+    if cached_reply is not None:
+        response_text = cached_reply
+        ai_logger.debug("Dùng câu trả lời đã cache cho message: %s", message[:60])
+    elif groq_client:
+        started = time.perf_counter()
+        outcome = "error"
         try:
-            print("[AI CHAT] Gọi Groq (FREE) cho message:", message[:60])
+            ai_logger.debug("Gọi Groq cho message: %s", message[:60])
             result = groq_client.chat.completions.create(
-                model=GROQ_MODEL,
+                model=current_app.config["GROQ_MODEL"],
                 messages=[
                     {"role": "system", "content": full_prompt},
                     {
@@ -827,42 +1211,58 @@ def ai_chat():
                 temperature=0.6,
                 max_tokens=350,
             )
+            outcome = "empty"
             if result.choices:
                 response_text = result.choices[0].message.content or response_text
-                print("[AI CHAT] Nhận được câu trả lời từ Groq")
-        except Exception as e:
-            print(f"[AI CHAT] Groq Error: {e}")
+                outcome = "ok"
+                cache.set("chat", chat_key, response_text, ttl=current_app.config["CHAT_CACHE_SECONDS"],
+                          version=chat_version)
+        except Exception:
+            ai_logger.warning("Groq error, dùng fallback_ai_response", exc_info=True)
             # fallback đã gán sẵn
+        finally:
+            elapsed = time.perf_counter() - started
+            observe_upstream("groq", outcome, elapsed)
+            ai_logger.info(
+                "Groq trả về %s", outcome,
+                extra={"upstream": "groq", "outcome": outcome, "upstream_ms": round(elapsed * 1000, 2)},
+            )
     else:
-        print("[AI CHAT] Không có Groq client, dùng fallback_ai_response")
+        ai_logger.info("Không có Groq client, dùng fallback_ai_response")
 
-    # Lưu chat log
+    # Lưu chat log ở worker nền, không giữ response
     try:
-        db.session.add(
-            ChatLog(
-                session_id=session_id,
-                role="user",
-                message=message,
-                food_snapshot=json.dumps(foods[:10], ensure_ascii=False),
-            )
-        )
-        db.session.add(
-            ChatLog(
-                session_id=session_id,
-                role="assistant",
-                message=response_text,
-                food_snapshot=json.dumps(foods[:10], ensure_ascii=False),
-            )
+        jobs.enqueue(
+            "chat_log.save",
+            {
+                "sessionId": session_id,
+                "message": message,
+                "response": response_text,
+                "foods": foods[:10],
+            },
         )
-        db.session.commit()
-    except Exception as e:
-        print(f"DB Error: {e}")
+    except Exception:
+        ai_logger.exception("Không đưa được chat log vào hàng đợi")
 
     return jsonify({"sessionId": session_id, "response": response_text})
+
+
+@jobs.task("chat_log.save")
+def save_chat_log(payload: Dict) -> None:
+    snapshot = json.dumps(payload.get("foods") or [], ensure_ascii=False)
+    db.session.add_all(
+        [
+            ChatLog(session_id=payload["sessionId"], role="user", message=payload["message"],
+                    food_snapshot=snapshot),
+            ChatLog(session_id=payload["sessionId"], role="assistant", message=payload["response"],
+                    food_snapshot=snapshot),
+        ]
+    )
+    db.session.commit()
 # ============================================
 # STATISTICS API
 # ============================================
-@app.get("/api/stats")
+@api.get("/api/stats")
 # def get_stats():
 #     total_foods = Food.query.count()
 #     total_bookings = Booking.query.count()
@@ -883,20 +1283,27 @@ def ai_chat():
 #         .limit(3)
 #         .all()
 #     )
-@app.get("/api/stats")
+@api.get("/api/stats")
+@read_only
 def get_stats():
+    # Dashboard poll liên tục: cache ngắn hạn, mọi thao tác ghi gọi invalidate("stats")
+    return jsonify(cache.get_or_set("stats", "summary", compute_stats, ttl=current_app.config["STATS_CACHE_SECONDS"]))
+
+
+def compute_stats() -> Dict:
     total_foods = Food.query.count()
-    total_bookings = Booking.query.count()
+    # Archive chỉ chứa đơn completed/cancelled: cộng vào tổng số đơn và doanh thu
+    archived = archive.archive_totals()
+    total_bookings = Booking.query.count() + archived["bookings"]
     pending = Booking.query.filter_by(status="pending").count()
     confirmed = Booking.query.filter_by(status="confirmed").count()
     revenue = (
         db.session.query(func.coalesce(func.sum(Booking.total_amount), 0))
         .filter(Booking.status.in_(["confirmed", "completed"]))
         .scalar()
-    )
+    ) + archived["revenue"]
 
     # FIX: Đổi datetime.utcnow() thành datetime.now(timezone.utc)
-    from datetime import timezone
     upcoming = (
         Booking.query.filter(
             Booking.booking_datetime >= datetime.now(timezone.utc),
@@ -906,32 +1313,103 @@ def get_stats():
         .limit(3)
         .all()
     )
-    
-    return jsonify(
-        {
-            "totalFoods": total_foods,
-            "totalBookings": total_bookings,
-            "pendingBookings": pending,
-            "confirmedBookings": confirmed,
-            "totalRevenue": revenue,
-            "upcoming": [
-                {
-                    "id": booking.code,
-                    "guestName": booking.customer_name,
-                    "guests": booking.guests,
-                    "dateTime": booking.booking_datetime.isoformat(),
-                    "status": booking.status,
-                }
-                for booking in upcoming
-            ],
-        }
-    )
+
+    return {
+        "totalFoods": total_foods,
+        "totalBookings": total_bookings,
+        "pendingBookings": pending,
+        "confirmedBookings": confirmed,
+        "totalRevenue": revenue,
+        "upcoming": [
+            {
+                "id": booking.code,
+                "guestName": booking.customer_name,
+                "guests": booking.guests,
+                "dateTime": booking.booking_datetime.isoformat(),
+                "status": booking.status,
+            }
+            for booking in upcoming
+        ],
+    }
+
+
+# ============================================
+# PROFILER API (ADMIN)
+# ============================================
+@api.get("/api/admin/profiler")
+@admin_required
+def get_profiler():
+    return jsonify(profiler.state().summary())
+
+
+@api.put("/api/admin/profiler")
+@admin_required
+def update_profiler():
+    payload = request.get_json(silent=True) or {}
+    try:
+        profiling.configure(
+            sample_rate=_optional_float(payload.get("sampleRate")),
+            mode=payload.get("mode"),
+            interval_ms=_optional_float(payload.get("intervalMs")),
+        )
+    except (TypeError, ValueError) as error:
+        return jsonify({"error": str(error)}), 400
+    return jsonify(profiler.state().summary())
+
+
+@api.delete("/api/admin/profiler")
+@admin_required
+def reset_profiler():
+    profiler.state().reset()
+    return jsonify({"message": "Đã xóa dữ liệu profile"})
+
+
+@api.get("/api/admin/profiler/<string:fmt>")
+@admin_required
+def export_profile(fmt: str):
+    """Dữ liệu profile của worker xử lý request này (pid trong X-Profiler-Worker)."""
+    endpoint = request.args.get("endpoint") or None
+    if fmt == "pstats":
+        data = profiling.export_pstats(endpoint)
+        if data is None:
+            return jsonify({"error": "Chưa có dữ liệu cProfile", "worker": os.getpid()}), 404
+        response = Response(
+            data,
+            mimetype="application/octet-stream",
+            headers={"Content-Disposition": "attachment; filename=mtp-profile.prof"},
+        )
+    elif fmt == "collapsed":
+        response = Response(profiling.export_collapsed(endpoint), mimetype="text/plain")
+    elif fmt == "text":
+        response = Response(profiling.export_text(endpoint), mimetype="text/plain")
+    else:
+        return jsonify({"error": "Định dạng phải là pstats, collapsed hoặc text"}), 400
+    response.headers["X-Profiler-Worker"] = str(os.getpid())
+    return response
+
+
+@api.get("/api/admin/jobs")
+@admin_required
+def get_job_queue():
+    """Độ sâu hàng đợi job theo loại/trạng thái."""
+    return jsonify(jobs.stats())
+
+
+@api.get("/api/admin/cache")
+@admin_required
+def get_cache_stats():
+    """Hit/miss/eviction của cache theo namespace (worker hiện tại)."""
+    return jsonify(cache.stats())
+
+
+def _optional_float(value) -> Optional[float]:
+    return None if value is None else float(value)
 
 
 # ============================================
 # SEED DATA
 # ============================================
-@app.post("/api/seed")
+@api.post("/api/seed")
 @admin_required
 def seed_data():
     if Food.query.count() > 0:
@@ -986,13 +1464,14 @@ def seed_data():
         db.session.add(Food(**food_data))
 
     db.session.commit()
+    cache.invalidate("stats")
     return jsonify({"message": "Seed dữ liệu thành công", "foods": len(sample_foods)})
 
 
 # ============================================
 # ROOT & ERROR HANDLERS
 # ============================================
-@app.get("/")
+@api.get("/")
 def index():
     return jsonify(
         {
@@ -1010,54 +1489,237 @@ def index():
     )
 
 
-@app.errorhandler(ValidationError)
+@api.app_errorhandler(ValidationError)
 def handle_validation_error(error: ValidationError):
     return jsonify({"error": error.messages}), 400
 
 
-@app.errorhandler(404)
+@api.app_errorhandler(404)
 def not_found(_):
     return jsonify({"error": "Không tìm thấy tài nguyên"}), 404
 
 
-@app.errorhandler(500)
+@api.app_errorhandler(500)
 def internal_error(e):
-    print(f"Internal error: {e}")  
+    logger.error("Internal error: %s", e, exc_info=getattr(e, "original_exception", None) or e)
     return jsonify({"error": "Lỗi hệ thống"}), 500
 
 
 # ============================================
-# BOOTSTRAP - Tự động tạo database khi app start
+# BOOTSTRAP
 # ============================================
-def init_db():
-    """Khởi tạo database tables (chạy khi app start, kể cả trên Render)"""
-    with app.app_context():
-        try:
-            print(f"[DB] Đang khởi tạo database...")
-            print(f"[DB] DATABASE_URL: {database_url[:50]}..." if len(database_url) > 50 else f"[DB] DATABASE_URL: {database_url}")
-            db.create_all()
-            print("[DB] ✅ Database tables đã được khởi tạo thành công")
-        except Exception as e:
-            print(f"[DB] ❌ Lỗi khởi tạo database: {e}")
-            import traceback
-            traceback.print_exc()
-
-# Gọi init_db() khi module được import (chạy trên cả local và Render)
-init_db()
-
-# Thêm route để trigger init_db() nếu cần (cho admin)
-@app.route("/api/init-db", methods=["GET", "POST"])
+# Schema do migration quản lý (flask db upgrade); route này giữ lại cho
+# các môi trường cũ cần tạo bảng thủ công.
+@api.route("/api/init-db", methods=["GET", "POST"])
 def trigger_init_db():
     """Route để trigger khởi tạo database (dùng khi cần)"""
     try:
-        with app.app_context():
-            db.create_all()
+        db.create_all()
         return jsonify({"message": "Database tables đã được khởi tạo thành công"}), 200
     except Exception as e:
         import traceback
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
 
+
+@click.command("init-db")
+def init_db_command():
+    """Tạo bảng bằng create_all và đánh dấu migration ở head (DB mới, dev)."""
+    from flask_migrate import stamp
+
+    db.create_all()
+    if current_app.extensions["jobs"].shared:
+        # Bảng jobs không nằm trong db.metadata: stamp() bỏ qua migration tạo nó
+        jobs_table.create(db.engine, checkfirst=True)
+    stamp()
+    click.echo("[DB] ✅ Database tables đã được khởi tạo thành công")
+
+
+@click.command("prune-tombstones")
+def prune_tombstones_command():
+    """Xóa tombstone cũ hơn TOMBSTONE_RETENTION_DAYS."""
+    cutoff = datetime.utcnow() - timedelta(days=current_app.config["TOMBSTONE_RETENTION_DAYS"])
+    result = db.session.execute(db.delete(Tombstone).where(Tombstone.deleted_at < cutoff))
+    db.session.commit()
+    click.echo(f"Đã xóa {result.rowcount} tombstone")
+
+
+@click.command("archive-bookings")
+@click.option("--days", type=int, default=None, help="Tuổi tối thiểu (ngày), mặc định ARCHIVE_AFTER_DAYS")
+@click.option("--batch-size", type=int, default=None, help="Số đơn mỗi transaction")
+@click.option("--max-batches", type=int, default=None, help="Dừng sau số lô này (mặc định chạy hết)")
+def archive_bookings_command(days, batch_size, max_batches):
+    """Chuyển đơn completed/cancelled cũ sang booking_archive."""
+    days = current_app.config["ARCHIVE_AFTER_DAYS"] if days is None else days
+    batch_size = batch_size or current_app.config["ARCHIVE_BATCH_SIZE"]
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    moved = archive.archive_bookings(cutoff, batch_size, max_batches)
+    cache.invalidate("stats")
+    sizes = ", ".join(f"{table}={count}" for table, count in archive.table_sizes().items())
+    click.echo(f"Đã chuyển {moved} đơn vào archive ({sizes})")
+
+
+@click.command("jobs-worker")
+@click.option("--threads", type=int, default=1, help="Số thread chạy job trong process này")
+@click.option("--once", is_flag=True, help="Chạy hết job đến hạn rồi thoát")
+@click.option("--type", "types", multiple=True, help="Chỉ chạy các loại job này")
+@click.option("--poll-interval", type=float, default=1.0, help="Giây chờ khi hàng đợi trống")
+def jobs_worker_command(threads, once, types, poll_interval):
+    """Process worker chạy job nền (chat log, ...)."""
+    app = current_app._get_current_object()
+    logger.info("Job worker khởi động", extra={"threads": threads, "types": ",".join(types) or "*"})
+    processed = jobs.work(app, threads=threads, once=once, poll_interval=poll_interval, types=list(types) or None)
+    click.echo(f"Đã chạy {processed} job")
+
+
+@click.command("jobs-stats")
+@click.option("--purge-days", type=int, default=None, help="Xóa job done/failed cũ hơn số ngày này")
+def jobs_stats_command(purge_days):
+    """In độ sâu hàng đợi job (JSON)."""
+    if purge_days is not None:
+        removed = jobs.purge(datetime.utcnow() - timedelta(days=purge_days))
+        click.echo(f"Đã xóa {removed} job cũ")
+    click.echo(json.dumps(jobs.stats(), ensure_ascii=False, indent=2))
+
+
+# ============================================
+# APPLICATION FACTORY
+# ============================================
+def create_app(config: Optional[Dict] = None) -> Flask:
+    """Tạo Flask app. Không kết nối DB, không gọi Groq, không tạo thư mục."""
+    # Load .env đặt cùng thư mục với app.py (backend/.env)
+    load_dotenv(BASE_DIR / ".env")
+
+    app = Flask(__name__)
+    CORS(app,
+         resources={r"/api/*": {"origins": "*"}},
+         allow_headers=["Content-Type", "Authorization"],
+         methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+         supports_credentials=True)
+
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI=normalize_database_url(
+            os.getenv("DATABASE_URL", f"sqlite:///{DEFAULT_DB_PATH.as_posix()}")
+        ),
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        JWT_SECRET_KEY=os.getenv("JWT_SECRET_KEY", "mtp-dev-secret"),
+        JSON_SORT_KEYS=False,
+        GROQ_API_KEY=os.getenv("GROQ_API_KEY"),
+        GROQ_MODEL=os.getenv("GROQ_MODEL", "llama-3.1-8b-instant"),  # Free model tốt nhất của Groq
+    )
+    if config:
+        app.config.update(config)
+    app.config.setdefault("JSON_PROVIDER", os.getenv("JSON_PROVIDER", "orjson"))
+    app.config.setdefault("METRICS_TOKEN", os.getenv("METRICS_TOKEN"))
+    app.config.setdefault("METRICS_MULTIPROC_DIR", os.getenv("METRICS_MULTIPROC_DIR") or None)
+    app.config.setdefault("SQL_QUERY_WARN_THRESHOLD", int(os.getenv("SQL_QUERY_WARN_THRESHOLD", 20)))
+    for key, default in (("LOG_LEVEL", "INFO"), ("LOG_LEVELS", ""), ("LOG_FORMAT", "json"),
+                         ("LOG_SAMPLE_RATES", "")):
+        app.config.setdefault(key, os.getenv(key, default))
+    app.config.setdefault("EVENTS_BROKER_URL", os.getenv("EVENTS_BROKER_URL", "memory://"))
+    app.config.setdefault(
+        "EVENTS_MAX_STREAMS",
+        int(os.getenv("EVENTS_MAX_STREAMS")
+            or recommended_event_streams(int(os.getenv("GUNICORN_THREADS") or recommended_threads("gthread")))),
+    )
+    app.config.setdefault("EVENTS_TICKET_SECONDS", int(os.getenv("EVENTS_TICKET_SECONDS", 60)))
+    app.config.setdefault(
+        "RECOMMENDATIONS_HALF_LIFE_DAYS", float(os.getenv("RECOMMENDATIONS_HALF_LIFE_DAYS", 30))
+    )
+    app.config.setdefault(
+        "RECOMMENDATIONS_REFRESH_SECONDS", float(os.getenv("RECOMMENDATIONS_REFRESH_SECONDS", 30))
+    )
+    app.config.setdefault("DELTA_SYNC_LAG_SECONDS", float(os.getenv("DELTA_SYNC_LAG_SECONDS", 2)))
+    app.config.setdefault("TOMBSTONE_RETENTION_DAYS", int(os.getenv("TOMBSTONE_RETENTION_DAYS", 30)))
+    app.config.setdefault(
+        "JOBS_DATABASE_URL", os.getenv("JOBS_DATABASE_URL") or f"sqlite:///{(DATA_DIR / 'jobs.db').as_posix()}"
+    )
+    app.config.setdefault("JOBS_EAGER", os.getenv("JOBS_EAGER", "").lower() in {"1", "true", "yes", "on"})
+    app.config.setdefault("JOBS_CONCURRENCY", os.getenv("JOBS_CONCURRENCY", ""))
+    # Cache dùng chung giữa các gunicorn worker: sqlite:///... (mặc định), memory:// hoặc redis://...
+    app.config.setdefault(
+        "CACHE_URL", os.getenv("CACHE_URL") or f"sqlite:///{(DATA_DIR / 'cache.db').as_posix()}"
+    )
+    app.config.setdefault("CACHE_MAX_BYTES", int(os.getenv("CACHE_MAX_BYTES", 64 * 1024 * 1024)))
+    app.config.setdefault("STATS_CACHE_SECONDS", float(os.getenv("STATS_CACHE_SECONDS", 15)))
+    app.config.setdefault("ADMIN_CACHE_SECONDS", float(os.getenv("ADMIN_CACHE_SECONDS", 300)))
+    app.config.setdefault("CHAT_CACHE_SECONDS", float(os.getenv("CHAT_CACHE_SECONDS", 3600)))
+    app.config.setdefault("ARCHIVE_AFTER_DAYS", int(os.getenv("ARCHIVE_AFTER_DAYS", 90)))
+    app.config.setdefault("ARCHIVE_BATCH_SIZE", int(os.getenv("ARCHIVE_BATCH_SIZE", 500)))
+    app.config.setdefault("PROFILER_SAMPLE_RATE", float(os.getenv("PROFILER_SAMPLE_RATE", 0)))
+    app.config.setdefault("PROFILER_MODE", os.getenv("PROFILER_MODE", "sampling"))
+    app.config.setdefault("PROFILER_SAMPLE_INTERVAL_MS", float(os.getenv("PROFILER_SAMPLE_INTERVAL_MS", 5)))
+    app.config.setdefault("PROFILER_SYNC_SECONDS", float(os.getenv("PROFILER_SYNC_SECONDS", 5)))
+    app.json = fastjson.provider_class(app.config["JSON_PROVIDER"])(app)
+    app.config["SQLALCHEMY_DATABASE_URI"] = normalize_database_url(
+        app.config["SQLALCHEMY_DATABASE_URI"]
+    )
+    app.config.setdefault(
+        "SQLALCHEMY_ENGINE_OPTIONS", engine_options(app.config["SQLALCHEMY_DATABASE_URI"])
+    )
+    # Read replica: DATABASE_REPLICA_URLS=postgresql://replica1/...,postgresql://replica2/...
+    app.config.setdefault("DATABASE_REPLICA_URLS", os.getenv("DATABASE_REPLICA_URLS", ""))
+    app.config.setdefault("DB_REPLICA_STICKY_SECONDS", float(os.getenv("DB_REPLICA_STICKY_SECONDS", 5)))
+    if app.config["SQLALCHEMY_DATABASE_URI"] == f"sqlite:///{DEFAULT_DB_PATH.as_posix()}":
+        # SQLite không tự tạo thư mục chứa file DB
+        DATA_DIR.mkdir(exist_ok=True)
+
+    db.init_app(app)
+    with app.app_context():
+        # Engine đã tạo nhưng chưa mở connection nào
+        for engine in db.engines.values():
+            configure_engine(engine)
+            Metrics.instrument_engine(engine)
+    migrate.init_app(app, db)
+    jwt.init_app(app)
+    replica_router.init_app(app, cache=cache)
+    for engine in app.extensions["db_routing"]["engines"].values():
+        Metrics.instrument_engine(engine)
+    # after_request chạy theo thứ tự ngược: metrics đo kích thước sau khi nén,
+    # access log ghi sau cùng
+    app_logging.init_app(app)
+    metrics.init_app(app)
+    compressor.init_app(app)
+    # Sau logging/metrics: response 429/503 của limiter vẫn có X-Request-ID
+    # mới và được đếm trong mtp_http_requests_total
+    limiter.init_app(app)
+    profiler.init_app(app, authorize=_is_admin_request, cache=cache)
+    booking_events.init_app(app)
+    recommender.init_app(app, loader=_booking_item_rows)
+    jobs.init_app(app)
+    cache.init_app(app)
+
+    app.register_blueprint(api)
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(prune_tombstones_command)
+    app.cli.add_command(archive_bookings_command)
+    app.cli.add_command(jobs_worker_command)
+    app.cli.add_command(jobs_stats_command)
+    return app
+
+
+def reset_after_fork(app: Flask) -> None:
+    """Gọi từ gunicorn post_fork: bỏ connection/client thừa hưởng từ master."""
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+    for engine in app.extensions["db_routing"]["engines"].values():
+        engine.dispose(close=False)
+    app.extensions["db_routing"]["recent_writers"].clear()
+    app.extensions["ratelimit"].reset()
+    app.extensions["profiler"].reset()
+    app.extensions["logging"].restart()
+    app.extensions["events"]["broker"].reset()
+    app.extensions.pop("groq", None)
+    app.extensions.pop("catalog", None)
+    app.extensions["recommendations"].reset()
+    app.extensions["jobs"].reset()
+    app.extensions["cache"].reset()
+
+
+# Entry point cho gunicorn (app:app) và flask CLI
+app = create_app()
+
 if __name__ == "__main__":
     print("=" * 60)
     print(" MTP Food Backend Server (SQL + Auth + AI)")
@@ -1066,4 +1728,4 @@ if __name__ == "__main__":
     print(" Admin register: POST /api/auth/register")
     print(" AI Chat: POST /api/ai/chat")
     print("=" * 60)
-    app.run(debug=True, host="127.0.0.1", port=5000)
\ No newline at end of file
+    app.run(debug=True, host="127.0.0.1", port=5000)
@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import atexit
+import copy
+import logging
+import queue
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+from flask import Flask, Response, current_app, g, has_request_context, request
+
+import fastjson
+
+# ============================================
+# STRUCTURED LOGGING
+# ============================================
+# Thread xử lý request chỉ đưa LogRecord vào queue (put_nowait, queue đầy thì
+# bỏ record); thread nền của QueueListener mới format JSON và ghi stdout.
+# Mỗi record mang request_id, method, route của request đang chạy.
+
+REQUEST_ID_HEADER = "X-Request-ID"
+_REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+# Thuộc tính chuẩn của LogRecord; thuộc tính khác (truyền qua extra=) được ghi ra JSON
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+_CONTEXT_FIELDS = ("request_id", "method", "route")
+
+
+def parse_pairs(value: Optional[str]) -> Dict[str, str]:
+    """"mtp.access=WARNING,sqlalchemy.engine=INFO" -> {"mtp.access": "WARNING", ...}."""
+    pairs: Dict[str, str] = {}
+    for part in (value or "").split(","):
+        name, sep, setting = part.partition("=")
+        if sep and name.strip():
+            pairs[name.strip()] = setting.strip()
+    return pairs
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key in _RECORD_FIELDS or key.startswith("_") or key == "sample_rate":
+                continue
+            if value is None and key in _CONTEXT_FIELDS:
+                continue
+            data[key] = value if isinstance(value, (str, int, float, bool, type(None))) else str(value)
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data["exc"] = record.exc_text
+        if record.stack_info:
+            data["stack"] = record.stack_info
+        return fastjson.dumps(data).decode("utf-8")
+
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s [%(name)s] %(request_id)s %(message)s"
+
+
+class RequestContextFilter(logging.Filter):
+    """Gắn request_id/method/route; chạy trong thread của request."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "request_id"):
+            if has_request_context():
+                record.request_id = g.get("request_id")
+                record.method = request.method
+                record.route = request.url_rule.rule if request.url_rule else None
+            else:
+                record.request_id = record.method = record.route = None
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Giữ lại một phần record INFO/DEBUG của logger tần suất cao.
+
+    Tỷ lệ lấy theo tiền tố tên logger dài nhất trong ``rates`` hoặc theo
+    ``extra={"sample_rate": ...}`` của từng record; WARNING trở lên luôn giữ.
+    """
+
+    def __init__(self, rates: Optional[Dict[str, float]] = None):
+        super().__init__()
+        self.rates = dict(rates or {})
+        self._cache: Dict[str, float] = {}
+
+    def rate_for(self, name: str) -> float:
+        rate = self._cache.get(name)
+        if rate is None:
+            rate = 1.0
+            prefix = name
+            while prefix:
+                if prefix in self.rates:
+                    rate = self.rates[prefix]
+                    break
+                prefix = prefix.rpartition(".")[0]
+            self._cache[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = getattr(record, "sample_rate", None)
+        if rate is None:
+            rate = self.rate_for(record.name)
+        return rate >= 1 or random.random() < rate
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler không bao giờ chặn: queue đầy thì bỏ record và đếm."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Chỉ ghép message; format JSON (và traceback) để thread nền làm
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """Ghi ra sys.stdout hiện tại (không giữ stream cũ sau khi bị thay)."""
+
+    def __init__(self):
+        super().__init__(sys.stdout)
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, _value):
+        pass
+
+
+class AppLogging:
+    """Cấu hình logging cho cả process; init_app gắn request ID + access log."""
+
+    def __init__(self, app: Optional[Flask] = None):
+        self.handler: Optional[NonBlockingQueueHandler] = None
+        self.listener: Optional[QueueListener] = None
+        self.output = _StdoutHandler()
+        self.sampler = SamplingFilter()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        config = app.config
+        config.setdefault("LOG_LEVEL", "INFO")
+        config.setdefault("LOG_LEVELS", "")
+        config.setdefault("LOG_FORMAT", "json")
+        config.setdefault("LOG_SAMPLE_RATES", "")
+        config.setdefault("LOG_QUEUE_SIZE", 10000)
+        config.setdefault("LOG_ACCESS", True)
+
+        self.configure(
+            level=config["LOG_LEVEL"],
+            levels=parse_pairs(config["LOG_LEVELS"]),
+            fmt=config["LOG_FORMAT"],
+            sample_rates={name: float(rate) for name, rate in parse_pairs(config["LOG_SAMPLE_RATES"]).items()},
+            queue_size=int(config["LOG_QUEUE_SIZE"]),
+        )
+        app.extensions["logging"] = self
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    def configure(self, level: str = "INFO", levels: Optional[Dict[str, str]] = None,
+                  fmt: str = "json", sample_rates: Optional[Dict[str, float]] = None,
+                  queue_size: int = 10000) -> None:
+        """Gắn QueueHandler vào root logger (một lần mỗi process) và áp level/sampling."""
+        with self._lock:
+            root = logging.getLogger()
+            root.setLevel(level.upper())
+            for name, name_level in (levels or {}).items():
+                logging.getLogger(name).setLevel(name_level.upper())
+            self.output.setFormatter(
+                logging.Formatter(TEXT_FORMAT) if fmt == "text" else JsonFormatter()
+            )
+            self.sampler.rates = dict(sample_rates or {})
+            self.sampler._cache = {}
+
+            if self.handler is None:
+                self.handler = NonBlockingQueueHandler(queue.Queue(queue_size))
+                self.handler.addFilter(self.sampler)
+                self.handler.addFilter(RequestContextFilter())
+                root.addHandler(self.handler)
+                self._start_listener()
+                atexit.register(self.stop)
+
+    def _start_listener(self) -> None:
+        self.listener = QueueListener(self.handler.queue, self.output, respect_handler_level=True)
+        self.listener.start()
+
+    def restart(self) -> None:
+        """Sau fork thread listener của master không còn: tạo queue + thread mới."""
+        with self._lock:
+            if self.handler is None:
+                return
+            self.handler.queue = queue.Queue(self.handler.queue.maxsize)
+            self.handler.dropped = 0
+            self._start_listener()
+
+    def stop(self) -> None:
+        """Ghi nốt các record còn trong queue (atexit)."""
+        listener, self.listener = self.listener, None
+        if listener is not None and listener._thread is not None:
+            listener.stop()
+
+    @staticmethod
+    def _before_request() -> None:
+        incoming = request.headers.get(REQUEST_ID_HEADER, "")
+        g.request_id = incoming if _REQUEST_ID_RE.match(incoming) else uuid.uuid4().hex
+        g._log_started = time.perf_counter()
+
+    @staticmethod
+    def _after_request(response: Response) -> Response:
+        request_id = g.get("request_id")
+        if request_id:
+            response.headers[REQUEST_ID_HEADER] = request_id
+        started = g.get("_log_started")
+        if started is not None and current_app.config["LOG_ACCESS"]:
+            # 5xx ghi ở mức ERROR để không bao giờ bị sampling bỏ qua
+            level = logging.ERROR if response.status_code >= 500 else logging.INFO
+            access_logger.log(
+                level, "%s %s %s", request.method, request.path, response.status_code,
+                extra={
+                    "status": response.status_code,
+                    "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+                },
+            )
+        return response
+
+
+access_logger = logging.getLogger("mtp.access")
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import json
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import case, func
+
+from extensions import db
+from models import ArchivedBooking, Booking, BookingItem, Tombstone
+
+logger = logging.getLogger("mtp.archive")
+
+# ============================================
+# BOOKING ARCHIVE (HOT / COLD)
+# ============================================
+# Đơn completed/cancelled có booking_datetime cũ hơn ARCHIVE_AFTER_DAYS được
+# chuyển sang bảng booking_archive (items gộp thành một cột JSON) theo từng lô,
+# mỗi lô một transaction: bảng bookings/booking_items chỉ còn đơn đang vận
+# hành nên kích thước (và độ sâu index) không tăng theo thời gian. Tra cứu
+# theo mã rơi xuống archive; thống kê cộng cả hai bảng. Mỗi đơn chuyển đi để
+# lại tombstone để client đồng bộ delta bỏ đơn khỏi danh sách.
+
+FINISHED_STATUSES = ("completed", "cancelled")
+ITEM_FIELDS = ("id", "booking_id", "food_id", "food_name", "price", "quantity")
+
+
+def archive_bookings(cutoff: datetime, batch_size: int = 500, max_batches: Optional[int] = None) -> int:
+    """Chuyển các đơn đã xong có booking_datetime < ``cutoff``; trả về số đơn đã chuyển."""
+    bookings = Booking.__table__
+    items = BookingItem.__table__
+    archived = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        ids = db.session.scalars(
+            db.select(bookings.c.id)
+            .where(bookings.c.status.in_(FINISHED_STATUSES), bookings.c.booking_datetime < cutoff)
+            .order_by(bookings.c.id)
+            .limit(batch_size)
+        ).all()
+        if not ids:
+            break
+
+        grouped: Dict[int, List[Dict]] = {booking_id: [] for booking_id in ids}
+        for item in db.session.execute(
+            db.select(items).where(items.c.booking_id.in_(ids)).order_by(items.c.id)
+        ).mappings():
+            grouped[item["booking_id"]].append({field: item[field] for field in ITEM_FIELDS})
+
+        now = datetime.utcnow()
+        rows = []
+        for booking in db.session.execute(db.select(bookings).where(bookings.c.id.in_(ids))).mappings():
+            row = dict(booking)
+            row["booking_id"] = row.pop("id")  # archive có khóa riêng
+            row["items"] = json.dumps(grouped[row["booking_id"]], ensure_ascii=False)
+            row["archived_at"] = now
+            rows.append(row)
+
+        db.session.execute(db.insert(ArchivedBooking.__table__), rows)
+        db.session.execute(
+            db.insert(Tombstone.__table__),
+            [{"entity": "booking", "entity_key": row["code"], "deleted_at": now} for row in rows],
+        )
+        db.session.execute(db.delete(items).where(items.c.booking_id.in_(ids)))
+        db.session.execute(db.delete(bookings).where(bookings.c.id.in_(ids)))
+        db.session.commit()
+
+        archived += len(rows)
+        batches += 1
+        logger.info("Đã chuyển %s đơn vào archive", len(rows), extra={"batch": batches})
+    return archived
+
+
+def find_archived(code: str) -> Optional[Booking]:
+    """Booking (tạm, chỉ đọc) từ archive theo mã; None nếu không có."""
+    archived = ArchivedBooking.query.filter_by(code=code).first()
+    return archived.to_booking() if archived else None
+
+
+def archive_totals() -> Dict[str, int]:
+    """Số đơn và doanh thu (đơn completed) trong archive, một query."""
+    count, revenue = db.session.query(
+        func.count(ArchivedBooking.id),
+        func.coalesce(
+            func.sum(case((ArchivedBooking.status == "completed", ArchivedBooking.total_amount), else_=0)), 0
+        ),
+    ).one()
+    return {"bookings": count, "revenue": revenue}
+
+
+def table_sizes() -> Dict[str, int]:
+    return {
+        "bookings": db.session.query(func.count(Booking.id)).scalar(),
+        "booking_items": db.session.query(func.count(BookingItem.id)).scalar(),
+        "booking_archive": db.session.query(func.count(ArchivedBooking.id)).scalar(),
+    }
@@ -0,0 +1 @@
+"""Benchmark scripts cho backend (chạy: python -m benchmarks.<tên> từ thư mục backend)."""
@@ -0,0 +1,210 @@
+"""Sinh dữ liệu giả lập cố định (cùng seed -> cùng dữ liệu) cho benchmark.
+
+Nạp bằng bulk insert (executemany theo lô) qua SQLAlchemy Core, chạy được
+với SQLite lẫn Postgres:
+
+    python -m benchmarks.dataset --url sqlite:///data/bench.db --scale full
+    python -m benchmarks.dataset --url postgresql://localhost/mtp_bench --scale medium
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.engine import Engine
+from werkzeug.security import generate_password_hash
+
+from db_engine import configure_engine, normalize_database_url
+from extensions import db
+from models import BOOKING_STATUSES, STATUS_LABELS, AdminUser, Booking, BookingItem, ChatLog, Food
+
+SCALES: Dict[str, Dict[str, int]] = {
+    "tiny": {"foods": 100, "bookings": 2_000, "chat_logs": 1_000},
+    "small": {"foods": 1_000, "bookings": 50_000, "chat_logs": 20_000},
+    "medium": {"foods": 5_000, "bookings": 200_000, "chat_logs": 100_000},
+    "full": {"foods": 10_000, "bookings": 1_000_000, "chat_logs": 500_000},
+}
+
+# Mốc thời gian cố định để dữ liệu không đổi theo ngày chạy
+ANCHOR = datetime(2026, 1, 1, 12, 0)
+STATUS_WEIGHTS = (20, 40, 30, 10)  # theo thứ tự BOOKING_STATUSES
+BATCH_SIZE = 5_000
+
+ADMIN_EMAIL = "bench@example.com"
+ADMIN_PASSWORD = "benchmark123"
+
+DISHES = ["Phở bò", "Bún chả", "Cơm tấm", "Gỏi cuốn", "Bò bít tết", "Lẩu thái", "Cá kho tộ", "Chè"]
+QUESTIONS = ["Gợi ý món cho 4 người", "Món nào không cay?", "Có món chay không?", "Món bán chạy nhất?"]
+
+
+def _batches(rows: Iterator[Dict], size: int = BATCH_SIZE) -> Iterator[List[Dict]]:
+    batch: List[Dict] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _history(status: str, created: datetime) -> str:
+    steps = ["pending"] if status == "pending" else ["pending", status]
+    return json.dumps(
+        [
+            {"status": step, "label": STATUS_LABELS[step], "note": "", "time": created.isoformat()}
+            for step in steps
+        ]
+    )
+
+
+def food_rows(count: int, rng: random.Random) -> Iterator[Dict]:
+    for n in range(1, count + 1):
+        created = ANCHOR - timedelta(days=rng.randint(30, 720))
+        yield {
+            "id": n,
+            "name": f"{rng.choice(DISHES)} #{n}",
+            "price": rng.randrange(20_000, 500_000, 1_000),
+            "image": f"https://images.example.com/foods/{n}.jpg",
+            "description": "Món ăn dùng cho benchmark",
+            "is_active": rng.random() > 0.05,
+            "created_at": created,
+            "updated_at": created,
+        }
+
+
+def booking_rows(count: int, foods: int, rng: random.Random) -> Iterator[Dict]:
+    """Sinh booking kèm danh sách item (key "_items") của từng booking."""
+    item_id = 0
+    for n in range(1, count + 1):
+        status = rng.choices(BOOKING_STATUSES, STATUS_WEIGHTS)[0]
+        created = ANCHOR - timedelta(minutes=rng.randint(0, 365 * 24 * 60))
+        items = []
+        for _ in range(rng.randint(1, 4)):
+            item_id += 1
+            items.append(
+                {
+                    "id": item_id,
+                    "booking_id": n,
+                    "food_id": rng.randint(1, foods),
+                    "food_name": rng.choice(DISHES),
+                    "price": rng.randrange(20_000, 500_000, 1_000),
+                    "quantity": rng.randint(1, 4),
+                }
+            )
+        yield {
+            "id": n,
+            "code": f"BK{n:08X}",
+            "customer_name": f"Khách hàng {n}",
+            "customer_phone": f"09{rng.randrange(10**8):08d}",
+            "customer_email": f"khach{n}@example.com",
+            "guests": rng.randint(1, 12),
+            "booking_datetime": created + timedelta(hours=rng.randint(2, 24 * 60)),
+            "note": "",
+            "status": status,
+            "total_amount": sum(item["price"] * item["quantity"] for item in items),
+            "status_history": _history(status, created),
+            "created_at": created,
+            "updated_at": created,
+            "_items": items,
+        }
+
+
+def chat_rows(count: int, rng: random.Random) -> Iterator[Dict]:
+    session_id = ""
+    for n in range(1, count + 1):
+        if n % 2 == 1:
+            session_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        created = ANCHOR - timedelta(seconds=rng.randint(0, 365 * 24 * 3600))
+        yield {
+            "id": n,
+            "session_id": session_id,
+            "role": "user" if n % 2 else "assistant",
+            "message": rng.choice(QUESTIONS) if n % 2 else "Bạn có thể thử " + rng.choice(DISHES),
+            "food_snapshot": "[]",
+            "created_at": created,
+            "updated_at": created,
+        }
+
+
+def generate(url: str, foods: int, bookings: int, chat_logs: int, seed: int = 42) -> Dict:
+    """Xóa và tạo lại schema rồi nạp dữ liệu; trả về thống kê thời gian nạp."""
+    url = normalize_database_url(url)
+    if url.startswith("sqlite:///") and ":memory:" not in url:
+        Path(url[len("sqlite:///"):]).parent.mkdir(parents=True, exist_ok=True)
+    engine = create_engine(url)
+    configure_engine(engine)
+    db.metadata.drop_all(engine)
+    db.metadata.create_all(engine)
+
+    rng = random.Random(seed)
+    timings: Dict[str, float] = {}
+    with engine.begin() as conn:
+        started = time.perf_counter()
+        for batch in _batches(food_rows(foods, rng)):
+            conn.execute(Food.__table__.insert(), batch)
+        timings["foods"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for batch in _batches(booking_rows(bookings, foods, rng)):
+            items = [item for row in batch for item in row.pop("_items")]
+            conn.execute(Booking.__table__.insert(), batch)
+            conn.execute(BookingItem.__table__.insert(), items)
+        timings["bookings"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for batch in _batches(chat_rows(chat_logs, rng)):
+            conn.execute(ChatLog.__table__.insert(), batch)
+        timings["chat_logs"] = time.perf_counter() - started
+
+        conn.execute(
+            AdminUser.__table__.insert(),
+            {
+                "full_name": "Benchmark Admin",
+                "email": ADMIN_EMAIL,
+                "password_hash": generate_password_hash(ADMIN_PASSWORD),
+                "is_active": True,
+                "created_at": ANCHOR,
+                "updated_at": ANCHOR,
+            },
+        )
+    _reset_sequences(engine)
+    engine.dispose()
+    return {"foods": foods, "bookings": bookings, "chat_logs": chat_logs, "seed": seed, "load_seconds": timings}
+
+
+def _reset_sequences(engine: Engine) -> None:
+    # Id được gán sẵn khi bulk insert: Postgres cần đẩy sequence lên max(id)
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as conn:
+        for table in (Food.__table__, Booking.__table__, BookingItem.__table__, ChatLog.__table__):
+            if conn.execute(select(func.count()).select_from(table)).scalar():
+                conn.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                    f"(SELECT max(id) FROM {table.name}))"
+                ))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="sqlite:///data/bench.db")
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"Nạp dữ liệu {args.scale} ({SCALES[args.scale]}) vào {args.url} ...")
+    result = generate(args.url, seed=args.seed, **SCALES[args.scale])
+    for table, seconds in result["load_seconds"].items():
+        print(f"  {table:<10}{result[table]:>12,} dòng{seconds:>10.1f}s")
+
+
+if __name__ == "__main__":
+    main()
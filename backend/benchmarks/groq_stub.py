@@ -0,0 +1,69 @@
+"""Groq API giả lập (OpenAI-compatible) để benchmark /api/ai/chat không tốn quota.
+
+    python -m benchmarks.groq_stub --port 8765 --latency-ms 300
+    GROQ_API_KEY=stub GROQ_BASE_URL=http://127.0.0.1:8765 python app.py
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_handler(latency: float):
+    class GroqStubHandler(BaseHTTPRequestHandler):
+        def do_POST(self):  # noqa: N802 - tên do http.server quy định
+            length = int(self.headers.get("Content-Length") or 0)
+            request = json.loads(self.rfile.read(length) or b"{}")
+            time.sleep(latency)
+            body = json.dumps(
+                {
+                    "id": "chatcmpl-stub",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": request.get("model", "stub"),
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": "Bạn có thể thử Bò bít tết."},
+                            "finish_reason": "stop",
+                            "logprobs": None,
+                        }
+                    ],
+                    "usage": {"prompt_tokens": 10, "completion_tokens": 10, "total_tokens": 20},
+                },
+                ensure_ascii=False,
+            ).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return GroqStubHandler
+
+
+def start_stub(port: int = 0, latency_ms: float = 300) -> ThreadingHTTPServer:
+    """Chạy stub trong thread nền; trả về server (server.server_port là port thật)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(latency_ms / 1000))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    args = parser.parse_args()
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(args.latency_ms / 1000))
+    print(f"Groq stub: http://127.0.0.1:{args.port} (latency {args.latency_ms:.0f}ms)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""Load test so sánh các profile gunicorn trên các endpoint hiện có.
+
+Mỗi profile chạy gunicorn thật (gunicorn.conf.py + env) trên một DB SQLite
+tạm, /api/ai/chat gọi Groq stub có độ trễ cố định để mô phỏng upstream chậm.
+
+    python -m benchmarks.gunicorn_profiles --concurrency 16 --duration 10
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+from benchmarks.groq_stub import start_stub
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+PROFILES: Dict[str, Dict[str, str]] = {
+    # Tương đương lệnh cũ: gunicorn app:app (1 sync worker)
+    "legacy-sync-1": {"GUNICORN_WORKER_CLASS": "sync", "WEB_CONCURRENCY": "1", "GUNICORN_PRELOAD": "false"},
+    "sync-auto": {"GUNICORN_WORKER_CLASS": "sync"},
+    "gthread-auto": {"GUNICORN_WORKER_CLASS": "gthread"},
+}
+
+SCENARIO = [
+    ("GET", "/api/foods", None),
+    ("GET", "/api/stats", None),
+    ("POST", "/api/ai/chat", {"message": "Gợi ý món ngon", "foods": []}),
+]
+
+
+def prepare_database(path: Path) -> str:
+    url = f"sqlite:///{path}"
+    env = dict(os.environ, DATABASE_URL=url)
+    subprocess.run(
+        [sys.executable, "-m", "flask", "--app", "app", "init-db"],
+        cwd=BACKEND_DIR, env=env, check=True, capture_output=True,
+    )
+    now = datetime.utcnow().isoformat(" ")
+    with sqlite3.connect(path) as conn:
+        conn.executemany(
+            "INSERT INTO foods (name, price, image, description, is_active, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, 1, ?, ?)",
+            [(f"Món {i}", 50000 + i * 1000, "https://example.com/x.jpg", "Mô tả", now, now) for i in range(60)],
+        )
+    return url
+
+
+def run_profile(name: str, overrides: Dict[str, str], base_env: Dict[str, str], args) -> Dict:
+    port = args.port
+    env = dict(base_env, PORT=str(port), **overrides)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "app:app"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        _wait_ready(port)
+        return {"profile": name, **_drive(port, args.concurrency, args.duration)}
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def _wait_ready(port: int, timeout: float = 30) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("gunicorn không khởi động được")
+
+
+def _drive(port: int, concurrency: int, duration: float) -> Dict:
+    latencies: Dict[str, List[float]] = {path: [] for _, path, _ in SCENARIO}
+    errors = [0]
+    lock = threading.Lock()
+    stop = time.perf_counter() + duration
+
+    def client(offset: int):
+        i = offset
+        local: Dict[str, List[float]] = {path: [] for _, path, _ in SCENARIO}
+        while time.perf_counter() < stop:
+            method, path, body = SCENARIO[i % len(SCENARIO)]
+            i += 1
+            data = json.dumps(body).encode() if body is not None else None
+            req = urllib.request.Request(
+                f"http://127.0.0.1:{port}{path}", data=data, method=method,
+                headers={"Content-Type": "application/json"},
+            )
+            started = time.perf_counter()
+            try:
+                urllib.request.urlopen(req, timeout=30).read()
+                local[path].append(time.perf_counter() - started)
+            except OSError:
+                with lock:
+                    errors[0] += 1
+        with lock:
+            for path, values in local.items():
+                latencies[path].extend(values)
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    total = sum(len(values) for values in latencies.values())
+    return {
+        "rps": total / duration,
+        "errors": errors[0],
+        "p95_ms": {path: _p95(values) * 1000 for path, values in latencies.items()},
+    }
+
+
+def _p95(values: List[float]) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=20)[-1]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--groq-latency-ms", type=float, default=300)
+    parser.add_argument("--profiles", default=",".join(PROFILES))
+    args = parser.parse_args()
+
+    stub = start_stub(latency_ms=args.groq_latency_ms)
+    with tempfile.TemporaryDirectory() as tmp:
+        base_env = dict(
+            os.environ,
+            DATABASE_URL=prepare_database(Path(tmp) / "bench.db"),
+            RATELIMIT_ENABLED="false",
+            GROQ_API_KEY="stub",
+            GROQ_BASE_URL=f"http://127.0.0.1:{stub.server_port}",
+        )
+        results = []
+        for name in args.profiles.split(","):
+            results.append(run_profile(name, PROFILES[name], base_env, args))
+
+    paths = [path for _, path, _ in SCENARIO]
+    print(f"{'profile':<16}{'req/s':>8}{'errors':>8}" + "".join(f"{p + ' p95':>22}" for p in paths))
+    for row in results:
+        print(
+            f"{row['profile']:<16}{row['rps']:>8.1f}{row['errors']:>8}"
+            + "".join(f"{row['p95_ms'][p]:>20.0f}ms" for p in paths)
+        )
+
+
+if __name__ == "__main__":
+    main()
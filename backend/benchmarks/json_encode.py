@@ -0,0 +1,105 @@
+"""Micro-benchmark encode danh sách booking (GET /api/bookings).
+
+So sánh: serializer cũ + JSON provider mặc định của Flask, serializer dict
++ orjson provider, và encoder nhanh encode_bookings().
+
+    python -m benchmarks.json_encode --bookings 2000 --repeat 5
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+
+from flask.json.provider import DefaultJSONProvider
+
+import fastjson
+from app import Booking, BookingItem, STATUS_LABELS, create_app, encode_bookings, serialize_booking
+
+
+def legacy_serialize_booking(booking: Booking) -> dict:
+    """serialize_booking() trước khi có fastjson (isoformat + json.loads mỗi dòng)."""
+    return {
+        "id": booking.code,
+        "status": booking.status,
+        "statusLabel": STATUS_LABELS.get(booking.status, booking.status),
+        "customerInfo": {
+            "name": booking.customer_name,
+            "phone": booking.customer_phone,
+            "email": booking.customer_email,
+        },
+        "booking": {
+            "guests": booking.guests,
+            "dateTime": booking.booking_datetime.isoformat(),
+            "note": booking.note,
+        },
+        "orders": [
+            {"foodId": i.food_id, "name": i.food_name, "price": i.price, "quantity": i.quantity}
+            for i in booking.items
+        ],
+        "totalAmount": booking.total_amount,
+        "createdAt": booking.created_at.isoformat(),
+        "updatedAt": booking.updated_at.isoformat() if booking.updated_at else None,
+        "statusTimeline": json.loads(booking.status_history or "[]"),
+    }
+
+
+def make_bookings(count: int):
+    start = datetime(2026, 1, 1, 18, 0)
+    bookings = []
+    for n in range(count):
+        booking = Booking(
+            code=f"BK{n:08X}", customer_name=f"Khách hàng {n}", customer_phone="0901234567",
+            customer_email=f"khach{n}@example.com", guests=2 + n % 6,
+            booking_datetime=start + timedelta(hours=n), note="Bàn gần cửa sổ, có ghế trẻ em",
+            status="pending", total_amount=0, created_at=start, updated_at=start + timedelta(minutes=n),
+        )
+        booking.update_status("pending", "Đơn mới được tạo từ website")
+        booking.update_status("confirmed", "Cập nhật trạng thái: confirmed")
+        for k in range(1 + n % 4):
+            booking.items.append(
+                BookingItem(food_id=k + 1, food_name=f"Món {k}", price=120000 + k * 1000, quantity=1 + k % 3)
+            )
+        bookings.append(booking)
+    return bookings
+
+
+def measure(label: str, func, repeat: int, count: int) -> None:
+    best = float("inf")
+    size = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        size = len(func())
+        best = min(best, time.perf_counter() - started)
+    print(f"{label:<36}{count / best:>14,.0f} bookings/s{size / best / 1e6:>10.1f} MB/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--bookings", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    bookings = make_bookings(args.bookings)
+    default_app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:", "JSON_PROVIDER": "default"})
+    orjson_app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:", "JSON_PROVIDER": "orjson"})
+    assert isinstance(default_app.json, DefaultJSONProvider)
+
+    measure(
+        "legacy serializer + Flask json",
+        lambda: default_app.json.dumps([legacy_serialize_booking(b) for b in bookings]),
+        args.repeat, args.bookings,
+    )
+    measure(
+        "serialize_booking + app.json",
+        lambda: orjson_app.json.dumps([serialize_booking(b) for b in bookings]),
+        args.repeat, args.bookings,
+    )
+    measure("encode_bookings", lambda: encode_bookings(bookings), args.repeat, args.bookings)
+    if fastjson.orjson is None:
+        print("(orjson chưa được cài: hai dòng cuối dùng json của stdlib)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+"""Load test theo kịch bản người dùng trên dữ liệu lớn, lưu/so sánh baseline.
+
+Kịch bản (chạy lần lượt, mỗi kịch bản --duration giây):
+  menu       GET /api/foods, GET /api/foods/<id>
+  booking    POST /api/bookings
+  dashboard  đăng nhập admin, GET /api/stats, GET /api/bookings
+  chat       POST /api/ai/chat (Groq stub local, trễ --groq-latency-ms)
+
+    python -m benchmarks.dataset --url sqlite:///data/bench.db --scale small
+    python -m benchmarks.loadtest --url sqlite:///data/bench.db --save benchmarks/results/sqlite.json
+    # sau khi sửa code:
+    python -m benchmarks.loadtest --url sqlite:///data/bench.db --compare benchmarks/results/sqlite.json
+
+--url postgresql://localhost/mtp_bench dùng Postgres local; --target
+http://host:port đo một server đang chạy sẵn thay vì tự chạy gunicorn.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import create_engine, func, select
+
+from benchmarks.dataset import ADMIN_EMAIL, ADMIN_PASSWORD, SCALES, generate
+from benchmarks.groq_stub import start_stub
+from db_engine import normalize_database_url
+from models import Booking, ChatLog, Food
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+Step = Tuple[str, str, str, Optional[Dict]]  # (tên, method, path, body)
+
+
+class Context:
+    def __init__(self, base_url: str, food_ids: List[int], token: Optional[str], seed: int):
+        self.base_url = base_url
+        self.food_ids = food_ids
+        self.token = token
+        self.seed = seed
+
+
+def menu_steps(ctx: Context, rng: random.Random) -> List[Step]:
+    return [
+        ("GET /api/foods", "GET", "/api/foods", None),
+        ("GET /api/foods/<id>", "GET", f"/api/foods/{rng.choice(ctx.food_ids)}", None),
+    ]
+
+
+def booking_steps(ctx: Context, rng: random.Random) -> List[Step]:
+    when = datetime(2027, 1, 1, 18, 0) + timedelta(hours=rng.randint(0, 24 * 300))
+    body = {
+        "customerInfo": {"name": "Khách benchmark", "phone": "0901234567", "email": "bench@example.com"},
+        "booking": {"guests": rng.randint(1, 10), "dateTime": when.isoformat(), "note": ""},
+        "orders": [
+            {"foodId": food_id, "quantity": rng.randint(1, 3)}
+            for food_id in rng.sample(ctx.food_ids, min(len(ctx.food_ids), rng.randint(1, 3)))
+        ],
+    }
+    return [("POST /api/bookings", "POST", "/api/bookings", body)]
+
+
+def dashboard_steps(ctx: Context, rng: random.Random) -> List[Step]:
+    return [
+        ("GET /api/stats", "GET", "/api/stats", None),
+        ("GET /api/bookings", "GET", "/api/bookings", None),
+    ]
+
+
+def chat_steps(ctx: Context, rng: random.Random) -> List[Step]:
+    message = rng.choice(["Gợi ý món cho 4 người", "Món nào không cay?", "Có món chay không?"])
+    return [("POST /api/ai/chat", "POST", "/api/ai/chat", {"message": message})]
+
+
+SCENARIOS: Dict[str, Callable[[Context, random.Random], List[Step]]] = {
+    "menu": menu_steps,
+    "booking": booking_steps,
+    "dashboard": dashboard_steps,
+    "chat": chat_steps,
+}
+
+
+# ============================================
+# DRIVER
+# ============================================
+def percentile(values: List[float], pct: int) -> float:
+    if not values:
+        return 0.0
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[pct - 1]
+
+
+def _request(ctx: Context, method: str, path: str, body: Optional[Dict], timeout: float) -> None:
+    headers = {"Content-Type": "application/json", "Accept-Encoding": "gzip"}
+    if ctx.token:
+        headers["Authorization"] = f"Bearer {ctx.token}"
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(ctx.base_url + path, data=data, method=method, headers=headers)
+    urllib.request.urlopen(req, timeout=timeout).read()
+
+
+def run_scenario(name: str, ctx: Context, concurrency: int, duration: float, timeout: float) -> Dict:
+    build = SCENARIOS[name]
+    latencies: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    lock = threading.Lock()
+    stop = time.perf_counter() + duration
+
+    def client(worker: int):
+        rng = random.Random(ctx.seed * 1000 + worker)
+        local: Dict[str, List[float]] = {}
+        failed: Dict[str, int] = {}
+        while time.perf_counter() < stop:
+            for label, method, path, body in build(ctx, rng):
+                started = time.perf_counter()
+                try:
+                    _request(ctx, method, path, body, timeout)
+                    local.setdefault(label, []).append(time.perf_counter() - started)
+                except OSError:
+                    failed[label] = failed.get(label, 0) + 1
+        with lock:
+            for label, values in local.items():
+                latencies.setdefault(label, []).extend(values)
+            for label, count in failed.items():
+                errors[label] = errors.get(label, 0) + count
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    report = {}
+    for label in sorted(set(latencies) | set(errors)):
+        values = latencies.get(label, [])
+        report[label] = {
+            "requests": len(values),
+            "errors": errors.get(label, 0),
+            "rps": round(len(values) / elapsed, 2),
+            "p50_ms": round(percentile(values, 50) * 1000, 2),
+            "p95_ms": round(percentile(values, 95) * 1000, 2),
+            "p99_ms": round(percentile(values, 99) * 1000, 2),
+        }
+    return report
+
+
+def login(base_url: str) -> Optional[str]:
+    req = urllib.request.Request(
+        base_url + "/api/auth/login",
+        data=json.dumps({"email": ADMIN_EMAIL, "password": ADMIN_PASSWORD}).encode(),
+        method="POST", headers={"Content-Type": "application/json"},
+    )
+    try:
+        return json.loads(urllib.request.urlopen(req, timeout=10).read())["token"]
+    except OSError:
+        return None
+
+
+def dataset_info(url: str) -> Dict:
+    engine = create_engine(normalize_database_url(url))
+    with engine.connect() as conn:
+        info = {
+            "dialect": engine.dialect.name,
+            "foods": conn.execute(select(func.count()).select_from(Food)).scalar(),
+            "bookings": conn.execute(select(func.count()).select_from(Booking)).scalar(),
+            "chat_logs": conn.execute(select(func.count()).select_from(ChatLog)).scalar(),
+        }
+        food_ids = conn.execute(select(Food.id).where(Food.is_active.is_(True)).limit(500)).scalars().all()
+    engine.dispose()
+    return {**info, "food_ids": list(food_ids)}
+
+
+def start_server(url: str, port: int, groq_port: int, workers: Optional[int]) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        DATABASE_URL=url,
+        PORT=str(port),
+        RATELIMIT_ENABLED="false",
+        LOG_LEVELS="mtp.access=WARNING",
+        GROQ_API_KEY="stub",
+        GROQ_BASE_URL=f"http://127.0.0.1:{groq_port}",
+    )
+    if workers:
+        env["WEB_CONCURRENCY"] = str(workers)
+    return subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "app:app"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+def _wait_ready(base_url: str, timeout: float = 60) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(base_url + "/", timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("server không khởi động được")
+
+
+# ============================================
+# BASELINE
+# ============================================
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results: Dict[str, Dict[str, Dict]]) -> None:
+    print(f"{'scenario':<11}{'step':<24}{'req':>8}{'err':>6}{'req/s':>9}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for scenario, steps in results.items():
+        for label, row in steps.items():
+            print(
+                f"{scenario:<11}{label:<24}{row['requests']:>8}{row['errors']:>6}{row['rps']:>9.1f}"
+                f"{row['p50_ms']:>8.1f}ms{row['p95_ms']:>8.1f}ms{row['p99_ms']:>8.1f}ms"
+            )
+
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> List[str]:
+    """In chênh lệch so với baseline; trả về các bước có p95 chậm hơn ``threshold`` %."""
+    regressions = []
+    print(f"\n{'step':<24}{'p95 trước':>12}{'p95 sau':>12}{'Δ p95':>9}{'req/s trước':>13}{'req/s sau':>11}")
+    for scenario, steps in current["results"].items():
+        for label, row in steps.items():
+            old = baseline["results"].get(scenario, {}).get(label)
+            if old is None:
+                continue
+            delta = (row["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100 if old["p95_ms"] else 0.0
+            print(
+                f"{label:<24}{old['p95_ms']:>10.1f}ms{row['p95_ms']:>10.1f}ms{delta:>8.0f}%"
+                f"{old['rps']:>13.1f}{row['rps']:>11.1f}"
+            )
+            if delta > threshold:
+                regressions.append(f"{scenario}/{label}: p95 +{delta:.0f}%")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="sqlite:///data/bench.db")
+    parser.add_argument("--generate", choices=SCALES, help="nạp lại dữ liệu với scale này trước khi đo")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--target", help="URL server đang chạy (bỏ qua việc tự chạy gunicorn)")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--workers", type=int, help="WEB_CONCURRENCY cho gunicorn")
+    parser.add_argument("--port", type=int, default=5056)
+    parser.add_argument("--groq-latency-ms", type=float, default=300)
+    parser.add_argument("--save", help="ghi kết quả ra file JSON (baseline)")
+    parser.add_argument("--compare", help="so sánh với file baseline JSON")
+    parser.add_argument("--threshold", type=float, default=15, help="%% p95 chậm hơn bị coi là regression")
+    args = parser.parse_args()
+
+    if args.generate:
+        print(f"Nạp dữ liệu {args.generate} vào {args.url} ...")
+        generate(args.url, seed=args.seed, **SCALES[args.generate])
+    info = dataset_info(args.url)
+    food_ids = info.pop("food_ids")
+    if not food_ids:
+        sys.exit("Chưa có dữ liệu: chạy python -m benchmarks.dataset hoặc thêm --generate")
+
+    stub = start_stub(latency_ms=args.groq_latency_ms)
+    server = None
+    base_url = args.target
+    if base_url is None:
+        server = start_server(args.url, args.port, stub.server_port, args.workers)
+        base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        _wait_ready(base_url)
+        ctx = Context(base_url, food_ids, login(base_url), args.seed)
+        results = {}
+        for name in args.scenarios.split(","):
+            print(f"... {name} ({args.duration:.0f}s, {args.concurrency} client)")
+            results[name] = run_scenario(name, ctx, args.concurrency, args.duration, args.timeout)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+        stub.shutdown()
+
+    report = {
+        "meta": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "dataset": info,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "groq_latency_ms": args.groq_latency_ms,
+        },
+        "results": results,
+    }
+    print_results(results)
+
+    if args.save:
+        Path(args.save).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.save).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\nĐã lưu {args.save}")
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        if baseline["meta"]["dataset"] != info:
+            print(f"\nCảnh báo: dataset khác baseline ({baseline['meta']['dataset']})")
+        regressions = compare(baseline, report, args.threshold)
+        if regressions:
+            print("\nRegression:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Micro-benchmark recommender: dựng ma trận đồng xuất hiện và thời gian gợi ý.
+
+Dùng cùng bộ sinh dữ liệu với benchmarks.dataset (không cần DB):
+
+    python -m benchmarks.recommendations --foods 1000 --bookings 200000
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+import tracemalloc
+
+from benchmarks.dataset import booking_rows
+from recommendations import CoOccurrence
+
+
+def item_rows(foods: int, bookings: int, seed: int):
+    for booking in booking_rows(bookings, foods, random.Random(seed)):
+        for item in booking["_items"]:
+            yield item["id"], item["booking_id"], item["food_id"], item["quantity"], booking["created_at"]
+
+
+def timed(fn, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--foods", type=int, default=1_000)
+    parser.add_argument("--bookings", type=int, default=200_000)
+    parser.add_argument("--max-neighbors", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rows = list(item_rows(args.foods, args.bookings, args.seed))
+    engine = CoOccurrence(max_neighbors=args.max_neighbors)
+    started = time.perf_counter()
+    engine.load(rows)
+    build = time.perf_counter() - started
+    # Đo bộ nhớ bằng một lần dựng riêng (tracemalloc làm chậm lần đo thời gian)
+    tracemalloc.start()
+    measured = CoOccurrence(max_neighbors=args.max_neighbors)
+    measured.load(rows)
+    memory = tracemalloc.get_traced_memory()[0]
+    del measured
+    tracemalloc.stop()
+    print(f"Dựng ma trận: {len(rows):,} dòng, {engine.orders:,} đơn trong {build:.2f}s, ~{memory / 2**20:.1f} MiB")
+
+    rng = random.Random(args.seed)
+    dishes = [rng.randint(1, args.foods) for _ in range(args.repeat)]
+    engine.for_food(dishes[0], 5)
+    cursor = iter(dishes * 3)
+    print(f"for_food (cache nóng):  {timed(lambda: engine.for_food(dishes[0], 5), args.repeat):8.2f} µs")
+    print(f"for_food (món ngẫu nhiên): {timed(lambda: engine.for_food(next(cursor), 5), args.repeat):5.2f} µs")
+    cart = dishes[:3]
+    print(f"for_cart (3 món):       {timed(lambda: engine.for_cart(cart, 5), args.repeat):8.2f} µs")
+    print(f"popular:                {timed(lambda: engine.popular(5), args.repeat):8.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""So sánh đọc menu song song với ghi booking: SQLite mặc định vs profile WAL.
+
+    python -m benchmarks.sqlite_concurrency --readers 8 --duration 5
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.exc import OperationalError
+
+from db_engine import configure_engine, engine_options
+from extensions import db
+from models import Booking, BookingItem, Food
+
+PROFILES = ("rollback-journal", "tuned")
+
+
+def build_engine(path: Path, profile: str):
+    url = f"sqlite:///{path}"
+    if profile == "tuned":
+        engine = create_engine(url, **engine_options(url, {}))
+        configure_engine(engine, {})
+    else:
+        # Cấu hình cũ: chỉ có SQLALCHEMY_DATABASE_URI
+        engine = create_engine(url)
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(
+            insert(Food),
+            [
+                {"name": f"Món {i}", "price": 50000 + i * 1000, "image": "https://example.com/x.jpg",
+                 "description": "Mô tả món ăn " * 5, "is_active": True}
+                for i in range(200)
+            ],
+        )
+    return engine
+
+
+def run_profile(profile: str, readers: int, duration: float) -> Dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_engine(Path(tmp) / "bench.db", profile)
+        stop = threading.Event()
+        read_latencies: List[float] = []
+        write_latencies: List[float] = []
+        errors = {"read": 0, "write": 0}
+        lock = threading.Lock()
+        menu = select(Food).where(Food.is_active.is_(True)).order_by(Food.created_at.desc())
+
+        def reader():
+            local: List[float] = []
+            while not stop.is_set():
+                started = time.perf_counter()
+                try:
+                    with engine.connect() as conn:
+                        conn.execute(menu).fetchall()
+                    local.append(time.perf_counter() - started)
+                except OperationalError:
+                    with lock:
+                        errors["read"] += 1
+            with lock:
+                read_latencies.extend(local)
+
+        def writer():
+            n = 0
+            while not stop.is_set():
+                started = time.perf_counter()
+                try:
+                    with engine.begin() as conn:
+                        booking_id = conn.execute(
+                            insert(Booking).values(
+                                code=f"BK{n:08d}", customer_name="Khách", customer_phone="0901234567",
+                                customer_email="a@example.com", guests=2,
+                                booking_datetime=datetime(2099, 1, 1, 19), status="pending",
+                                total_amount=240000, status_history="[]", created_at=datetime.utcnow(),
+                            )
+                        ).inserted_primary_key[0]
+                        conn.execute(
+                            insert(BookingItem),
+                            [{"booking_id": booking_id, "food_id": i + 1, "food_name": f"Món {i}",
+                              "price": 120000, "quantity": 1} for i in range(3)],
+                        )
+                    write_latencies.append(time.perf_counter() - started)
+                    n += 1
+                except OperationalError:
+                    errors["write"] += 1
+
+        threads = [threading.Thread(target=reader) for _ in range(readers)]
+        threads.append(threading.Thread(target=writer))
+        for thread in threads:
+            thread.start()
+        time.sleep(duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+
+    return {
+        "profile": profile,
+        "reads_per_s": len(read_latencies) / duration,
+        "writes_per_s": len(write_latencies) / duration,
+        "read_p95_ms": _percentile(read_latencies, 95) * 1000,
+        "write_p95_ms": _percentile(write_latencies, 95) * 1000,
+        "errors": errors,
+    }
+
+
+def _percentile(values: List[float], pct: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100)[pct - 1]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+
+    results = [run_profile(profile, args.readers, args.duration) for profile in PROFILES]
+    print(f"{'profile':<18}{'reads/s':>10}{'writes/s':>10}{'read p95':>12}{'write p95':>12}  errors")
+    for row in results:
+        print(
+            f"{row['profile']:<18}{row['reads_per_s']:>10.0f}{row['writes_per_s']:>10.0f}"
+            f"{row['read_p95_ms']:>10.2f}ms{row['write_p95_ms']:>10.2f}ms  {row['errors']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
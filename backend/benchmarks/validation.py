@@ -0,0 +1,63 @@
+"""Micro-benchmark validate payload: schema.load() của marshmallow so với compile_schema().
+
+Đo payload đặt bàn (3 món) và cập nhật món (partial), cả hợp lệ lẫn sai:
+
+    python -m benchmarks.validation --repeat 20000
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+from marshmallow import ValidationError
+
+from app import BookingSchema, FoodSchema
+from validation import compile_schema
+
+BOOKING = {
+    "customerInfo": {"name": "Nguyen Van A", "phone": "0901234567", "email": "a@example.com"},
+    "booking": {"guests": 4, "dateTime": "2099-12-31T18:00:00", "note": "Gần cửa sổ"},
+    "orders": [{"foodId": 1, "quantity": 2}, {"foodId": 5, "quantity": 1}, {"foodId": 9}],
+}
+BAD_BOOKING = {
+    "customerInfo": {"name": "A", "phone": "123", "email": "a@"},
+    "booking": {"guests": 0, "dateTime": "31/12/2099"},
+    "orders": [{"foodId": "x", "quantity": 99}],
+}
+FOOD_UPDATE = {"name": "Phở bò đặc biệt", "price": "55000", "isActive": "true"}
+
+
+def throughput(load, data, repeat: int, **kwargs) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        try:
+            load(data, **kwargs)
+        except ValidationError:
+            pass
+    return repeat / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20_000)
+    args = parser.parse_args()
+
+    booking_schema, food_schema = BookingSchema(), FoodSchema()
+    booking_validator, food_validator = compile_schema(booking_schema), compile_schema(food_schema)
+    cases = [
+        ("đặt bàn hợp lệ", booking_schema.load, booking_validator.load, BOOKING, {}),
+        ("đặt bàn sai", booking_schema.load, booking_validator.load, BAD_BOOKING, {}),
+        ("sửa món (partial)", food_schema.load, food_validator.load, FOOD_UPDATE, {"partial": True}),
+    ]
+    print(f"{'payload':<20}{'marshmallow/s':>15}{'compiled/s':>15}{'x':>7}")
+    for name, slow, fast, data, kwargs in cases:
+        # Chạy ấm một lần cho cả hai trước khi đo
+        throughput(slow, data, 100, **kwargs)
+        throughput(fast, data, 100, **kwargs)
+        before = throughput(slow, data, args.repeat, **kwargs)
+        after = throughput(fast, data, args.repeat, **kwargs)
+        print(f"{name:<20}{before:>15,.0f}{after:>15,.0f}{after / before:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
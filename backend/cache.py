@@ -0,0 +1,451 @@
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter as TallyCounter
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from flask import Flask, current_app
+
+import fastjson
+
+logger = logging.getLogger("mtp.cache")
+
+# ============================================
+# SHARED CACHE (CROSS-WORKER)
+# ============================================
+# Cache theo namespace ("stats", "admin", "chat"...). Key thật có dạng
+# "<namespace>:<version>:<key>"; invalidate(namespace) tăng version trong
+# backend dùng chung nên mọi worker bỏ entry cũ ngay ở lần đọc kế tiếp,
+# entry cũ tự rơi ra theo TTL/eviction. Backend (CACHE_URL):
+#   - sqlite:///path/to/cache.db : file SQLite (WAL + mmap) dùng chung giữa
+#     các worker trên cùng máy (mặc định)
+#   - memory://                  : dict trong process (test, một worker)
+#   - redis://...                : NetworkBackend qua redis-py (nếu đã cài);
+#     client bất kỳ có get/set/delete/incr dùng được, test dùng DictClient
+# Giá trị lưu dạng JSON nên chỉ cache dữ liệu thuần (dict/list/str/số).
+
+
+class MemoryBackend:
+    """LRU trong process, giới hạn theo tổng số byte."""
+
+    shared = False
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[str, Tuple[bytes, Optional[float]]]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def lookup(self, namespace: str, key: str) -> Tuple[int, Optional[bytes]]:
+        """(version hiện tại của namespace, giá trị hoặc None)."""
+        with self._lock:
+            version = self._versions.get(namespace, 0)
+            full_key = f"{namespace}:{version}:{key}"
+            entry = self._data.get(full_key)
+            if entry is None:
+                return version, None
+            if entry[1] is not None and entry[1] < time.time():
+                self._remove(full_key)
+                return version, None
+            self._data.move_to_end(full_key)
+            return version, entry[0]
+
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        return self.lookup(namespace, key)[1]
+
+    def set(self, namespace: str, key: str, value: bytes, ttl: Optional[float],
+            version: Optional[int] = None) -> int:
+        """Ghi entry; trả về số entry bị loại để giữ dưới max_bytes."""
+        with self._lock:
+            current = self._versions.get(namespace, 0)
+            if version is not None and version != current:
+                return 0  # namespace đã bị invalidate sau lúc đọc: giá trị đã cũ
+            full_key = f"{namespace}:{current}:{key}"
+            if full_key in self._data:
+                self._remove(full_key)
+            self._data[full_key] = (value, time.time() + ttl if ttl else None)
+            self._size += len(value)
+            evicted = 0
+            while self._size > self.max_bytes and len(self._data) > 1:
+                self._remove(next(iter(self._data)))
+                evicted += 1
+            return evicted
+
+    def delete(self, namespace: str, key: str) -> None:
+        with self._lock:
+            full_key = f"{namespace}:{self._versions.get(namespace, 0)}:{key}"
+            if full_key in self._data:
+                self._remove(full_key)
+
+    def bump(self, namespace: str) -> int:
+        with self._lock:
+            self._versions[namespace] = self._versions.get(namespace, 0) + 1
+            return self._versions[namespace]
+
+    def _remove(self, full_key: str) -> None:
+        value, _ = self._data.pop(full_key)
+        self._size -= len(value)
+
+    def info(self) -> Dict:
+        return {"backend": "memory", "entries": len(self._data), "bytes": self._size, "maxBytes": self.max_bytes}
+
+
+class SQLiteBackend:
+    """Một file SQLite dùng chung giữa các worker; version cũng nằm trong file."""
+
+    shared = True
+    EVICT_CHECK_EVERY = 32  # số lần set giữa hai lần kiểm tra tổng kích thước
+
+    def __init__(self, path: str, max_bytes: int = 64 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._sets = 0
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries (key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+            "expires REAL, size INTEGER NOT NULL, accessed REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_entries_accessed ON cache_entries (accessed)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_versions (namespace TEXT PRIMARY KEY, version INTEGER NOT NULL)"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA mmap_size=67108864")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _full_key(self, conn: sqlite3.Connection, namespace: str, key: str) -> str:
+        row = conn.execute("SELECT version FROM cache_versions WHERE namespace = ?", (namespace,)).fetchone()
+        return f"{namespace}:{row[0] if row else 0}:{key}"
+
+    def lookup(self, namespace: str, key: str) -> Tuple[int, Optional[bytes]]:
+        conn = self._connect()
+        # Một câu: đọc version hiện tại của namespace và entry tương ứng
+        version, value, expires, accessed = conn.execute(
+            "SELECT v.version, e.value, e.expires, e.accessed FROM "
+            "(SELECT coalesce((SELECT version FROM cache_versions WHERE namespace = ?), 0) AS version) v "
+            "LEFT JOIN cache_entries e ON e.key = ? || ':' || v.version || ':' || ?",
+            (namespace, namespace, key),
+        ).fetchone()
+        if value is None:
+            return version, None
+        full_key = f"{namespace}:{version}:{key}"
+        now = time.time()
+        if expires is not None and expires < now:
+            conn.execute("DELETE FROM cache_entries WHERE key = ?", (full_key,))
+            return version, None
+        if now - accessed > 30:
+            # Cập nhật thời điểm dùng thưa thớt để eviction gần với LRU mà không ghi mỗi lần đọc
+            conn.execute("UPDATE cache_entries SET accessed = ? WHERE key = ?", (now, full_key))
+        return version, value
+
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        return self.lookup(namespace, key)[1]
+
+    def set(self, namespace: str, key: str, value: bytes, ttl: Optional[float],
+            version: Optional[int] = None) -> int:
+        conn = self._connect()
+        now = time.time()
+        expires = now + ttl if ttl else None
+        if version is None:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, expires, size, accessed) VALUES (?, ?, ?, ?, ?)",
+                (self._full_key(conn, namespace, key), value, expires, len(value), now),
+            )
+        elif not conn.execute(
+            # Chỉ ghi nếu namespace chưa bị invalidate sau lúc đọc (một câu, nguyên tử)
+            "INSERT OR REPLACE INTO cache_entries (key, value, expires, size, accessed) "
+            "SELECT ?, ?, ?, ?, ? WHERE coalesce((SELECT version FROM cache_versions WHERE namespace = ?), 0) = ?",
+            (f"{namespace}:{version}:{key}", value, expires, len(value), now, namespace, version),
+        ).rowcount:
+            return 0
+        self._sets += 1
+        if self._sets % self.EVICT_CHECK_EVERY:
+            return 0
+        return self.evict(conn)
+
+    def evict(self, conn: Optional[sqlite3.Connection] = None) -> int:
+        """Xóa entry hết hạn, rồi entry lâu không dùng nhất cho tới khi dưới max_bytes."""
+        conn = conn or self._connect()
+        total = conn.execute("SELECT coalesce(sum(size), 0) FROM cache_entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        evicted = conn.execute("DELETE FROM cache_entries WHERE expires < ?", (time.time(),)).rowcount
+        total = conn.execute("SELECT coalesce(sum(size), 0) FROM cache_entries").fetchone()[0]
+        # Xóa dư thêm 10% để không phải dọn lại ngay ở lần set sau
+        target = total - int(self.max_bytes * 0.9)
+        if target > 0:
+            freed = 0
+            victims = []
+            for victim, size in conn.execute("SELECT key, size FROM cache_entries ORDER BY accessed"):
+                victims.append((victim,))
+                freed += size
+                if freed >= target:
+                    break
+            conn.executemany("DELETE FROM cache_entries WHERE key = ?", victims)
+            evicted += len(victims)
+        return evicted
+
+    def delete(self, namespace: str, key: str) -> None:
+        conn = self._connect()
+        conn.execute("DELETE FROM cache_entries WHERE key = ?", (self._full_key(conn, namespace, key),))
+
+    def bump(self, namespace: str) -> int:
+        conn = self._connect()
+        conn.execute(
+            "INSERT INTO cache_versions (namespace, version) VALUES (?, 1) "
+            "ON CONFLICT(namespace) DO UPDATE SET version = version + 1",
+            (namespace,),
+        )
+        return conn.execute("SELECT version FROM cache_versions WHERE namespace = ?", (namespace,)).fetchone()[0]
+
+    def info(self) -> Dict:
+        entries, size = self._connect().execute(
+            "SELECT count(*), coalesce(sum(size), 0) FROM cache_entries"
+        ).fetchone()
+        return {"backend": "sqlite", "path": self.path, "entries": entries, "bytes": size, "maxBytes": self.max_bytes}
+
+    def reset(self) -> None:
+        self._local = threading.local()
+
+
+class NetworkBackend:
+    """Cache server ngoài (Redis, ...): client cần get/set(ex=)/delete/incr.
+
+    Eviction do server đảm nhận (maxmemory-policy), nên luôn trả 0.
+    """
+
+    shared = True
+
+    def __init__(self, client, prefix: str = "mtp:"):
+        self.client = client
+        self.prefix = prefix
+
+    def _version(self, namespace: str) -> int:
+        return int(self.client.get(f"{self.prefix}version:{namespace}") or 0)
+
+    def _full_key(self, namespace: str, key: str, version: Optional[int] = None) -> str:
+        version = self._version(namespace) if version is None else version
+        return f"{self.prefix}{namespace}:{version}:{key}"
+
+    def lookup(self, namespace: str, key: str) -> Tuple[int, Optional[bytes]]:
+        version = self._version(namespace)
+        return version, self.client.get(self._full_key(namespace, key, version))
+
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        return self.lookup(namespace, key)[1]
+
+    def set(self, namespace: str, key: str, value: bytes, ttl: Optional[float],
+            version: Optional[int] = None) -> int:
+        # version lúc đọc (nếu có): giá trị tính từ dữ liệu trước invalidate()
+        # nằm ở key của version cũ, không ai đọc tới
+        self.client.set(self._full_key(namespace, key, version), value, ex=max(int(ttl), 1) if ttl else None)
+        return 0
+
+    def delete(self, namespace: str, key: str) -> None:
+        self.client.delete(self._full_key(namespace, key))
+
+    def bump(self, namespace: str) -> int:
+        return int(self.client.incr(f"{self.prefix}version:{namespace}"))
+
+    def info(self) -> Dict:
+        return {"backend": "network", "client": type(self.client).__name__}
+
+
+class DictClient:
+    """Client giả lập Redis trong bộ nhớ, thay cho server thật khi test."""
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[Any, Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or (entry[1] is not None and entry[1] < time.time()):
+                self._data.pop(key, None)
+                return None
+            return entry[0]
+
+    def set(self, key: str, value, ex: Optional[int] = None) -> bool:
+        with self._lock:
+            self._data[key] = (value, time.time() + ex if ex else None)
+        return True
+
+    def delete(self, key: str) -> int:
+        with self._lock:
+            return 1 if self._data.pop(key, None) is not None else 0
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            value = int(self._data.get(key, (0, None))[0]) + 1
+            self._data[key] = (value, None)
+            return value
+
+
+def create_backend(url: str, max_bytes: int):
+    """``memory://``, ``sqlite:///path/to/cache.db`` hoặc ``redis://...``."""
+    if not url or url.startswith("memory://"):
+        return MemoryBackend(max_bytes)
+    if url.startswith("sqlite:///"):
+        return SQLiteBackend(url[len("sqlite:///"):], max_bytes)
+    if url.startswith(("redis://", "rediss://")):
+        try:
+            import redis  # type: ignore
+        except ImportError:
+            raise ValueError("CACHE_URL redis:// cần cài package redis")
+        return NetworkBackend(redis.Redis.from_url(url))
+    raise ValueError(f"CACHE_URL không được hỗ trợ: {url}")
+
+
+# ============================================
+# FLASK EXTENSION
+# ============================================
+class _CacheState:
+    def __init__(self, app: Flask):
+        self.url = app.config["CACHE_URL"]
+        self.max_bytes = int(app.config["CACHE_MAX_BYTES"])
+        self.default_ttl = float(app.config["CACHE_DEFAULT_TTL"])
+        self._backend = None
+        self.counters: TallyCounter = TallyCounter()  # (namespace, kết quả) -> số lần
+        self.lock = threading.Lock()
+
+    @property
+    def backend(self):
+        # File SQLite chỉ được tạo ở lần dùng đầu, không phải lúc create_app()
+        if self._backend is None:
+            with self.lock:
+                if self._backend is None:
+                    self._backend = create_backend(self.url, self.max_bytes)
+        return self._backend
+
+    @backend.setter
+    def backend(self, value) -> None:
+        self._backend = value
+
+    def count(self, namespace: str, result: str, amount: int = 1) -> None:
+        with self.lock:
+            self.counters[(namespace, result)] += amount
+        registry = current_app.extensions.get("metrics")
+        if registry is not None:
+            registry.cache_requests.inc(namespace, result, amount=amount)
+
+    def reset(self) -> None:
+        self.counters.clear()
+        self.lock = threading.Lock()
+        if isinstance(self._backend, SQLiteBackend):
+            self._backend.reset()
+        elif isinstance(self._backend, MemoryBackend):
+            self._backend = None
+
+
+class Cache:
+    """Cache dùng chung giữa các worker với invalidation theo namespace."""
+
+    def __init__(self, app: Optional[Flask] = None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        app.config.setdefault("CACHE_URL", "memory://")
+        app.config.setdefault("CACHE_MAX_BYTES", 64 * 1024 * 1024)
+        app.config.setdefault("CACHE_DEFAULT_TTL", 300)
+        app.extensions["cache"] = _CacheState(app)
+
+    @staticmethod
+    def state() -> _CacheState:
+        return current_app.extensions["cache"]
+
+    def lookup(self, namespace: str, key: str) -> Tuple[Optional[Any], Optional[int]]:
+        """(giá trị hoặc None, version của namespace lúc đọc).
+
+        Giá trị tính lại sau một lần miss phải ``set(..., version=version)``:
+        nếu ``invalidate()`` chạy giữa lúc đọc và lúc ghi, giá trị (có thể tính
+        từ dữ liệu cũ) không được phục vụ dưới version mới.
+        """
+        state = self.state()
+        try:
+            version, raw = state.backend.lookup(namespace, key)
+        except Exception:
+            # Cache hỏng không được làm hỏng request: coi như miss
+            logger.warning("Cache get lỗi (%s)", namespace, exc_info=True)
+            version, raw = None, None
+        state.count(namespace, "miss" if raw is None else "hit")
+        return (None if raw is None else fastjson.loads(raw)), version
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        return self.lookup(namespace, key)[0]
+
+    def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None,
+            version: Optional[int] = None) -> None:
+        """Ghi giá trị; ``version`` là version trả về từ ``lookup()`` lúc đọc."""
+        state = self.state()
+        try:
+            evicted = state.backend.set(
+                namespace, key, fastjson.dumps(value), ttl or state.default_ttl, version
+            )
+        except Exception:
+            logger.warning("Cache set lỗi (%s)", namespace, exc_info=True)
+            return
+        state.count(namespace, "set")
+        if evicted:
+            state.count(namespace, "eviction", evicted)
+
+    def get_or_set(self, namespace: str, key: str, factory: Callable[[], Any],
+                   ttl: Optional[float] = None) -> Any:
+        """Giá trị trong cache hoặc gọi ``factory()`` rồi lưu (None không được lưu)."""
+        value, version = self.lookup(namespace, key)
+        if value is None:
+            value = factory()
+            if value is not None and version is not None:
+                self.set(namespace, key, value, ttl, version=version)
+        return value
+
+    def delete(self, namespace: str, key: str) -> None:
+        try:
+            self.state().backend.delete(namespace, key)
+        except Exception:
+            logger.warning("Cache delete lỗi (%s)", namespace, exc_info=True)
+
+    def invalidate(self, *namespaces: str) -> None:
+        """Bỏ mọi entry của các namespace ở tất cả worker (gọi sau commit)."""
+        state = self.state()
+        for namespace in namespaces:
+            try:
+                state.backend.bump(namespace)
+            except Exception:
+                logger.warning("Cache invalidate lỗi (%s)", namespace, exc_info=True)
+                continue
+            state.count(namespace, "invalidation")
+
+    def stats(self) -> Dict:
+        """Hit/miss/set/eviction/invalidation theo namespace (của worker này) + backend."""
+        state = self.state()
+        namespaces: Dict[str, Dict[str, int]] = {}
+        with state.lock:
+            for (namespace, result), count in sorted(state.counters.items()):
+                namespaces.setdefault(namespace, {})[result] = count
+        for counts in namespaces.values():
+            lookups = counts.get("hit", 0) + counts.get("miss", 0)
+            counts["hitRatio"] = round(counts.get("hit", 0) / lookups, 3) if lookups else 0
+        try:
+            backend = state.backend.info()
+        except Exception as error:
+            backend = {"error": str(error)}
+        return {"backend": backend, "namespaces": namespaces}
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import gzip
+import threading
+from typing import Dict, Optional
+
+from flask import Flask, Response, current_app, request
+
+try:
+    import brotli  # type: ignore
+except ImportError:
+    brotli = None  # type: ignore
+
+# ============================================
+# RESPONSE COMPRESSION
+# ============================================
+# after_request nén gzip/brotli cho response JSON đủ lớn, theo
+# Accept-Encoding của client. Với response cache được (menu theo phiên bản),
+# CompressedPayload giữ bytes đã nén cạnh bytes JSON gốc nên mỗi encoding
+# chỉ nén đúng một lần.
+
+COMPRESSIBLE_MIMETYPES = {"application/json", "text/plain", "text/html", "text/csv"}
+
+
+def supported_encodings() -> tuple:
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Encoding tốt nhất mà client chấp nhận (ưu tiên br rồi gzip)."""
+    if not accept_encoding:
+        return None
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        token, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[token.strip()] = quality
+
+    candidates = [
+        enc for enc in supported_encodings()
+        if accepted.get(enc, accepted.get("*", 0.0)) > 0
+    ]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda enc: accepted.get(enc, accepted.get("*", 0.0)))
+
+
+def compress(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=4 if level is None else level)
+    return gzip.compress(data, compresslevel=6 if level is None else level, mtime=0)
+
+
+class CompressedPayload:
+    """Bytes JSON đã encode + các bản nén, tính lười và giữ lại cho lần sau."""
+
+    # Nén lười ngay trên thread của request đầu tiên (các request khác chờ
+    # lock): brotli q11 mất ~10s cho menu 10k món, q5 chỉ vài chục ms mà
+    # kích thước chênh không đáng kể
+    LEVELS = {"br": 5, "gzip": 6}
+
+    def __init__(self, data: bytes, etag: str, mimetype: str = "application/json"):
+        self.data = data
+        self.etag = etag
+        self.mimetype = mimetype
+        self._compressed: Dict[str, bytes] = {}
+        # Lock riêng từng encoding: client gzip không chờ lần nén brotli
+        self._locks = {encoding: threading.Lock() for encoding in self.LEVELS}
+
+    def encoded(self, encoding: str) -> bytes:
+        body = self._compressed.get(encoding)
+        if body is None:
+            with self._locks[encoding]:
+                body = self._compressed.get(encoding)
+                if body is None:
+                    body = compress(self.data, encoding, self.LEVELS[encoding])
+                    self._compressed[encoding] = body
+        return body
+
+    def to_response(self, min_size: Optional[int] = None) -> Response:
+        min_size = current_app.config.get("COMPRESS_MIN_SIZE", 1024) if min_size is None else min_size
+        response = Response(self.data, mimetype=self.mimetype)
+        response.set_etag(self.etag, weak=True)
+        response.headers["Cache-Control"] = "no-cache"
+        response.vary.add("Accept-Encoding")
+        response = response.make_conditional(request)
+        if response.status_code != 200:
+            return response
+
+        encoding = choose_encoding(request.headers.get("Accept-Encoding"))
+        if encoding and len(self.data) >= min_size:
+            response.set_data(self.encoded(encoding))
+            response.headers["Content-Encoding"] = encoding
+        return response
+
+
+class Compressor:
+    """Nén các response động (ví dụ /api/bookings) vượt COMPRESS_MIN_SIZE byte."""
+
+    def __init__(self, app: Optional[Flask] = None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        app.config.setdefault("COMPRESS_ENABLED", True)
+        app.config.setdefault("COMPRESS_MIN_SIZE", 1024)
+        app.after_request(self._after_request)
+
+    @staticmethod
+    def _after_request(response: Response) -> Response:
+        config = current_app.config
+        if (
+            not config["COMPRESS_ENABLED"]
+            or response.direct_passthrough
+            or response.is_streamed
+            or "Content-Encoding" in response.headers
+            or not (200 <= response.status_code < 300)
+            or response.status_code in (204, 206)
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        ):
+            return response
+
+        response.vary.add("Accept-Encoding")
+        encoding = choose_encoding(request.headers.get("Accept-Encoding"))
+        if encoding is None:
+            return response
+        data = response.get_data()
+        if len(data) < config["COMPRESS_MIN_SIZE"]:
+            return response
+
+        response.set_data(compress(data, encoding))
+        response.headers["Content-Encoding"] = encoding
+        return response
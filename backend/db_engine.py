@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import os
+from typing import Dict, Mapping, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+# ============================================
+# DATABASE ENGINE PROFILES
+# ============================================
+# Pool cho Postgres (Render) / MySQL (docker-compose) và PRAGMA cho SQLite,
+# tất cả đọc từ biến môi trường. create_app() đưa kết quả vào
+# SQLALCHEMY_ENGINE_OPTIONS và gọi configure_engine() cho từng engine.
+
+POOL_DEFAULTS = {
+    # Render free Postgres giới hạn ~100 connection: 5 + 10 mỗi worker
+    "postgresql": {"pool_size": 5, "max_overflow": 10, "pool_recycle": 1800},
+    # MySQL đóng connection idle sau wait_timeout; recycle sớm hơn
+    "mysql": {"pool_size": 5, "max_overflow": 10, "pool_recycle": 280},
+}
+
+SQLITE_DEFAULTS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,  # ms
+    "mmap_size": 256 * 1024 * 1024,  # bytes
+    "cache_size": -64 * 1024,  # số âm = KiB (64 MB)
+}
+
+
+def normalize_database_url(url: str) -> str:
+    # Fix DATABASE_URL: Render trả về postgres:// nhưng SQLAlchemy 2.0+ cần postgresql://
+    if url.startswith("postgres://"):
+        url = url.replace("postgres://", "postgresql://", 1)
+    # requirements.txt cài psycopg2; SQLAlchemy 2.1 mặc định dùng psycopg 3
+    if url.startswith("postgresql://"):
+        url = url.replace("postgresql://", "postgresql+psycopg2://", 1)
+    return url
+
+
+def engine_options(url: str, env: Optional[Mapping[str, str]] = None) -> Dict:
+    """SQLALCHEMY_ENGINE_OPTIONS theo backend của ``url``."""
+    env = os.environ if env is None else env
+    backend = make_url(url).get_backend_name()
+
+    if backend == "sqlite":
+        # pysqlite: timeout (giây) là busy handler ở tầng driver
+        busy_ms = int(env.get("SQLITE_BUSY_TIMEOUT", SQLITE_DEFAULTS["busy_timeout"]))
+        return {"connect_args": {"timeout": busy_ms / 1000}}
+
+    defaults = POOL_DEFAULTS.get(backend, {"pool_size": 5, "max_overflow": 10, "pool_recycle": 1800})
+    options = {
+        "pool_size": int(env.get("DB_POOL_SIZE", defaults["pool_size"])),
+        "max_overflow": int(env.get("DB_MAX_OVERFLOW", defaults["max_overflow"])),
+        "pool_recycle": int(env.get("DB_POOL_RECYCLE", defaults["pool_recycle"])),
+        "pool_timeout": int(env.get("DB_POOL_TIMEOUT", 10)),
+        "pool_pre_ping": env.get("DB_POOL_PRE_PING", "true").lower() in {"1", "true", "yes", "on"},
+    }
+    if backend in {"postgresql", "mysql"}:
+        options["connect_args"] = {"connect_timeout": int(env.get("DB_CONNECT_TIMEOUT", 10))}
+    return options
+
+
+def sqlite_pragmas(url: str, env: Optional[Mapping[str, str]] = None) -> Dict:
+    """PRAGMA áp dụng cho mỗi connection SQLite mới."""
+    env = os.environ if env is None else env
+    pragmas = {
+        name: env.get(f"SQLITE_{name.upper()}", default)
+        for name, default in SQLITE_DEFAULTS.items()
+    }
+    database = make_url(url).database
+    if not database or database == ":memory:":
+        # DB trong RAM: WAL và mmap không có tác dụng
+        pragmas.pop("journal_mode")
+        pragmas.pop("mmap_size")
+    return pragmas
+
+
+def configure_engine(engine: Engine, env: Optional[Mapping[str, str]] = None) -> None:
+    """Gắn PRAGMA on-connect cho engine SQLite; các backend khác không cần."""
+    if engine.dialect.name != "sqlite":
+        return
+    pragmas = sqlite_pragmas(str(engine.url), env)
+
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, _record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import random
+import threading
+import time
+from typing import Dict, Optional
+
+import sqlalchemy as sa
+from sqlalchemy.engine import Engine
+from flask import Flask, current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+
+from db_engine import configure_engine, engine_options, normalize_database_url
+from ratelimit import request_client_ip
+
+# ============================================
+# READ-REPLICA ROUTING
+# ============================================
+# View đánh dấu @read_only đọc từ một replica (DATABASE_REPLICA_URLS); mọi
+# flush/INSERT/UPDATE/DELETE và các request ghi luôn đi vào primary. Sau khi
+# một client ghi thành công, các lần đọc của client đó dính vào primary trong
+# DB_REPLICA_STICKY_SECONDS giây để thấy ngay dữ liệu mình vừa ghi.
+#
+# Dấu "vừa ghi" nằm ở hai nơi: cookie mtp_rw (frontend cùng origin) và cache
+# dùng chung theo IP client (frontend Netlify gọi API cross-origin nên cookie
+# SameSite=Lax không được gửi lại; request đọc kế tiếp có thể rơi vào worker
+# gunicorn khác với worker đã xử lý request ghi).
+
+REPLICA_BIND_PREFIX = "replica_"
+STICKY_COOKIE = "mtp_rw"
+STICKY_NAMESPACE = "replica_sticky"
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+def create_replica_engines(urls: str) -> Dict[str, Engine]:
+    """Engine cho danh sách URL replica phân tách bằng dấu phẩy.
+
+    Không đăng ký vào SQLALCHEMY_BINDS: Flask-SQLAlchemy sẽ coi đó là một
+    metadata riêng và create_all()/migration sẽ đụng vào replica.
+    """
+    engines = {}
+    for index, url in enumerate(u.strip() for u in (urls or "").split(",") if u.strip()):
+        url = normalize_database_url(url)
+        engine = sa.create_engine(url, **engine_options(url))
+        configure_engine(engine)
+        engines[f"{REPLICA_BIND_PREFIX}{index}"] = engine
+    return engines
+
+
+def read_only(func):
+    """Đánh dấu view chỉ đọc: được phép đọc từ replica."""
+    func._read_only = True
+    return func
+
+
+class RoutingSession(Session):
+    """Session chọn replica cho SELECT trong request @read_only."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not isinstance(clause, sa.UpdateBase):
+            replica = _request_replica()
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _request_replica() -> Optional[Engine]:
+    if not has_request_context():
+        return None
+    key = g.get("db_replica_key")
+    return current_app.extensions["db_routing"]["engines"][key] if key else None
+
+
+class ReplicaRouter:
+    """Quyết định mỗi request đọc từ replica nào, và giữ read-your-writes.
+
+    ``cache`` (extension Cache) giữ dấu "vừa ghi" chung cho mọi worker; không
+    truyền thì dấu chỉ nằm trong worker hiện tại.
+    """
+
+    def __init__(self, app: Optional[Flask] = None, cache=None):
+        if app is not None:
+            self.init_app(app, cache)
+
+    def init_app(self, app: Flask, cache=None) -> None:
+        engines = create_replica_engines(app.config.get("DATABASE_REPLICA_URLS", ""))
+        keys = sorted(engines)
+        app.extensions["db_routing"] = {
+            "engines": engines,
+            "replicas": keys,
+            "sticky_seconds": float(app.config.get("DB_REPLICA_STICKY_SECONDS", 5)),
+            "recent_writers": _SharedWriters(cache) if cache is not None else _RecentWriters(),
+        }
+        if keys:
+            app.before_request(self._before_request)
+            app.after_request(self._after_request)
+
+    @staticmethod
+    def _state() -> Dict:
+        return current_app.extensions["db_routing"]
+
+    def _before_request(self):
+        if request.method in WRITE_METHODS or request.endpoint is None:
+            return None
+        view = current_app.view_functions.get(request.endpoint)
+        if not getattr(view, "_read_only", False) or self._is_sticky():
+            return None
+        g.db_replica_key = random.choice(self._state()["replicas"])
+        return None
+
+    def _after_request(self, response):
+        if request.method in WRITE_METHODS and response.status_code < 400:
+            state = self._state()
+            until = time.time() + state["sticky_seconds"]
+            state["recent_writers"].mark(request_client_ip(), until)
+            response.set_cookie(
+                STICKY_COOKIE, f"{until:.3f}", max_age=int(state["sticky_seconds"]) + 1, httponly=True
+            )
+        return response
+
+    def _is_sticky(self) -> bool:
+        cookie = request.cookies.get(STICKY_COOKIE)
+        try:
+            if cookie and float(cookie) > time.time():
+                return True
+        except ValueError:
+            pass
+        # Frontend gọi API cross-origin nên cookie có thể không được gửi:
+        # dự phòng theo IP, dùng chung giữa các worker
+        return self._state()["recent_writers"].is_recent(request_client_ip())
+
+
+class _SharedWriters:
+    """IP vừa ghi -> thời điểm hết hạn stickiness, lưu trong cache chung."""
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def mark(self, key: str, until: float) -> None:
+        self.cache.set(STICKY_NAMESPACE, key, until, ttl=max(until - time.time(), 1))
+
+    def is_recent(self, key: str) -> bool:
+        until = self.cache.get(STICKY_NAMESPACE, key)
+        return until is not None and until > time.time()
+
+    def clear(self) -> None:
+        pass  # entry trong cache là của mọi worker, tự hết hạn theo TTL
+
+
+class _RecentWriters:
+    """IP vừa ghi -> thời điểm hết hạn stickiness (trong một worker)."""
+
+    def __init__(self, max_size: int = 10000):
+        self._until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._max_size = max_size
+
+    def mark(self, key: str, until: float) -> None:
+        with self._lock:
+            if len(self._until) >= self._max_size:
+                now = time.time()
+                self._until = {k: v for k, v in self._until.items() if v > now}
+            self._until[key] = until
+
+    def is_recent(self, key: str) -> bool:
+        until = self._until.get(key)
+        return until is not None and until > time.time()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._until.clear()
+
@@ -0,0 +1,286 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+from flask import Flask, Response, current_app, request, stream_with_context
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+logger = logging.getLogger("mtp.events")
+
+# ============================================
+# BOOKING EVENTS (SERVER-SENT EVENTS)
+# ============================================
+# View ghi booking gọi publish() sau khi commit; /api/bookings/events đẩy
+# event cho dashboard qua SSE. Broker:
+#   - memory://            : buffer trong worker (một worker hoặc dev)
+#   - sqlite:///path/to.db : bảng events dùng chung giữa các worker trên máy
+# ID event dạng "<epoch>:<seq>"; client gửi lại Last-Event-ID khi reconnect
+# để nhận các event đã lỡ. Nếu epoch khác (worker khác/restart) hoặc event
+# đã rơi khỏi buffer, server gửi event "reset" để client tải lại danh sách.
+#
+# EventSource không gửi được header Authorization, nên client đổi JWT lấy một
+# ticket ngắn hạn (EVENTS_TICKET_SECONDS) chỉ dùng được cho stream này và
+# truyền qua ?ticket=; URL lọt vào access log cũng không lộ JWT.
+
+BOOKING_CREATED = "booking.created"
+BOOKING_STATUS_CHANGED = "booking.status_changed"
+BOOKING_DELETED = "booking.deleted"
+RESET = "reset"
+TICKET_SALT = "mtp-booking-events"
+
+
+class Event:
+    __slots__ = ("seq", "type", "data")
+
+    def __init__(self, seq: int, event_type: str, data: Dict):
+        self.seq = seq
+        self.type = event_type
+        self.data = data
+
+
+class MemoryBroker:
+    """Ring buffer trong worker; Condition đánh thức các stream đang chờ."""
+
+    def __init__(self, buffer_size: int = 1000):
+        self.epoch = uuid.uuid4().hex[:8]
+        self._events: Deque[Event] = deque(maxlen=buffer_size)
+        self._seq = 0
+        self._cond = threading.Condition()
+
+    @property
+    def last_seq(self) -> int:
+        return self._seq
+
+    def publish(self, event_type: str, data: Dict) -> Event:
+        with self._cond:
+            self._seq += 1
+            event = Event(self._seq, event_type, data)
+            self._events.append(event)
+            self._cond.notify_all()
+        return event
+
+    def since(self, seq: int) -> Optional[List[Event]]:
+        """Các event sau ``seq``; None nếu đã mất event (cần reset)."""
+        with self._cond:
+            if seq > self._seq:
+                return None
+            if self._events and self._events[0].seq > seq + 1:
+                return None
+            if not self._events and seq < self._seq:
+                return None
+            return [event for event in self._events if event.seq > seq]
+
+    def wait(self, seq: int, timeout: float) -> Optional[List[Event]]:
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > seq, timeout)
+        return self.since(seq)
+
+    def reset(self) -> None:
+        with self._cond:
+            self.epoch = uuid.uuid4().hex[:8]
+            self._events.clear()
+            self._seq = 0
+
+
+class SQLiteBroker:
+    """Event lưu trong một file SQLite dùng chung; stream poll theo chu kỳ."""
+
+    epoch = "db"
+
+    def __init__(self, path: str, buffer_size: int = 1000, poll_interval: float = 0.5):
+        self.path = path
+        self.buffer_size = buffer_size
+        self.poll_interval = poll_interval
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        # Event publish trong cùng worker đánh thức stream ngay, không chờ poll
+        self._cond = threading.Condition()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS booking_events ("
+                "seq INTEGER PRIMARY KEY AUTOINCREMENT, type TEXT NOT NULL, data TEXT NOT NULL, "
+                "created REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @property
+    def last_seq(self) -> int:
+        row = self._connect().execute("SELECT max(seq) FROM booking_events").fetchone()
+        return row[0] or 0
+
+    def publish(self, event_type: str, data: Dict) -> Event:
+        conn = self._connect()
+        cursor = conn.execute(
+            "INSERT INTO booking_events (type, data, created) VALUES (?, ?, ?)",
+            (event_type, json.dumps(data, ensure_ascii=False), time.time()),
+        )
+        seq = cursor.lastrowid
+        if seq % 100 == 0:
+            conn.execute("DELETE FROM booking_events WHERE seq <= ?", (seq - self.buffer_size,))
+        with self._cond:
+            self._cond.notify_all()
+        return Event(seq, event_type, data)
+
+    def since(self, seq: int) -> Optional[List[Event]]:
+        conn = self._connect()
+        first, last = conn.execute("SELECT min(seq), max(seq) FROM booking_events").fetchone()
+        if seq > (last or 0) or (first is not None and first > seq + 1 and seq < last):
+            return None
+        rows = conn.execute(
+            "SELECT seq, type, data FROM booking_events WHERE seq > ? ORDER BY seq", (seq,)
+        ).fetchall()
+        return [Event(row_seq, row_type, json.loads(row_data)) for row_seq, row_type, row_data in rows]
+
+    def wait(self, seq: int, timeout: float) -> Optional[List[Event]]:
+        deadline = time.monotonic() + timeout
+        while True:
+            events = self.since(seq)
+            remaining = deadline - time.monotonic()
+            if events is None or events or remaining <= 0:
+                return events
+            with self._cond:
+                self._cond.wait(min(self.poll_interval, remaining))
+
+    def reset(self) -> None:
+        self._local = threading.local()
+
+
+def create_broker(url: str, buffer_size: int = 1000):
+    """``memory://`` (mặc định) hoặc ``sqlite:///path/to/events.db``."""
+    if not url or url.startswith("memory://"):
+        return MemoryBroker(buffer_size)
+    if url.startswith("sqlite:///"):
+        return SQLiteBroker(url[len("sqlite:///"):], buffer_size)
+    raise ValueError(f"EVENTS_BROKER_URL không được hỗ trợ: {url}")
+
+
+def format_event(event_id: Optional[str], event_type: str, data: Dict) -> str:
+    payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    head = f"id: {event_id}\n" if event_id else ""
+    return f"{head}event: {event_type}\ndata: {payload}\n\n"
+
+
+def parse_event_id(value: Optional[str]) -> Tuple[Optional[str], int]:
+    """"<epoch>:<seq>" -> (epoch, seq); giá trị lạ -> (None, 0)."""
+    epoch, sep, seq = (value or "").partition(":")
+    if not sep or not seq.isdigit():
+        return None, 0
+    return epoch, int(seq)
+
+
+# ============================================
+# FLASK EXTENSION
+# ============================================
+class BookingEvents:
+    """Pub/sub event booking + response SSE, giới hạn số stream mỗi worker."""
+
+    def __init__(self, app: Optional[Flask] = None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        app.config.setdefault("EVENTS_BROKER_URL", "memory://")
+        app.config.setdefault("EVENTS_BUFFER_SIZE", 1000)
+        app.config.setdefault("EVENTS_HEARTBEAT_SECONDS", 15)
+        # Stream tự đóng sau khoảng này (EventSource tự reconnect với
+        # Last-Event-ID) để không giữ thread của gthread worker mãi
+        app.config.setdefault("EVENTS_MAX_STREAM_SECONDS", 300)
+        # Mỗi stream chiếm một thread: create_app() đặt GUNICORN_THREADS - 1
+        app.config.setdefault("EVENTS_MAX_STREAMS", 3)
+        app.config.setdefault("EVENTS_TICKET_SECONDS", 60)
+        app.extensions["events"] = {
+            "broker": create_broker(app.config["EVENTS_BROKER_URL"], int(app.config["EVENTS_BUFFER_SIZE"])),
+            "streams": threading.BoundedSemaphore(int(app.config["EVENTS_MAX_STREAMS"])),
+        }
+
+    @staticmethod
+    def broker():
+        return current_app.extensions["events"]["broker"]
+
+    @staticmethod
+    def _serializer() -> URLSafeTimedSerializer:
+        return URLSafeTimedSerializer(current_app.config["JWT_SECRET_KEY"], salt=TICKET_SALT)
+
+    def issue_ticket(self, subject: str) -> str:
+        """Ticket ký sẵn cho ``subject``, chỉ dùng để mở stream."""
+        return self._serializer().dumps(subject)
+
+    def check_ticket(self, ticket: str) -> Optional[str]:
+        """``subject`` của ticket còn hạn; None nếu sai chữ ký hoặc đã hết hạn."""
+        try:
+            return self._serializer().loads(ticket, max_age=int(current_app.config["EVENTS_TICKET_SECONDS"]))
+        except BadSignature:  # gồm cả SignatureExpired
+            return None
+
+    def publish(self, event_type: str, data: Dict) -> None:
+        """Gọi sau commit; lỗi broker không làm hỏng request đã ghi xong."""
+        try:
+            self.broker().publish(event_type, data)
+        except Exception:
+            logger.exception("Không publish được event %s", event_type)
+
+    def stream(self) -> Response:
+        """Response SSE cho request hiện tại; 503 nếu worker đã đủ stream."""
+        state = current_app.extensions["events"]
+        if not state["streams"].acquire(blocking=False):
+            response = Response("too many event streams\n", status=503, mimetype="text/plain")
+            response.headers["Retry-After"] = "5"
+            return response
+
+        broker = state["broker"]
+        config = current_app.config
+        last_id = request.headers.get("Last-Event-ID") or request.args.get("lastEventId")
+        epoch, seq = parse_event_id(last_id)
+        body = _event_stream(
+            broker, seq if epoch == broker.epoch else None, stale=bool(last_id) and epoch != broker.epoch,
+            heartbeat=float(config["EVENTS_HEARTBEAT_SECONDS"]),
+            max_seconds=float(config["EVENTS_MAX_STREAM_SECONDS"]),
+        )
+        response = Response(stream_with_context(body), mimetype="text/event-stream")
+        response.headers["Cache-Control"] = "no-cache"
+        response.headers["X-Accel-Buffering"] = "no"  # nginx không buffer
+        response.call_on_close(state["streams"].release)
+        return response
+
+
+def _event_stream(broker, seq: Optional[int], stale: bool, heartbeat: float,
+                  max_seconds: float) -> Iterator[str]:
+    yield "retry: 3000\n\n"
+    if seq is None:
+        # Kết nối mới: bắt đầu từ event mới nhất. Last-Event-ID của epoch
+        # khác (worker khác, restart): client có thể đã lỡ event -> reset
+        seq = broker.last_seq
+        yield format_event(f"{broker.epoch}:{seq}", RESET if stale else "ready", {})
+    deadline = time.monotonic() + max_seconds
+    while True:
+        remaining = deadline - time.monotonic()
+        events = broker.wait(seq, max(0.0, min(heartbeat, remaining)))
+        if events is None:
+            seq = broker.last_seq
+            yield format_event(f"{broker.epoch}:{seq}", RESET, {})
+        elif events:
+            for event in events:
+                seq = event.seq
+                yield format_event(f"{broker.epoch}:{event.seq}", event.type, event.data)
+        else:
+            yield ": heartbeat\n\n"
+        if time.monotonic() >= deadline:
+            return
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from flask_jwt_extended import JWTManager
+from flask_migrate import Migrate
+from flask_sqlalchemy import SQLAlchemy
+
+from applog import AppLogging
+from cache import Cache
+from compression import Compressor
+from db_routing import ReplicaRouter, RoutingSession
+from events import BookingEvents
+from jobs import JobQueue
+from metrics import Metrics
+from profiler import Profiler
+from ratelimit import RateLimiter
+from recommendations import Recommender
+
+# ============================================
+# EXTENSIONS
+# ============================================
+# Khởi tạo không gắn app; create_app() gọi init_app() cho từng instance.
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+migrate = Migrate()
+jwt = JWTManager()
+limiter = RateLimiter()
+replica_router = ReplicaRouter()
+compressor = Compressor()
+metrics = Metrics()
+app_logging = AppLogging()
+booking_events = BookingEvents()
+profiler = Profiler()
+recommender = Recommender()
+jobs = JobQueue()
+cache = Cache()
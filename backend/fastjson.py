@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import json
+from datetime import date, datetime
+from typing import Any, Callable, Iterable, Optional, Union
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson  # type: ignore
+except ImportError:
+    orjson = None  # type: ignore
+
+# ============================================
+# FAST JSON
+# ============================================
+# orjson (nếu đã cài) cho JSON provider của Flask và cho các encoder
+# trên đường nóng; không có orjson thì quay về json của stdlib với cùng
+# output.
+
+
+def _iso(value: Optional[Union[datetime, date]]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+def datetime_writer() -> Callable:
+    """Hàm chuyển datetime cho encoder: orjson tự ghi ISO 8601 nên giữ nguyên."""
+    if orjson is not None:
+        return _passthrough
+    return _iso
+
+
+def _passthrough(value):
+    return value
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, default=DefaultJSONProvider.default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_std_default).encode("utf-8")
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps_with_raw(obj: dict, key: str, raw: Optional[Union[str, bytes]]) -> bytes:
+    """Encode ``obj`` rồi nối thêm ``key`` với giá trị là JSON đã có sẵn.
+
+    Dùng cho cột chứa JSON (status_history): chép nguyên văn thay vì
+    loads() rồi dumps() lại cho từng dòng.
+    """
+    if isinstance(raw, str):
+        raw = raw.encode("utf-8")
+    head = dumps(obj)
+    separator = b"," if len(head) > 2 else b""
+    return head[:-1] + separator + dumps(key) + b":" + (raw or b"[]") + b"}"
+
+
+def dumps_list(items: Iterable[bytes]) -> bytes:
+    """Ghép các phần tử đã encode thành một JSON array."""
+    return b"[" + b",".join(items) + b"]"
+
+
+def _std_default(value):
+    # Giống orjson: datetime/date ra ISO 8601 thay vì HTTP date của Flask
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return DefaultJSONProvider.default(value)
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider của Flask dùng orjson; giữ thứ tự key như khi tạo dict."""
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return dumps(obj).decode("utf-8")
+
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj) + b"\n", mimetype=self.mimetype)
+
+
+def provider_class(name: str):
+    """JSON_PROVIDER=orjson (mặc định, nếu đã cài) hoặc default."""
+    if name == "orjson" and orjson is not None:
+        return OrjsonProvider
+    return DefaultJSONProvider
@@ -0,0 +1,105 @@
+"""Cấu hình gunicorn (tự nạp khi chạy gunicorn trong thư mục backend).
+
+Mọi giá trị đọc từ biến môi trường:
+
+- GUNICORN_WORKER_CLASS: gthread (mặc định) hoặc sync
+- WEB_CONCURRENCY: số worker; mặc định tính theo CPU khả dụng
+- GUNICORN_THREADS: số thread mỗi worker gthread (mặc định 4)
+- GUNICORN_MAX_WORKERS: trần số worker tự tính (RAM nhỏ trên Render)
+- GUNICORN_MAX_REQUESTS / GUNICORN_MAX_REQUESTS_JITTER: recycle worker
+- GUNICORN_KEEPALIVE, GUNICORN_TIMEOUT, GUNICORN_GRACEFUL_TIMEOUT
+- GUNICORN_PRELOAD: nạp app trong master trước khi fork (mặc định bật)
+- METRICS_MULTIPROC_DIR: thư mục snapshot metrics của các worker (mặc định data/metrics)
+- EVENTS_BROKER_URL: broker SSE, mặc định sqlite:///data/events.db (memory:// chỉ khi 1 worker)
+- EVENTS_MAX_STREAMS: số stream SSE mỗi worker, mặc định và tối đa GUNICORN_THREADS - 1
+"""
+import os
+import sys
+from pathlib import Path
+
+from gunicorn_profile import (
+    SUPPORTED_WORKER_CLASSES,
+    available_cpus,
+    recommended_event_streams,
+    recommended_threads,
+    recommended_workers,
+)
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+
+# Đặt trước khi nạp app: /metrics cộng số liệu của mọi worker
+os.environ.setdefault("METRICS_MULTIPROC_DIR", str(Path(__file__).resolve().parent / "data" / "metrics"))
+
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+# App dùng thread thật (job, gợi ý, SSE) và gevent không có trong requirements.txt
+if worker_class not in SUPPORTED_WORKER_CLASSES:
+    raise SystemExit(
+        f"GUNICORN_WORKER_CLASS={worker_class} không được hỗ trợ (chọn: {', '.join(SUPPORTED_WORKER_CLASSES)})"
+    )
+threads = int(os.getenv("GUNICORN_THREADS") or recommended_threads(worker_class))
+workers = int(os.getenv("WEB_CONCURRENCY") or recommended_workers(worker_class, available_cpus(), threads))
+
+# Event publish ở worker này phải tới được stream SSE đang mở ở worker khác
+if not os.getenv("EVENTS_BROKER_URL"):
+    os.environ["EVENTS_BROKER_URL"] = f"sqlite:///{(Path(__file__).resolve().parent / 'data' / 'events.db').as_posix()}"
+if workers > 1 and os.environ["EVENTS_BROKER_URL"].startswith("memory://"):
+    raise SystemExit("EVENTS_BROKER_URL=memory:// chỉ dùng được với 1 worker; hãy dùng sqlite:///...")
+# Mỗi stream SSE giữ một thread tới EVENTS_MAX_STREAM_SECONDS: chừa phần lớn
+# thread cho request thường
+max_streams = recommended_event_streams(threads)
+os.environ["EVENTS_MAX_STREAMS"] = os.getenv("EVENTS_MAX_STREAMS") or str(max_streams)
+if int(os.environ["EVENTS_MAX_STREAMS"]) > max_streams:
+    raise SystemExit(f"EVENTS_MAX_STREAMS phải <= {max_streams} với {threads} thread mỗi worker")
+
+# Recycle worker định kỳ; jitter để các worker không restart cùng lúc
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", str(max_requests // 10)))
+
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() in {
+    "1", "true", "yes", "on",
+}
+
+# Heartbeat file trên tmpfs: tránh worker bị treo vì disk chậm trong Docker
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG") or None
+errorlog = "-"
+
+
+def on_starting(server):
+    # Bộ đếm bắt đầu lại từ 0 mỗi lần khởi động master
+    from metrics import SnapshotDir
+
+    SnapshotDir(os.environ["METRICS_MULTIPROC_DIR"]).clear()
+
+
+def worker_exit(server, worker):
+    # Worker recycle/thoát: ghi snapshot cuối để tổng /metrics không bị hụt
+    app_module = sys.modules.get("app")
+    if app_module is not None:
+        from metrics import Metrics
+
+        Metrics.flush(app_module.app)
+
+
+def post_fork(server, worker):
+    # Với preload_app, pool DB, Groq client và cache được tạo trong master:
+    # reset để mỗi worker có connection/cache của riêng nó
+    app_module = sys.modules.get("app")
+    if app_module is not None and hasattr(app_module, "reset_after_fork"):
+        app_module.reset_after_fork(app_module.app)
+        # Dựng ma trận gợi ý ngay trên thread nền thay vì trong request đầu tiên
+        app_module.recommender.start(app_module.app)
+
+
+def when_ready(server):
+    server.log.info(
+        "MTP Food: %s worker(s) x %s thread(s), class=%s, preload=%s, max_requests=%s±%s, sse_streams=%s",
+        workers, threads, worker_class, preload_app, max_requests, max_requests_jitter,
+        os.environ["EVENTS_MAX_STREAMS"],
+    )
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import os
+from typing import Optional
+
+# ============================================
+# GUNICORN RUNTIME PROFILE
+# ============================================
+# Tự tính số worker/thread cho gunicorn.conf.py theo CPU thật sự được cấp
+# (affinity + cgroup quota của container), không phải số CPU của host.
+
+SUPPORTED_WORKER_CLASSES = ("gthread", "sync")
+
+
+def available_cpus(cgroup_root: str = "/sys/fs/cgroup") -> float:
+    try:
+        cpus = float(len(os.sched_getaffinity(0)))
+    except AttributeError:  # macOS/Windows
+        cpus = float(os.cpu_count() or 1)
+
+    quota = _cgroup_quota(cgroup_root)
+    if quota:
+        cpus = min(cpus, quota)
+    return max(cpus, 1.0)
+
+
+def _cgroup_quota(cgroup_root: str) -> Optional[float]:
+    # cgroup v2: "max 100000" hoặc "50000 100000"
+    try:
+        with open(os.path.join(cgroup_root, "cpu.max")) as fh:
+            quota, period = fh.read().split()[:2]
+        if quota != "max":
+            return int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    # cgroup v1
+    try:
+        with open(os.path.join(cgroup_root, "cpu", "cpu.cfs_quota_us")) as fh:
+            quota = int(fh.read())
+        with open(os.path.join(cgroup_root, "cpu", "cpu.cfs_period_us")) as fh:
+            period = int(fh.read())
+        if quota > 0:
+            return quota / period
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def recommended_workers(worker_class: str, cpus: float, threads: int = 1) -> int:
+    """sync: 2*CPU+1; gthread nhiều thread: CPU+1 (thread đã che thời gian chờ
+    I/O, thêm process chỉ tốn RAM). Chặn bởi GUNICORN_MAX_WORKERS."""
+    max_workers = int(os.getenv("GUNICORN_MAX_WORKERS", "8"))
+    if worker_class == "gthread" and threads > 1:
+        count = int(cpus + 1)
+    else:
+        count = int(2 * cpus + 1)
+    return max(1, min(count, max_workers))
+
+
+def recommended_threads(worker_class: str) -> int:
+    # Mỗi request phần lớn thời gian chờ DB/Groq nên vài thread mỗi worker là đủ
+    return 4 if worker_class == "gthread" else 1
+
+
+def recommended_event_streams(threads: int) -> int:
+    """Số stream SSE mỗi worker: mọi thread trừ một thread cho request thường."""
+    return max(1, threads - 1)
@@ -0,0 +1,370 @@
+from __future__ import annotations
+
+import json
+import logging
+import random
+import signal
+import threading
+import traceback
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from flask import Flask, current_app
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Index,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    Text,
+    create_engine,
+    func,
+    select,
+)
+from sqlalchemy.engine import Engine, make_url
+
+from applog import parse_pairs
+from db_engine import configure_engine, engine_options, normalize_database_url
+
+logger = logging.getLogger("mtp.jobs")
+
+# ============================================
+# BACKGROUND JOB QUEUE
+# ============================================
+# Route gọi enqueue() (một INSERT) rồi trả response; process worker
+# (`flask --app app jobs-worker`) lấy job và chạy handler trong app context.
+# Job lưu trong JOBS_DATABASE_URL: mặc định file SQLite cục bộ (web và worker
+# chạy trên cùng máy), hoặc đặt bằng DATABASE_URL để dùng chung DB chính. Chỉ
+# file SQLite riêng được tạo bảng tự động; trong DB chính bảng jobs do
+# migration tạo (flask db upgrade) như mọi bảng khác.
+#   - Lấy job: UPDATE ... WHERE status='queued' (optimistic), không cần khóa
+#   - Worker chết giữa chừng: job hết lease (JOBS_LEASE_SECONDS) tính là một lần
+#     lỗi: quay lại hàng đợi sau backoff, hoặc failed nếu đã hết max_attempts
+#   - Lỗi: chạy lại sau JOBS_RETRY_BASE_SECONDS * 2^(lần thử - 1), tối đa max_attempts
+#   - JOBS_CONCURRENCY="chat_log.save=2": số job chạy đồng thời mỗi loại (mọi worker)
+#   - JOBS_EAGER=1: chạy handler ngay trong request (test, dev)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+metadata = MetaData()
+jobs_table = Table(
+    "jobs",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("type", String(60), nullable=False),
+    Column("payload", Text, nullable=False),
+    Column("status", String(10), nullable=False, default=QUEUED),
+    Column("attempts", Integer, nullable=False, default=0),
+    Column("max_attempts", Integer, nullable=False, default=5),
+    Column("run_at", DateTime, nullable=False),
+    Column("locked_until", DateTime),
+    Column("worker", String(60)),
+    Column("last_error", Text),
+    Column("created_at", DateTime, nullable=False),
+    Column("finished_at", DateTime),
+    Index("ix_jobs_status_run_at", "status", "run_at"),
+)
+
+
+class Task:
+    __slots__ = ("name", "func", "max_attempts")
+
+    def __init__(self, name: str, func: Callable[[Dict], None], max_attempts: int):
+        self.name = name
+        self.func = func
+        self.max_attempts = max_attempts
+
+
+class _JobState:
+    def __init__(self, app: Flask):
+        config = app.config
+        self.url = normalize_database_url(config["JOBS_DATABASE_URL"])
+        self.shared = self.url == normalize_database_url(config["SQLALCHEMY_DATABASE_URI"])
+        self.eager = bool(config["JOBS_EAGER"])
+        self.limits = {name: int(limit) for name, limit in parse_pairs(config["JOBS_CONCURRENCY"]).items()}
+        self.lease = timedelta(seconds=float(config["JOBS_LEASE_SECONDS"]))
+        self.retry_base = float(config["JOBS_RETRY_BASE_SECONDS"])
+        self.retry_max = float(config["JOBS_RETRY_MAX_SECONDS"])
+        self._engine: Optional[Engine] = None
+        self._lock = threading.Lock()
+
+    @property
+    def engine(self) -> Engine:
+        # Tạo engine (và file SQLite) ở lần dùng đầu, không phải lúc create_app()
+        if self._engine is None:
+            with self._lock:
+                if self._engine is None:
+                    url = make_url(self.url)
+                    local = url.get_backend_name() == "sqlite" and not self.shared
+                    if local and url.database and url.database != ":memory:":
+                        Path(url.database).parent.mkdir(parents=True, exist_ok=True)
+                    engine = create_engine(self.url, **engine_options(self.url))
+                    configure_engine(engine)
+                    if local:
+                        metadata.create_all(engine)
+                    self._engine = engine
+        return self._engine
+
+    def reset(self) -> None:
+        if self._engine is not None:
+            self._engine.dispose(close=False)
+        self._lock = threading.Lock()
+
+    def backoff(self, attempts: int) -> float:
+        delay = min(self.retry_base * 2 ** max(attempts - 1, 0), self.retry_max)
+        return delay * random.uniform(0.5, 1.0)
+
+
+class JobQueue:
+    """Extension hàng đợi job; handler đăng ký bằng ``@jobs.task("tên")``."""
+
+    def __init__(self, app: Optional[Flask] = None):
+        self.tasks: Dict[str, Task] = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        app.config.setdefault("JOBS_DATABASE_URL", "sqlite:///data/jobs.db")
+        app.config.setdefault("JOBS_EAGER", False)
+        app.config.setdefault("JOBS_CONCURRENCY", "")
+        app.config.setdefault("JOBS_LEASE_SECONDS", 300)
+        app.config.setdefault("JOBS_RETRY_BASE_SECONDS", 5)
+        app.config.setdefault("JOBS_RETRY_MAX_SECONDS", 3600)
+        app.extensions["jobs"] = _JobState(app)
+
+    def task(self, name: str, max_attempts: int = 5):
+        def decorator(func: Callable[[Dict], None]):
+            self.tasks[name] = Task(name, func, max_attempts)
+            return func
+
+        return decorator
+
+    @staticmethod
+    def state() -> _JobState:
+        return current_app.extensions["jobs"]
+
+    # ---------------------------------------------
+    # Enqueue
+    # ---------------------------------------------
+    def enqueue(self, name: str, payload: Dict, delay: float = 0) -> Optional[int]:
+        """Thêm job; trả về id (None ở chế độ eager)."""
+        task = self.tasks[name]
+        state = self.state()
+        if state.eager:
+            try:
+                task.func(payload)
+            except Exception:
+                logger.exception("Job %s lỗi (eager)", name)
+            return None
+        now = datetime.utcnow()
+        with state.engine.begin() as conn:
+            result = conn.execute(
+                jobs_table.insert().values(
+                    type=name,
+                    payload=json.dumps(payload, ensure_ascii=False),
+                    status=QUEUED,
+                    attempts=0,
+                    max_attempts=task.max_attempts,
+                    run_at=now + timedelta(seconds=delay),
+                    created_at=now,
+                )
+            )
+        return result.inserted_primary_key[0]
+
+    # ---------------------------------------------
+    # Worker
+    # ---------------------------------------------
+    def claim(self, worker: str, types: Optional[Iterable[str]] = None) -> Optional[Dict]:
+        """Lấy một job đến hạn, tôn trọng giới hạn đồng thời theo loại."""
+        state = self.state()
+        engine = state.engine
+        now = datetime.utcnow()
+        allowed = set(self.tasks) if types is None else set(types) & set(self.tasks)
+        with engine.begin() as conn:
+            self._expire_leases(conn, now)
+            running = dict(
+                conn.execute(
+                    select(jobs_table.c.type, func.count())
+                    .where(jobs_table.c.status == RUNNING)
+                    .group_by(jobs_table.c.type)
+                ).all()
+            )
+        allowed -= {name for name, limit in state.limits.items() if running.get(name, 0) >= limit}
+        if not allowed:
+            return None
+
+        with engine.connect() as conn:
+            candidates = conn.execute(
+                select(jobs_table.c.id, jobs_table.c.type)
+                .where(
+                    jobs_table.c.status == QUEUED,
+                    jobs_table.c.run_at <= now,
+                    jobs_table.c.type.in_(sorted(allowed)),
+                )
+                .order_by(jobs_table.c.run_at, jobs_table.c.id)
+                .limit(20)
+            ).all()
+        for job_id, job_type in candidates:
+            with engine.connect() as conn:
+                transaction = conn.begin()
+                claimed = conn.execute(
+                    jobs_table.update()
+                    .where(jobs_table.c.id == job_id, jobs_table.c.status == QUEUED)
+                    .values(
+                        status=RUNNING,
+                        attempts=jobs_table.c.attempts + 1,
+                        locked_until=now + state.lease,
+                        worker=worker,
+                    )
+                ).rowcount
+                if not claimed:
+                    transaction.rollback()
+                    continue  # worker khác đã lấy
+                limit = state.limits.get(job_type)
+                if limit is not None and conn.execute(
+                    select(func.count()).where(jobs_table.c.status == RUNNING, jobs_table.c.type == job_type)
+                ).scalar() > limit:
+                    # Worker khác vừa lấy job cùng loại: trả lại, thử loại khác
+                    transaction.rollback()
+                    continue
+                row = conn.execute(select(jobs_table).where(jobs_table.c.id == job_id)).mappings().one()
+                transaction.commit()
+                return dict(row)
+        return None
+
+    def _retry_values(self, attempts: int, max_attempts: int, error: str, now: datetime) -> Dict:
+        """Cột cần ghi khi một lần chạy lỗi: chờ backoff rồi chạy lại, hoặc failed."""
+        values = {"last_error": error[:2000], "locked_until": None, "worker": None}
+        if attempts >= max_attempts:
+            values.update(status=FAILED, finished_at=now)
+        else:
+            values.update(status=QUEUED, run_at=now + timedelta(seconds=self.state().backoff(attempts)))
+        return values
+
+    def _expire_leases(self, conn, now: datetime) -> None:
+        # Job của worker đã chết (hết lease): tính như một lần lỗi
+        expired = conn.execute(
+            select(jobs_table.c.id, jobs_table.c.attempts, jobs_table.c.max_attempts, jobs_table.c.worker)
+            .where(jobs_table.c.status == RUNNING, jobs_table.c.locked_until < now)
+        ).all()
+        for job_id, attempts, max_attempts, worker in expired:
+            conn.execute(
+                jobs_table.update()
+                .where(jobs_table.c.id == job_id, jobs_table.c.status == RUNNING, jobs_table.c.worker == worker)
+                .values(**self._retry_values(attempts, max_attempts, f"lease hết hạn (worker {worker})", now))
+            )
+
+    def _finish(self, job: Dict, values: Dict) -> bool:
+        """Ghi kết quả nếu job vẫn do worker này giữ; False nếu lease đã bị lấy lại."""
+        with self.state().engine.begin() as conn:
+            updated = conn.execute(
+                jobs_table.update()
+                .where(
+                    jobs_table.c.id == job["id"],
+                    jobs_table.c.status == RUNNING,
+                    jobs_table.c.worker == job["worker"],
+                )
+                .values(**values)
+            ).rowcount
+        if not updated:
+            logger.warning(
+                "Job %s #%s chạy quá lease, bỏ kết quả của worker %s", job["type"], job["id"], job["worker"],
+                extra={"job_type": job["type"]},
+            )
+        return bool(updated)
+
+    def run_job(self, job: Dict) -> bool:
+        """Chạy handler của job đã claim; True nếu thành công."""
+        task = self.tasks[job["type"]]
+        try:
+            task.func(json.loads(job["payload"]))
+        except Exception as error:
+            final = job["attempts"] >= job["max_attempts"]
+            message = "".join(traceback.format_exception_only(type(error), error)).strip()
+            self._finish(job, self._retry_values(job["attempts"], job["max_attempts"], message, datetime.utcnow()))
+            logger.warning(
+                "Job %s #%s lỗi (lần %s/%s)", job["type"], job["id"], job["attempts"], job["max_attempts"],
+                exc_info=True, extra={"job_type": job["type"], "final": final},
+            )
+            return False
+        return self._finish(
+            job, {"status": DONE, "finished_at": datetime.utcnow(), "locked_until": None, "last_error": None}
+        )
+
+    def work(self, app: Flask, threads: int = 1, once: bool = False, poll_interval: float = 1.0,
+             types: Optional[List[str]] = None) -> int:
+        """Vòng lặp worker; ``once`` thoát khi hết job đến hạn. Trả về số job đã chạy."""
+        stop = threading.Event()
+        processed = []
+        worker_id = uuid.uuid4().hex[:8]
+
+        def loop(index: int) -> None:
+            name = f"{worker_id}-{index}"
+            while not stop.is_set():
+                with app.app_context():
+                    job = self.claim(name, types)
+                    if job is not None:
+                        self.run_job(job)
+                        processed.append(job["id"])
+                        continue
+                if once:
+                    return
+                stop.wait(poll_interval)
+
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda *_: stop.set())
+        workers = [threading.Thread(target=loop, args=(n,), name=f"mtp-jobs-{n}") for n in range(threads)]
+        for thread in workers:
+            thread.start()
+        try:
+            for thread in workers:
+                while thread.is_alive():
+                    thread.join(0.5)
+        except KeyboardInterrupt:
+            stop.set()
+            for thread in workers:
+                thread.join()
+        return len(processed)
+
+    # ---------------------------------------------
+    # Theo dõi
+    # ---------------------------------------------
+    def stats(self) -> Dict:
+        """Số job theo loại/trạng thái và tuổi job đang chờ lâu nhất."""
+        state = self.state()
+        now = datetime.utcnow()
+        with state.engine.connect() as conn:
+            rows = conn.execute(
+                select(jobs_table.c.type, jobs_table.c.status, func.count(), func.min(jobs_table.c.run_at))
+                .group_by(jobs_table.c.type, jobs_table.c.status)
+            ).all()
+        types: Dict[str, Dict] = {}
+        oldest = None
+        for job_type, status, count, first_run in rows:
+            types.setdefault(job_type, {})[status] = count
+            if status == QUEUED and first_run is not None and first_run <= now:
+                oldest = first_run if oldest is None else min(oldest, first_run)
+        return {
+            "queued": sum(item.get(QUEUED, 0) for item in types.values()),
+            "running": sum(item.get(RUNNING, 0) for item in types.values()),
+            "failed": sum(item.get(FAILED, 0) for item in types.values()),
+            "oldestQueuedSeconds": round((now - oldest).total_seconds(), 1) if oldest else 0,
+            "types": types,
+            "concurrency": state.limits,
+        }
+
+    def purge(self, older_than: datetime) -> int:
+        """Xóa job đã xong/thất bại trước ``older_than``."""
+        with self.state().engine.begin() as conn:
+            return conn.execute(
+                jobs_table.delete().where(
+                    jobs_table.c.status.in_((DONE, FAILED)), jobs_table.c.finished_at < older_than
+                )
+            ).rowcount
@@ -0,0 +1,375 @@
+from __future__ import annotations
+
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import Counter as TallyCounter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from flask import Flask, Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger("mtp.metrics")
+
+# ============================================
+# REQUEST METRICS (PROMETHEUS TEXT FORMAT)
+# ============================================
+# Mỗi worker giữ registry riêng trong bộ nhớ. Khi đặt METRICS_MULTIPROC_DIR
+# (gunicorn.conf.py tự đặt), mỗi worker ghi snapshot registry vào thư mục đó
+# mỗi METRICS_FLUSH_SECONDS (thread nền); /metrics cộng snapshot của mọi worker
+# (kể cả worker đã recycle) nên scrape vào worker nào cũng ra cùng tổng,
+# trễ tối đa một chu kỳ flush.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+LabelValues = Tuple[str, ...]
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: Sequence[str]):
+        self.name, self.help, self.labels = name, help_text, tuple(labels)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0.0)
+
+    def snapshot(self) -> List:
+        with self._lock:
+            return [[list(values), total] for values, total in self._values.items()]
+
+    def merge(self, rows: List) -> None:
+        for values, total in rows:
+            self.inc(*values, amount=total)
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for values, total in sorted(self._values.items()):
+            yield f"{self.name}{_labels(self.labels, values)} {_number(total)}"
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: Sequence[str], buckets: Sequence[float]):
+        self.name, self.help, self.labels = name, help_text, tuple(labels)
+        self.buckets = tuple(buckets)
+        # label values -> [count theo bucket..., +Inf], sum
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._series.setdefault(
+                label_values, ([0] * (len(self.buckets) + 1), [0.0])
+            )
+            counts[index] += 1
+            total[0] += value
+
+    def count(self, *label_values: str) -> int:
+        series = self._series.get(label_values)
+        return sum(series[0]) if series else 0
+
+    def snapshot(self) -> List:
+        with self._lock:
+            return [[list(values), list(counts), total[0]] for values, (counts, total) in self._series.items()]
+
+    def merge(self, rows: List) -> None:
+        with self._lock:
+            for values, counts, total in rows:
+                series = self._series.setdefault(tuple(values), ([0] * (len(self.buckets) + 1), [0.0]))
+                for index, count in enumerate(counts):
+                    series[0][index] += count
+                series[1][0] += total
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for values, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                yield f"{self.name}_bucket{_labels(self.labels + ('le',), values + (le,))} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labels, values)} {_number(total[0])}"
+            yield f"{self.name}_count{_labels(self.labels, values)} {cumulative}"
+
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List = []
+        self.requests = self._add(Counter(
+            "mtp_http_requests_total", "HTTP requests theo endpoint, method và status.",
+            ("endpoint", "method", "status")))
+        self.latency = self._add(Histogram(
+            "mtp_http_request_duration_seconds", "Thời gian xử lý request.",
+            ("endpoint", "method"), LATENCY_BUCKETS))
+        self.response_size = self._add(Histogram(
+            "mtp_http_response_size_bytes", "Kích thước body response (sau khi nén).",
+            ("endpoint",), SIZE_BUCKETS))
+        self.sql_queries = self._add(Histogram(
+            "mtp_db_queries_per_request", "Số câu SQL mỗi request.",
+            ("endpoint",), QUERY_BUCKETS))
+        self.sql_time = self._add(Histogram(
+            "mtp_db_time_per_request_seconds", "Tổng thời gian SQL mỗi request.",
+            ("endpoint",), LATENCY_BUCKETS))
+        self.query_warnings = self._add(Counter(
+            "mtp_db_query_warnings_total", "Request vượt SQL_QUERY_WARN_THRESHOLD hoặc nghi N+1.",
+            ("endpoint", "kind")))
+        self.upstream_latency = self._add(Histogram(
+            "mtp_upstream_duration_seconds", "Thời gian gọi dịch vụ ngoài (Groq).",
+            ("service", "outcome"), LATENCY_BUCKETS))
+        self.cache_requests = self._add(Counter(
+            "mtp_cache_operations_total", "Thao tác cache theo namespace (hit/miss/set/eviction/invalidation).",
+            ("namespace", "result")))
+
+    def _add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, List]:
+        return {metric.name: metric.snapshot() for metric in self.metrics}
+
+    def merge(self, snapshot: Dict[str, List]) -> None:
+        for metric in self.metrics:
+            rows = snapshot.get(metric.name)
+            if rows:
+                metric.merge(rows)
+
+
+class SnapshotDir:
+    """Snapshot registry của từng worker (một file JSON mỗi process) trong thư mục dùng chung."""
+
+    def __init__(self, path: str, flush_interval: float = 1.0):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.flush_interval = flush_interval
+        self._dirty = False
+        self._flusher_pid: Optional[int] = None
+        self._pid: Optional[int] = None
+        self._name = ""
+        self._lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        # pid có thể được dùng lại sau khi worker cũ thoát: thêm hậu tố ngẫu nhiên
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._name = f"{self._pid}-{uuid.uuid4().hex[:8]}.json"
+        return self._name
+
+    def flush(self, registry: Registry) -> None:
+        with self._lock:
+            target = self.path / self.name
+            temp = target.with_suffix(".tmp")
+            temp.write_text(json.dumps(registry.snapshot()), encoding="utf-8")
+            os.replace(temp, target)
+
+    def mark_dirty(self, registry: Registry) -> None:
+        """Gọi sau mỗi request; thread nền của process ghi snapshot mỗi flush_interval."""
+        self._dirty = True
+        if self._flusher_pid != os.getpid():
+            # Thread không đi theo fork: mỗi worker khởi động thread của riêng nó
+            self._flusher_pid = os.getpid()
+            threading.Thread(target=self._flush_loop, args=(registry,), daemon=True, name="mtp-metrics").start()
+
+    def _flush_loop(self, registry: Registry) -> None:
+        while True:
+            time.sleep(self.flush_interval)
+            if not self._dirty:
+                continue
+            self._dirty = False
+            try:
+                self.flush(registry)
+            except OSError:
+                logger.warning("Không ghi được snapshot metrics vào %s", self.path, exc_info=True)
+
+    def collect(self, registry: Registry) -> Registry:
+        """Registry mới = registry của worker này + snapshot của các worker khác."""
+        merged = Registry()
+        merged.merge(registry.snapshot())
+        own = self.name
+        for path in self.path.glob("*.json"):
+            if path.name == own:
+                continue
+            try:
+                merged.merge(json.loads(path.read_text(encoding="utf-8")))
+            except (OSError, ValueError):
+                continue  # file vừa bị xóa/ghi dở: bỏ qua lần scrape này
+        return merged
+
+    def clear(self) -> None:
+        """Gọi khi master khởi động: bộ đếm bắt đầu lại từ 0 (Prometheus tự xử lý reset)."""
+        for path in self.path.glob("*.json"):
+            path.unlink(missing_ok=True)
+
+
+# ============================================
+# FLASK EXTENSION
+# ============================================
+class Metrics:
+    """Đo mọi request + SQL qua engine events; phơi bày tại /metrics."""
+
+    def __init__(self, app: Optional[Flask] = None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        app.config.setdefault("METRICS_ENABLED", True)
+        app.config.setdefault("METRICS_TOKEN", None)
+        app.config.setdefault("METRICS_MULTIPROC_DIR", None)
+        app.config.setdefault("METRICS_FLUSH_SECONDS", 1.0)
+        app.config.setdefault("SQL_QUERY_WARN_THRESHOLD", 20)
+        app.config.setdefault("SQL_REPEAT_WARN_THRESHOLD", 5)
+        app.extensions["metrics"] = Registry()
+        multiproc_dir = app.config["METRICS_MULTIPROC_DIR"]
+        app.extensions["metrics_snapshots"] = (
+            SnapshotDir(multiproc_dir, float(app.config["METRICS_FLUSH_SECONDS"])) if multiproc_dir else None
+        )
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.add_url_rule("/metrics", "metrics", self._metrics_view)
+
+    @staticmethod
+    def registry() -> Registry:
+        return current_app.extensions["metrics"]
+
+    @staticmethod
+    def instrument_engine(engine: Engine) -> None:
+        """Đếm số câu SQL và thời gian SQL cho request hiện tại."""
+        if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+            return
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+    @staticmethod
+    def _before_request():
+        if current_app.config["METRICS_ENABLED"]:
+            g._metrics = {"start": time.perf_counter(), "queries": 0, "sql_time": 0.0,
+                          "statements": TallyCounter()}
+
+    def _after_request(self, response: Response) -> Response:
+        state = g.pop("_metrics", None)
+        if state is None or request.endpoint == "metrics":
+            return response
+
+        registry = self.registry()
+        endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+        elapsed = time.perf_counter() - state["start"]
+        registry.requests.inc(endpoint, request.method, str(response.status_code))
+        registry.latency.observe(elapsed, endpoint, request.method)
+        if not response.is_streamed:
+            registry.response_size.observe(response.calculate_content_length() or 0, endpoint)
+        registry.sql_queries.observe(state["queries"], endpoint)
+        registry.sql_time.observe(state["sql_time"], endpoint)
+        self._check_queries(registry, endpoint, state)
+        snapshots = current_app.extensions["metrics_snapshots"]
+        if snapshots is not None:
+            snapshots.mark_dirty(registry)
+        return response
+
+    @staticmethod
+    def _check_queries(registry: Registry, endpoint: str, state: Dict) -> None:
+        config = current_app.config
+        if state["queries"] > config["SQL_QUERY_WARN_THRESHOLD"]:
+            registry.query_warnings.inc(endpoint, "too_many")
+            logger.warning(
+                "%s %s chạy %d câu SQL (ngưỡng %d)",
+                request.method, endpoint, state["queries"], config["SQL_QUERY_WARN_THRESHOLD"],
+            )
+        if state["statements"]:
+            statement, repeats = state["statements"].most_common(1)[0]
+            if repeats > config["SQL_REPEAT_WARN_THRESHOLD"]:
+                registry.query_warnings.inc(endpoint, "n_plus_one")
+                logger.warning(
+                    "Nghi N+1 ở %s %s: câu SQL lặp %d lần: %s",
+                    request.method, endpoint, repeats, " ".join(statement.split())[:200],
+                )
+
+    @staticmethod
+    def flush(app: Flask) -> None:
+        """Ghi snapshot cuối của worker (gunicorn worker_exit)."""
+        snapshots = app.extensions.get("metrics_snapshots")
+        if snapshots is not None:
+            snapshots.flush(app.extensions["metrics"])
+
+    @staticmethod
+    def _metrics_view():
+        # Không có METRICS_TOKEN thì đóng endpoint, tránh lộ số liệu ra ngoài
+        token = current_app.config["METRICS_TOKEN"]
+        if not token:
+            return Response("metrics disabled: set METRICS_TOKEN\n", status=403, mimetype="text/plain")
+        if request.headers.get("Authorization") != f"Bearer {token}":
+            return Response("unauthorized\n", status=401, mimetype="text/plain")
+        registry = current_app.extensions["metrics"]
+        snapshots = current_app.extensions["metrics_snapshots"]
+        if snapshots is not None:
+            registry = snapshots.collect(registry)
+        return Response(
+            registry.render(),
+            mimetype="text/plain",
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+        )
+
+
+def observe_upstream(service: str, outcome: str, seconds: float) -> None:
+    """Ghi nhận một lần gọi dịch vụ ngoài, ví dụ ("groq", "ok", 0.8)."""
+    registry = current_app.extensions.get("metrics")
+    if registry is not None:
+        registry.upstream_latency.observe(seconds, service, outcome)
+
+
+def _request_state() -> Optional[Dict]:
+    if not has_request_context():
+        return None
+    return g.get("_metrics")
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    state = _request_state()
+    if state is not None:
+        conn.info.setdefault("_metrics_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    state = _request_state()
+    if state is None:
+        return
+    started = conn.info.get("_metrics_started")
+    if started:
+        state["sql_time"] += time.perf_counter() - started.pop()
+    state["queries"] += 1
+    state["statements"][statement] += 1
@@ -0,0 +1,47 @@
+"""delta sync: updated_at indexes and tombstones
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 00:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # DB tạo bằng create_all() (/api/init-db) có thể đã có sẵn các object này
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('tombstones'):
+        op.create_table('tombstones',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('entity', sa.String(length=20), nullable=False),
+        sa.Column('entity_key', sa.String(length=64), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('tombstones', schema=None) as batch_op:
+            batch_op.create_index('ix_tombstones_entity_deleted_at', ['entity', 'deleted_at'], unique=False)
+
+    for table in ('foods', 'bookings'):
+        name = f'ix_{table}_updated_at'
+        if name not in {index['name'] for index in inspector.get_indexes(table)}:
+            with op.batch_alter_table(table, schema=None) as batch_op:
+                batch_op.create_index(name, ['updated_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.drop_index('ix_bookings_updated_at')
+    with op.batch_alter_table('foods', schema=None) as batch_op:
+        batch_op.drop_index('ix_foods_updated_at')
+    with op.batch_alter_table('tombstones', schema=None) as batch_op:
+        batch_op.drop_index('ix_tombstones_entity_deleted_at')
+    op.drop_table('tombstones')
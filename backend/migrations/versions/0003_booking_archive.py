@@ -0,0 +1,55 @@
+"""booking archive table and booking_datetime index
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 09:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # DB tạo bằng create_all() (/api/init-db) có thể đã có sẵn các object này
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('booking_archive'):
+        op.create_table('booking_archive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('code', sa.String(length=20), nullable=False),
+        sa.Column('customer_name', sa.String(length=120), nullable=False),
+        sa.Column('customer_phone', sa.String(length=20), nullable=False),
+        sa.Column('customer_email', sa.String(length=120), nullable=False),
+        sa.Column('guests', sa.Integer(), nullable=False),
+        sa.Column('booking_datetime', sa.DateTime(), nullable=False),
+        sa.Column('note', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('total_amount', sa.Integer(), nullable=True),
+        sa.Column('status_history', sa.Text(), nullable=True),
+        sa.Column('items', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('archived_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('code')
+        )
+        with op.batch_alter_table('booking_archive', schema=None) as batch_op:
+            batch_op.create_index('ix_booking_archive_booking_datetime', ['booking_datetime'], unique=False)
+
+    if 'ix_bookings_booking_datetime' not in {index['name'] for index in inspector.get_indexes('bookings')}:
+        with op.batch_alter_table('bookings', schema=None) as batch_op:
+            batch_op.create_index('ix_bookings_booking_datetime', ['booking_datetime'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.drop_index('ix_bookings_booking_datetime')
+    with op.batch_alter_table('booking_archive', schema=None) as batch_op:
+        batch_op.drop_index('ix_booking_archive_booking_datetime')
+    op.drop_table('booking_archive')
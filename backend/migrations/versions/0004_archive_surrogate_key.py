@@ -0,0 +1,82 @@
+"""booking_archive surrogate key, no rowid reuse on hot tables
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+ARCHIVE_COLUMNS = (
+    'code', 'customer_name', 'customer_phone', 'customer_email', 'guests', 'booking_datetime', 'note',
+    'status', 'total_amount', 'status_history', 'items', 'created_at', 'updated_at', 'archived_at',
+)
+
+
+def _swap_archive(key_columns, target, source):
+    """Dựng lại booking_archive qua bảng tạm (đổi khóa chính được trên mọi backend)."""
+    op.create_table('booking_archive_new',
+    *key_columns,
+    sa.Column('code', sa.String(length=20), nullable=False),
+    sa.Column('customer_name', sa.String(length=120), nullable=False),
+    sa.Column('customer_phone', sa.String(length=20), nullable=False),
+    sa.Column('customer_email', sa.String(length=120), nullable=False),
+    sa.Column('guests', sa.Integer(), nullable=False),
+    sa.Column('booking_datetime', sa.DateTime(), nullable=False),
+    sa.Column('note', sa.Text(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('total_amount', sa.Integer(), nullable=True),
+    sa.Column('status_history', sa.Text(), nullable=True),
+    sa.Column('items', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('code')
+    )
+    columns = ', '.join(ARCHIVE_COLUMNS)
+    op.execute(
+        f'INSERT INTO booking_archive_new ({target}, {columns}) '
+        f'SELECT {source}, {columns} FROM booking_archive ORDER BY archived_at, {source}'
+    )
+    with op.batch_alter_table('booking_archive', schema=None) as batch_op:
+        batch_op.drop_index('ix_booking_archive_booking_datetime')
+    op.drop_table('booking_archive')
+    op.rename_table('booking_archive_new', 'booking_archive')
+    with op.batch_alter_table('booking_archive', schema=None) as batch_op:
+        batch_op.create_index('ix_booking_archive_booking_datetime', ['booking_datetime'], unique=False)
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    # booking_archive.id từng giữ nguyên Booking.id: id đó có thể được cấp lại
+    # cho đơn mới, lần archive sau sẽ trùng khóa. Archive có khóa riêng, id gốc
+    # chuyển sang booking_id. DB tạo bằng create_all() đã có sẵn cột này.
+    if 'booking_id' not in {column['name'] for column in inspector.get_columns('booking_archive')}:
+        _swap_archive(
+            [sa.Column('id', sa.Integer(), nullable=False), sa.Column('booking_id', sa.Integer(), nullable=False)],
+            target='booking_id', source='id',
+        )
+
+    # SQLite cấp rowid = max(id) + 1, nên xóa/archive đơn mới nhất làm id bị dùng
+    # lại (watermark booking_items.id của recommender bỏ sót đơn mới).
+    # AUTOINCREMENT giữ id tăng mãi; Postgres/MySQL 8 không cấp lại id nên không cần.
+    if bind.dialect.name == 'sqlite':
+        for table in ('bookings', 'booking_items'):
+            with op.batch_alter_table(table, schema=None, recreate='always',
+                                      table_kwargs={'sqlite_autoincrement': True}):
+                pass
+
+
+def downgrade():
+    # Giữ AUTOINCREMENT trên bookings/booking_items: không ảnh hưởng schema cũ
+    _swap_archive([sa.Column('id', sa.Integer(), autoincrement=False, nullable=False)], target='id', source='booking_id')
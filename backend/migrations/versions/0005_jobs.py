@@ -0,0 +1,46 @@
+"""background job queue table
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Bảng của jobs.py khi JOBS_DATABASE_URL trỏ vào DB chính; bản cũ của
+    # worker có thể đã tự tạo bảng bằng create_all()
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('jobs'):
+        op.create_table('jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('type', sa.String(length=60), nullable=False),
+        sa.Column('payload', sa.Text(), nullable=False),
+        sa.Column('status', sa.String(length=10), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('max_attempts', sa.Integer(), nullable=False),
+        sa.Column('run_at', sa.DateTime(), nullable=False),
+        sa.Column('locked_until', sa.DateTime(), nullable=True),
+        sa.Column('worker', sa.String(length=60), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('jobs', schema=None) as batch_op:
+            batch_op.create_index('ix_jobs_status_run_at', ['status', 'run_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.drop_index('ix_jobs_status_run_at')
+    op.drop_table('jobs')
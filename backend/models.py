@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime
+
+from extensions import db
+
+BOOKING_STATUSES = ["pending", "confirmed", "completed", "cancelled"]
+STATUS_LABELS = {
+    "pending": "Chờ xác nhận",
+    "confirmed": "Đã xác nhận",
+    "completed": "Hoàn tất",
+    "cancelled": "Đã hủy",
+}
+# Chuyển trạng thái hợp lệ khi cập nhật hàng loạt (giống các nút trên dashboard)
+STATUS_TRANSITIONS = {
+    "pending": {"confirmed", "cancelled"},
+    "confirmed": {"completed", "cancelled"},
+    "completed": set(),
+    "cancelled": set(),
+}
+
+
+# ============================================
+# DATABASE MODELS
+# ============================================
+class TimestampMixin:
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(
+        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+
+class Food(TimestampMixin, db.Model):
+    __tablename__ = "foods"
+    __table_args__ = (db.Index("ix_foods_updated_at", "updated_at"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(120), nullable=False)
+    price = db.Column(db.Integer, nullable=False)
+    image = db.Column(db.String(500), nullable=False)
+    description = db.Column(db.Text, default="")
+    is_active = db.Column(db.Boolean, default=True)
+
+
+class Booking(TimestampMixin, db.Model):
+    __tablename__ = "bookings"
+    __table_args__ = (
+        db.Index("ix_bookings_updated_at", "updated_at"),
+        db.Index("ix_bookings_booking_datetime", "booking_datetime"),
+        # SQLite: không cấp lại id của đơn đã xóa/archive (xem migration 0004)
+        {"sqlite_autoincrement": True},
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    code = db.Column(db.String(20), unique=True, nullable=False)
+    customer_name = db.Column(db.String(120), nullable=False)
+    customer_phone = db.Column(db.String(20), nullable=False)
+    customer_email = db.Column(db.String(120), nullable=False)
+    guests = db.Column(db.Integer, nullable=False)
+    booking_datetime = db.Column(db.DateTime, nullable=False)
+    note = db.Column(db.Text, default="")
+    status = db.Column(db.String(20), default="pending", nullable=False)
+    total_amount = db.Column(db.Integer, default=0)
+    status_history = db.Column(db.Text, default="[]")
+
+    items = db.relationship(
+        "BookingItem",
+        cascade="all, delete-orphan",
+        backref="booking",
+        lazy="joined",
+    )
+
+    def update_status(self, new_status: str, note: str = "") -> None:
+        history = json.loads(self.status_history or "[]")
+        history.append(
+            {
+                "status": new_status,
+                "label": STATUS_LABELS.get(new_status, new_status),
+                "note": note,
+                "time": datetime.utcnow().isoformat(),
+            }
+        )
+        self.status_history = json.dumps(history)
+        self.status = new_status
+
+
+class BookingItem(db.Model):
+    __tablename__ = "booking_items"
+    # recommender đọc tiếp theo watermark booking_items.id: id không được dùng lại
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id = db.Column(db.Integer, primary_key=True)
+    booking_id = db.Column(db.Integer, db.ForeignKey("bookings.id"), nullable=False)
+    food_id = db.Column(db.Integer, db.ForeignKey("foods.id"), nullable=True)
+    food_name = db.Column(db.String(120), nullable=False)
+    price = db.Column(db.Integer, nullable=False)
+    quantity = db.Column(db.Integer, default=1, nullable=False)
+
+
+class AdminUser(TimestampMixin, db.Model):
+    __tablename__ = "admin_users"
+
+    id = db.Column(db.Integer, primary_key=True)
+    full_name = db.Column(db.String(120), nullable=False)
+    email = db.Column(db.String(120), unique=True, nullable=False)
+    password_hash = db.Column(db.String(255), nullable=False)
+    is_active = db.Column(db.Boolean, default=True)
+
+
+class ChatLog(TimestampMixin, db.Model):
+    __tablename__ = "chat_logs"
+
+    id = db.Column(db.Integer, primary_key=True)
+    session_id = db.Column(db.String(36), index=True, nullable=False)
+    role = db.Column(db.String(20), nullable=False)  # user / assistant
+    message = db.Column(db.Text, nullable=False)
+    food_snapshot = db.Column(db.Text, default="[]")
+
+
+class Tombstone(db.Model):
+    """Dấu vết bản ghi đã xóa cứng, để client đồng bộ delta biết cần xóa gì."""
+
+    __tablename__ = "tombstones"
+    __table_args__ = (db.Index("ix_tombstones_entity_deleted_at", "entity", "deleted_at"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(20), nullable=False)  # food / booking
+    entity_key = db.Column(db.String(64), nullable=False)  # Food.id hoặc Booking.code
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+class ArchivedBooking(db.Model):
+    """Đơn đã xong (completed/cancelled) được chuyển khỏi bảng nóng; chỉ đọc."""
+
+    __tablename__ = "booking_archive"
+    __table_args__ = (db.Index("ix_booking_archive_booking_datetime", "booking_datetime"),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    booking_id = db.Column(db.Integer, nullable=False)  # Booking.id lúc chuyển
+    code = db.Column(db.String(20), unique=True, nullable=False)
+    customer_name = db.Column(db.String(120), nullable=False)
+    customer_phone = db.Column(db.String(20), nullable=False)
+    customer_email = db.Column(db.String(120), nullable=False)
+    guests = db.Column(db.Integer, nullable=False)
+    booking_datetime = db.Column(db.DateTime, nullable=False)
+    note = db.Column(db.Text, default="")
+    status = db.Column(db.String(20), nullable=False)
+    total_amount = db.Column(db.Integer, default=0)
+    status_history = db.Column(db.Text, default="[]")
+    items = db.Column(db.Text, default="[]")  # JSON các booking_items
+    created_at = db.Column(db.DateTime, nullable=False)
+    updated_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def to_booking(self) -> Booking:
+        """Booking tạm (không gắn session) để dùng lại serialize_booking()."""
+        booking = Booking(
+            id=self.booking_id,
+            code=self.code,
+            customer_name=self.customer_name,
+            customer_phone=self.customer_phone,
+            customer_email=self.customer_email,
+            guests=self.guests,
+            booking_datetime=self.booking_datetime,
+            note=self.note,
+            status=self.status,
+            total_amount=self.total_amount,
+            status_history=self.status_history,
+            created_at=self.created_at,
+            updated_at=self.updated_at,
+        )
+        booking.items = [BookingItem(**item) for item in json.loads(self.items or "[]")]
+        return booking
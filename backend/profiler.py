@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, Optional
+
+from flask import Flask, current_app, g, request
+
+# ============================================
+# ON-DEMAND PROFILER
+# ============================================
+# Profile một phần request (PROFILER_SAMPLE_RATE) hoặc một request cụ thể
+# (header X-Profile, chỉ admin). Hai chế độ:
+#   - cprofile: cProfile cho thread của request, gộp thành pstats theo endpoint
+#   - sampling: thread phụ lấy mẫu stack (wall-clock) theo chu kỳ, gộp thành
+#     collapsed stacks dùng được với flamegraph.pl / speedscope
+# Khi tắt, before_request chỉ so sánh vài số float và đọc một header.
+#
+# Cấu hình (sampleRate/mode/intervalMs) đổi qua API được lưu vào cache dùng
+# chung; mỗi worker đọc lại tối đa một lần mỗi PROFILER_SYNC_SECONDS. Dữ liệu
+# profile thì vẫn nằm trong bộ nhớ của worker đã xử lý request.
+
+MODES = ("cprofile", "sampling")
+PROFILE_HEADER = "X-Profile"
+MAX_STACKS_PER_ENDPOINT = 5000
+CONFIG_KEY = ("profiler", "config")
+CONFIG_TTL = 30 * 24 * 3600
+
+
+class EndpointProfile:
+    def __init__(self):
+        self.requests = 0
+        self.stats: Optional[pstats.Stats] = None
+        self.stacks: Counter = Counter()
+        self.samples = 0
+
+
+class _ProfilerState:
+    def __init__(self, app: Flask):
+        self.sample_rate = float(app.config.get("PROFILER_SAMPLE_RATE", 0.0))
+        self.mode = app.config.get("PROFILER_MODE", "sampling")
+        self.interval = float(app.config.get("PROFILER_SAMPLE_INTERVAL_MS", 5)) / 1000
+        self.sync_interval = float(app.config.get("PROFILER_SYNC_SECONDS", 5))
+        self.synced_at = 0.0
+        self.shared = None  # Cache extension, None = cấu hình chỉ của process này
+        self.endpoints: Dict[str, EndpointProfile] = {}
+        self.lock = threading.Lock()
+
+    def endpoint(self, name: str) -> EndpointProfile:
+        with self.lock:
+            return self.endpoints.setdefault(name, EndpointProfile())
+
+    def reset(self) -> None:
+        with self.lock:
+            self.endpoints.clear()
+        self.synced_at = 0.0
+
+    def config(self) -> Dict:
+        return {"sampleRate": self.sample_rate, "mode": self.mode, "intervalMs": self.interval * 1000}
+
+    def sync(self) -> None:
+        """Lấy cấu hình mới nhất mà một worker khác đã ghi vào cache."""
+        self.synced_at = time.monotonic()
+        config = self.shared.get(*CONFIG_KEY)
+        if config:
+            self.sample_rate = config["sampleRate"]
+            self.mode = config["mode"]
+            self.interval = config["intervalMs"] / 1000
+
+    def summary(self) -> Dict:
+        return {
+            **self.config(),
+            "worker": os.getpid(),
+            "endpoints": {
+                name: {"requests": item.requests, "samples": item.samples}
+                for name, item in sorted(self.endpoints.items())
+            },
+        }
+
+
+class Profiler:
+    """Extension profiler; ``authorize`` quyết định ai được dùng header X-Profile,
+    ``cache`` (tùy chọn) để chia sẻ cấu hình giữa các worker."""
+
+    def __init__(self, app: Optional[Flask] = None, authorize: Optional[Callable[[], bool]] = None,
+                 cache=None):
+        self.authorize = authorize
+        if app is not None:
+            self.init_app(app, authorize, cache)
+
+    def init_app(self, app: Flask, authorize: Optional[Callable[[], bool]] = None, cache=None) -> None:
+        if authorize is not None:
+            self.authorize = authorize
+        state = _ProfilerState(app)
+        state.shared = cache
+        app.extensions["profiler"] = state
+        app.before_request(self._before_request)
+        app.teardown_request(self._teardown_request)
+
+    @staticmethod
+    def state() -> _ProfilerState:
+        return current_app.extensions["profiler"]
+
+    def _before_request(self):
+        state = self.state()
+        if state.shared is not None and time.monotonic() - state.synced_at >= state.sync_interval:
+            state.sync()
+        header = request.headers.get(PROFILE_HEADER)
+        if not header and (state.sample_rate <= 0 or random.random() >= state.sample_rate):
+            return None
+        if header and not (self.authorize and self.authorize()):
+            return None
+
+        mode = header if header in MODES else state.mode
+        if mode == "cprofile":
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:  # đã có profiler khác đang chạy trong process
+                return None
+            g._profiler = ("cprofile", profile)
+        else:
+            sampler = _StackSampler(threading.get_ident(), state.interval)
+            sampler.start()
+            g._profiler = ("sampling", sampler)
+        return None
+
+    def _teardown_request(self, _exc=None) -> None:
+        active = g.pop("_profiler", None)
+        if active is None:
+            return
+        mode, collector = active
+        state = self.state()
+        endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+        item = state.endpoint(endpoint)
+
+        if mode == "cprofile":
+            collector.disable()
+            with state.lock:
+                item.requests += 1
+                if item.stats is None:
+                    item.stats = pstats.Stats(collector)
+                else:
+                    item.stats.add(collector)
+        else:
+            stacks = collector.stop()
+            with state.lock:
+                item.requests += 1
+                for stack, count in stacks.items():
+                    if stack in item.stacks or len(item.stacks) < MAX_STACKS_PER_ENDPOINT:
+                        item.stacks[stack] += count
+                    item.samples += count
+
+
+class _StackSampler(threading.Thread):
+    """Lấy mẫu stack của một thread mỗi ``interval`` giây."""
+
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(daemon=True, name="mtp-profiler")
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                return
+            self.stacks[_collapse(frame)] += 1
+
+    def stop(self) -> Counter:
+        self._stop_event.set()
+        self.join()
+        return self.stacks
+
+
+def _collapse(frame) -> str:
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+        frame = frame.f_back
+    return ";".join(reversed(parts))
+
+
+# ============================================
+# EXPORT
+# ============================================
+def export_pstats(endpoint: Optional[str] = None) -> Optional[bytes]:
+    """File .prof (định dạng marshal của pstats), mở bằng snakeviz/pstats."""
+    state = current_app.extensions["profiler"]
+    with state.lock:
+        selected = [
+            item.stats for name, item in state.endpoints.items()
+            if item.stats is not None and (endpoint is None or name == endpoint)
+        ]
+        if not selected:
+            return None
+        merged = pstats.Stats()
+        merged.add(*selected)
+        return marshal.dumps(merged.stats)
+
+
+def export_collapsed(endpoint: Optional[str] = None) -> str:
+    """Collapsed stacks ("frame;frame;frame count" mỗi dòng) cho flamegraph."""
+    state = current_app.extensions["profiler"]
+    lines = []
+    with state.lock:
+        for name, item in sorted(state.endpoints.items()):
+            if endpoint is not None and name != endpoint:
+                continue
+            for stack, count in item.stacks.most_common():
+                lines.append(f"{name};{stack} {count}")
+    return "\n".join(lines) + ("\n" if lines else "")
+
+
+def export_text(endpoint: Optional[str] = None, limit: int = 40) -> str:
+    """Top hàm theo cumulative time, dạng text của pstats."""
+    data = export_pstats(endpoint)
+    if data is None:
+        return ""
+    stream = io.StringIO()
+    stats = pstats.Stats(_MarshalledStats(data), stream=stream)
+    stats.sort_stats("cumulative").print_stats(limit)
+    return stream.getvalue()
+
+
+class _MarshalledStats:
+    """Adapter để pstats.Stats nạp dict stats đã marshal mà không cần file."""
+
+    def __init__(self, data: bytes):
+        self.stats = marshal.loads(data)
+
+    def create_stats(self) -> None:
+        pass
+
+
+def configure(sample_rate: Optional[float] = None, mode: Optional[str] = None,
+              interval_ms: Optional[float] = None) -> None:
+    state = current_app.extensions["profiler"]
+    if sample_rate is not None:
+        if not 0 <= sample_rate <= 1:
+            raise ValueError("sampleRate phải nằm trong khoảng 0..1")
+        state.sample_rate = sample_rate
+    if mode is not None:
+        if mode not in MODES:
+            raise ValueError(f"mode phải là một trong {', '.join(MODES)}")
+        state.mode = mode
+    if interval_ms is not None:
+        if interval_ms <= 0:
+            raise ValueError("intervalMs phải lớn hơn 0")
+        state.interval = interval_ms / 1000
+    if state.shared is not None:
+        state.shared.set(*CONFIG_KEY, state.config(), ttl=CONFIG_TTL)
+        state.synced_at = time.monotonic()
+
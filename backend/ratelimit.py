@@ -0,0 +1,334 @@
+from __future__ import annotations
+
+import math
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+from flask import Flask, current_app, g, jsonify, request
+
+# ============================================
+# RATE LIMITING & LOAD SHEDDING
+# ============================================
+# Token bucket theo từng IP và theo từng route, cộng với giới hạn số request
+# đồng thời (load shedding) cho các endpoint ghi/AI công khai. Mọi kiểm tra
+# chạy trong before_request, trước khi view bắt đầu làm việc nặng
+# (check_password_hash, gọi Groq, ghi DB).
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+def parse_rate(value: Optional[str]) -> Optional[Tuple[float, float]]:
+    """Parse "10/minute" hoặc "10/minute;burst=20" thành (tokens/giây, capacity)."""
+    if not value:
+        return None
+    value = value.strip().lower()
+    if value in {"off", "none", "0"}:
+        return None
+
+    burst: Optional[float] = None
+    if ";" in value:
+        value, extra = value.split(";", 1)
+        key, _, raw = extra.partition("=")
+        if key.strip() != "burst":
+            raise ValueError(f"Tham số rate limit không hợp lệ: {extra}")
+        burst = float(raw)
+
+    amount, _, period = value.partition("/")
+    seconds = PERIODS.get(period.strip().rstrip("s"))
+    if not seconds:
+        raise ValueError(f"Đơn vị rate limit không hợp lệ: {value}")
+    count = float(amount)
+    if count <= 0:
+        return None
+    return count / seconds, burst if burst is not None else count
+
+
+def client_ip(trusted_proxies: int = 1) -> str:
+    """IP client thật, đọc X-Forwarded-For do nginx/Render thêm vào.
+
+    Chỉ tin ``trusted_proxies`` hop cuối cùng: các giá trị phía trước do
+    client tự gửi nên có thể bị giả mạo.
+    """
+    forwarded = request.headers.get("X-Forwarded-For", "")
+    if trusted_proxies > 0 and forwarded:
+        hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+        if hops:
+            return hops[max(len(hops) - trusted_proxies, 0)]
+    return request.remote_addr or "unknown"
+
+
+def request_client_ip() -> str:
+    """client_ip() theo RATELIMIT_TRUSTED_PROXIES của app hiện tại."""
+    state = current_app.extensions.get("ratelimit")
+    return client_ip(state.trusted_proxies if state else 1)
+
+
+# ============================================
+# STORES
+# ============================================
+class MemoryStore:
+    """Token bucket trong bộ nhớ của từng worker (mặc định)."""
+
+    def __init__(self, max_idle: float = 3600.0, prune_every: int = 1000):
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self._max_idle = max_idle
+        self._prune_every = prune_every
+        self._ops = 0
+
+    def consume(
+        self, key: str, rate: float, capacity: float, cost: float = 1.0, now: Optional[float] = None
+    ) -> Tuple[bool, float]:
+        now = time.time() if now is None else now
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            allowed, tokens, retry_after = _take(tokens, updated, now, rate, capacity, cost)
+            self._buckets[key] = (tokens, now)
+            self._ops += 1
+            if self._ops % self._prune_every == 0:
+                self._prune(now)
+        return allowed, retry_after
+
+    def _prune(self, now: float) -> None:
+        stale = [key for key, (_, updated) in self._buckets.items() if now - updated > self._max_idle]
+        for key in stale:
+            del self._buckets[key]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+class SQLiteStore:
+    """Token bucket dùng chung giữa các gunicorn worker qua một file SQLite.
+
+    Mỗi lần consume là một transaction ``BEGIN IMMEDIATE`` ngắn nên các
+    worker trên cùng máy thấy cùng một bucket.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_buckets ("
+                "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # Connection không an toàn khi fork: mở lại nếu pid đã đổi
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def consume(
+        self, key: str, rate: float, capacity: float, cost: float = 1.0, now: Optional[float] = None
+    ) -> Tuple[bool, float]:
+        now = time.time() if now is None else now
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT tokens, updated FROM rate_buckets WHERE key = ?", (key,)
+            ).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            allowed, tokens, retry_after = _take(tokens, updated, now, rate, capacity, cost)
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                (key, tokens, now),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return allowed, retry_after
+
+    def reset(self) -> None:
+        # Chỉ bỏ connection của process; bucket trong file là của mọi worker,
+        # xóa đi (mỗi lần fork/recycle) sẽ cấp lại quota cho mọi client
+        self._local = threading.local()
+
+
+def _take(
+    tokens: float, updated: float, now: float, rate: float, capacity: float, cost: float
+) -> Tuple[bool, float, float]:
+    tokens = min(capacity, tokens + max(now - updated, 0.0) * rate)
+    if tokens >= cost:
+        return True, tokens - cost, 0.0
+    return False, tokens, (cost - tokens) / rate
+
+
+def create_store(url: str):
+    """``memory://`` (mặc định) hoặc ``sqlite:///path/to/ratelimit.db``."""
+    if not url or url.startswith("memory://"):
+        return MemoryStore()
+    if url.startswith("sqlite:///"):
+        return SQLiteStore(url[len("sqlite:///"):])
+    raise ValueError(f"RATELIMIT_STORAGE_URL không được hỗ trợ: {url}")
+
+
+# ============================================
+# CONCURRENCY LIMIT (LOAD SHEDDING)
+# ============================================
+class ConcurrencyLimiter:
+    """Đếm số request đang chạy của một route trong worker hiện tại."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.in_flight >= self.limit:
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            self.in_flight = max(self.in_flight - 1, 0)
+
+
+# ============================================
+# FLASK EXTENSION
+# ============================================
+class _LimiterState:
+    """Trạng thái rate limit của một Flask app (store, rule đã resolve, slot)."""
+
+    def __init__(self, app: Flask):
+        self.app = app
+        self.enabled = _as_bool(_setting(app, "RATELIMIT_ENABLED", "true"))
+        self.store = create_store(_setting(app, "RATELIMIT_STORAGE_URL", "memory://"))
+        self.trusted_proxies = int(_setting(app, "RATELIMIT_TRUSTED_PROXIES", "1"))
+        self.shed_retry_after = int(_setting(app, "RATELIMIT_SHED_RETRY_AFTER", "1"))
+        self.rules: Dict[str, Dict] = {}
+        self.concurrency: Dict[str, ConcurrencyLimiter] = {}
+
+    def reset(self) -> None:
+        self.store.reset()
+        self.rules.clear()
+        self.concurrency.clear()
+
+
+class RateLimiter:
+    """Gắn rate limit vào view bằng ``@limiter.limit("bookings", ...)``.
+
+    Giá trị mặc định trong decorator có thể ghi đè bằng config/env:
+    ``RATELIMIT_<NAME>_PER_IP``, ``RATELIMIT_<NAME>_PER_ROUTE``,
+    ``RATELIMIT_<NAME>_CONCURRENCY``.
+    """
+
+    def __init__(self, app: Optional[Flask] = None):
+        self._rules: Dict[str, Dict] = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app: Flask) -> None:
+        app.extensions["ratelimit"] = _LimiterState(app)
+        app.before_request(self._before_request)
+        app.teardown_request(self._teardown_request)
+
+    def limit(
+        self,
+        name: str,
+        per_ip: Optional[str] = None,
+        per_route: Optional[str] = None,
+        concurrency: Optional[int] = None,
+    ) -> Callable:
+        def decorator(func):
+            self._rules[name] = {
+                "per_ip": per_ip,
+                "per_route": per_route,
+                "concurrency": concurrency,
+            }
+            func._ratelimit_name = name
+            return func
+
+        return decorator
+
+    @staticmethod
+    def state() -> _LimiterState:
+        return current_app.extensions["ratelimit"]
+
+    def reset(self) -> None:
+        self.state().reset()
+
+    def _rule(self, state: _LimiterState, name: str) -> Dict:
+        """Rule sau khi áp dụng override từ config, được cache theo tên."""
+        resolved = state.rules.get(name)
+        if resolved is None:
+            rule = self._rules[name]
+            prefix = f"RATELIMIT_{name.upper()}"
+            concurrency = _setting(state.app, f"{prefix}_CONCURRENCY", rule["concurrency"])
+            resolved = state.rules[name] = {
+                "per_ip": parse_rate(_setting(state.app, f"{prefix}_PER_IP", rule["per_ip"])),
+                "per_route": parse_rate(_setting(state.app, f"{prefix}_PER_ROUTE", rule["per_route"])),
+                "concurrency": int(concurrency) if concurrency else 0,
+            }
+        return resolved
+
+    def _before_request(self):
+        state = self.state()
+        if not state.enabled or request.method == "OPTIONS" or request.endpoint is None:
+            return None
+        view = state.app.view_functions.get(request.endpoint)
+        name = getattr(view, "_ratelimit_name", None)
+        if name is None:
+            return None
+
+        rule = self._rule(state, name)
+        checks = []
+        if rule["per_ip"]:
+            checks.append((f"{name}:ip:{client_ip(state.trusted_proxies)}", rule["per_ip"]))
+        if rule["per_route"]:
+            checks.append((f"{name}:route", rule["per_route"]))
+        for key, (rate, capacity) in checks:
+            allowed, retry_after = state.store.consume(key, rate, capacity)
+            if not allowed:
+                return _reject(429, "Quá nhiều yêu cầu, vui lòng thử lại sau", retry_after)
+
+        if rule["concurrency"]:
+            limiter = state.concurrency.get(name)
+            if limiter is None:
+                limiter = state.concurrency.setdefault(name, ConcurrencyLimiter(rule["concurrency"]))
+            if not limiter.try_acquire():
+                return _reject(503, "Hệ thống đang quá tải, vui lòng thử lại sau", state.shed_retry_after)
+            g._ratelimit_slot = limiter
+        return None
+
+    @staticmethod
+    def _teardown_request(_exc=None) -> None:
+        limiter = g.pop("_ratelimit_slot", None)
+        if limiter is not None:
+            limiter.release()
+
+
+def _reject(status: int, message: str, retry_after: float):
+    response = jsonify({"error": message})
+    response.status_code = status
+    response.headers["Retry-After"] = str(max(int(math.ceil(retry_after)), 1))
+    return response
+
+
+def _setting(app: Flask, key: str, default=None):
+    if key in app.config:
+        return app.config[key]
+    return os.getenv(key, default)
+
+
+def _as_bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in {"1", "true", "yes", "on"}
+
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import heapq
+import logging
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from itertools import groupby
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from flask import Flask, current_app
+
+logger = logging.getLogger("mtp.recommendations")
+
+# ============================================
+# RECOMMENDATIONS ("HAY ĐƯỢC ĐẶT CÙNG")
+# ============================================
+# Ma trận đồng xuất hiện thưa giữa các món, dựng từ booking_items và giữ
+# trong bộ nhớ mỗi worker: pairs[a][b] = tổng số lượng món b trong các đơn
+# có món a, nhân hệ số suy giảm theo tuổi đơn (mất một nửa sau mỗi half-life).
+# Trọng số lưu theo đơn vị "đã chuẩn hóa thời gian" (q * 2^((t - origin) / H))
+# nên thời gian trôi không làm đổi thứ hạng, không cần nhân lại cả ma trận.
+#
+# Cập nhật:
+#   - create_booking gọi record() sau commit: đơn của worker này có ngay
+#   - đọc gọi refresh(): mỗi RECOMMENDATIONS_REFRESH_SECONDS nạp các
+#     booking_items có id lớn hơn watermark (đơn từ worker khác)
+#   - mỗi RECOMMENDATIONS_REBUILD_SECONDS dựng lại từ đầu trên thread nền
+#     (đơn bị xóa, id commit lệch thứ tự, đặt lại origin)
+#   - lần dựng đầu cũng chạy trên thread nền: start() lúc worker khởi động
+#     (post_fork) hoặc request đọc đầu tiên; trong lúc chờ, ma trận rỗng nên
+#     các view trả danh sách dự phòng (món mới nhất trong menu)
+
+# (item_id, booking_id, food_id, quantity, created_at), sắp theo booking_id, item_id
+ItemRow = Tuple[int, int, Optional[int], int, datetime]
+Loader = Callable[[int], Iterable[ItemRow]]
+
+
+class CoOccurrence:
+    """Ma trận đồng xuất hiện món-món dạng dict-of-dict."""
+
+    def __init__(self, half_life_seconds: float = 30 * 86400, max_neighbors: int = 100,
+                 origin: Optional[float] = None):
+        self.half_life = float(half_life_seconds)
+        self.max_neighbors = max_neighbors
+        self.origin = time.time() if origin is None else origin
+        self.pairs: Dict[int, Dict[int, float]] = {}
+        self.totals: Dict[int, float] = {}
+        self.watermark = 0  # id booking_item lớn nhất đã nạp từ DB
+        self.orders = 0
+        # Đơn record() trước khi refresh() kịp thấy: booking_id -> item id lớn nhất
+        self._recorded: Dict[int, int] = {}
+        self._top: Dict[int, List[int]] = {}
+        self._popular: Optional[List[int]] = None
+        self.lock = threading.Lock()
+
+    def weight(self, created: datetime) -> float:
+        return 2.0 ** ((created.timestamp() - self.origin) / self.half_life)
+
+    def _add_order(self, items: Sequence[Tuple[int, int]], created: datetime) -> None:
+        quantities: Dict[int, int] = {}
+        for food_id, quantity in items:
+            if food_id is not None:
+                quantities[food_id] = quantities.get(food_id, 0) + quantity
+        if not quantities:
+            return
+        decay = self.weight(created)
+        self.orders += 1
+        self._popular = None
+        for food_id, quantity in quantities.items():
+            self.totals[food_id] = self.totals.get(food_id, 0.0) + quantity * decay
+            if len(quantities) == 1:
+                continue
+            row = self.pairs.setdefault(food_id, {})
+            for other_id, other_quantity in quantities.items():
+                if other_id != food_id:
+                    row[other_id] = row.get(other_id, 0.0) + other_quantity * decay
+            if len(row) > 2 * self.max_neighbors:
+                # Chỉ giữ các món nặng nhất để bộ nhớ không tăng theo số cặp
+                keep = heapq.nlargest(self.max_neighbors, row.items(), key=lambda pair: pair[1])
+                self.pairs[food_id] = row = dict(keep)
+            self._top.pop(food_id, None)
+
+    def load(self, rows: Iterable[ItemRow]) -> int:
+        """Nạp các dòng booking_items (sắp theo booking_id); trả về số dòng."""
+        count = 0
+        watermark = self.watermark
+        for booking_id, group in groupby(rows, key=lambda row: row[1]):
+            group = list(group)
+            count += len(group)
+            watermark = max(watermark, max(row[0] for row in group))
+            with self.lock:
+                if booking_id in self._recorded:
+                    continue
+                self._add_order([(row[2], row[3]) for row in group], group[0][4])
+        with self.lock:
+            self.watermark = watermark
+            self._recorded = {
+                booking_id: item_id for booking_id, item_id in self._recorded.items() if item_id > watermark
+            }
+        return count
+
+    def record(self, booking_id: int, created: datetime, items: Sequence[Tuple[int, int, int]]) -> None:
+        """Thêm một đơn vừa commit; ``items`` là (item_id, food_id, quantity)."""
+        if not items:
+            return
+        last_item = max(item[0] for item in items)
+        with self.lock:
+            if last_item <= self.watermark:
+                return  # refresh() đã nạp đơn này
+            self._recorded[booking_id] = last_item
+            self._add_order([(food_id, quantity) for _, food_id, quantity in items], created)
+
+    def for_food(self, food_id: int, limit: int, exclude: Iterable[int] = ()) -> List[int]:
+        """ID các món hay được đặt cùng ``food_id``, nặng nhất trước."""
+        with self.lock:
+            top = self._top.get(food_id)
+            if top is None:
+                row = self.pairs.get(food_id, {})
+                top = [other for other, _ in sorted(row.items(), key=lambda pair: (-pair[1], pair[0]))]
+                self._top[food_id] = top = top[: self.max_neighbors]
+        skip = set(exclude)
+        return [other for other in top if other not in skip][:limit]
+
+    def for_cart(self, food_ids: Sequence[int], limit: int) -> List[int]:
+        """Gợi ý cho cả giỏ: cộng trọng số các hàng, bỏ món đã có trong giỏ."""
+        if len(food_ids) == 1:
+            return self.for_food(food_ids[0], limit, exclude=food_ids)
+        scores: Counter = Counter()
+        with self.lock:
+            for food_id in food_ids:
+                scores.update(self.pairs.get(food_id, {}))
+        for food_id in food_ids:
+            scores.pop(food_id, None)
+        return [food_id for food_id, _ in heapq.nlargest(limit, scores.items(), key=lambda pair: (pair[1], -pair[0]))]
+
+    def popular(self, limit: int, among: Optional[Iterable[int]] = None) -> List[int]:
+        """Món được đặt nhiều nhất (đã tính suy giảm), có thể giới hạn trong ``among``."""
+        with self.lock:
+            ranked = self._popular
+            if ranked is None:
+                ranked = self._popular = sorted(self.totals, key=lambda food_id: (-self.totals[food_id], food_id))
+        if among is None:
+            return ranked[:limit]
+        allowed = set(among)
+        return [food_id for food_id in ranked if food_id in allowed][:limit]
+
+
+class _RecommenderState:
+    def __init__(self, app: Flask):
+        config = app.config
+        self.half_life = float(config["RECOMMENDATIONS_HALF_LIFE_DAYS"]) * 86400
+        self.max_neighbors = int(config["RECOMMENDATIONS_MAX_NEIGHBORS"])
+        self.refresh_interval = float(config["RECOMMENDATIONS_REFRESH_SECONDS"])
+        self.rebuild_interval = float(config["RECOMMENDATIONS_REBUILD_SECONDS"])
+        self.reset()
+
+    def reset(self) -> None:
+        self.engine = self.new_engine()
+        self.next_refresh = 0.0
+        self.next_rebuild = 0.0
+        self.refreshing = threading.Lock()
+        self.ready = threading.Event()  # đã dựng xong ma trận lần đầu
+
+    def new_engine(self) -> CoOccurrence:
+        return CoOccurrence(self.half_life, self.max_neighbors)
+
+
+class Recommender:
+    """Extension gợi ý món; ``loader(after_item_id)`` đọc booking_items từ DB."""
+
+    def __init__(self, app: Optional[Flask] = None, loader: Optional[Loader] = None):
+        self.loader = loader
+        if app is not None:
+            self.init_app(app, loader)
+
+    def init_app(self, app: Flask, loader: Optional[Loader] = None) -> None:
+        if loader is not None:
+            self.loader = loader
+        app.config.setdefault("RECOMMENDATIONS_HALF_LIFE_DAYS", 30)
+        app.config.setdefault("RECOMMENDATIONS_MAX_NEIGHBORS", 100)
+        app.config.setdefault("RECOMMENDATIONS_REFRESH_SECONDS", 30)
+        app.config.setdefault("RECOMMENDATIONS_REBUILD_SECONDS", 3600)
+        app.extensions["recommendations"] = _RecommenderState(app)
+
+    @staticmethod
+    def state() -> _RecommenderState:
+        return current_app.extensions["recommendations"]
+
+    def engine(self) -> CoOccurrence:
+        """Ma trận hiện tại, nạp thêm đơn mới nếu đã đến hạn."""
+        state = self.state()
+        now = time.monotonic()
+        if now >= state.next_refresh and self.loader is not None:
+            self.refresh(state, now)
+        return state.engine
+
+    def start(self, app: Flask) -> None:
+        """Dựng ma trận lần đầu trên thread nền, không đợi request đầu tiên."""
+        state = app.extensions["recommendations"]
+        if self.loader is not None and state.refreshing.acquire(blocking=False):
+            self._spawn_rebuild(app, state, time.monotonic())
+
+    def refresh(self, state: _RecommenderState, now: float) -> None:
+        # Chỉ một thread nạp; thread khác dùng tạm ma trận hiện có
+        if not state.refreshing.acquire(blocking=False):
+            return
+        if now < state.next_rebuild:
+            try:
+                state.engine.load(self.loader(state.engine.watermark))
+            except Exception:
+                logger.exception("Không nạp được đơn mới cho gợi ý")
+            finally:
+                state.next_refresh = now + state.refresh_interval
+                state.refreshing.release()
+        else:
+            # Dựng lại (kể cả lần đầu) trên thread nền, request vẫn dùng ma trận cũ
+            self._spawn_rebuild(current_app._get_current_object(), state, now)
+
+    def _spawn_rebuild(self, app: Flask, state: _RecommenderState, now: float) -> None:
+        threading.Thread(
+            target=self._rebuild_in_context, args=(app, state, now), daemon=True, name="mtp-recommender"
+        ).start()
+
+    def _rebuild_in_context(self, app: Flask, state: _RecommenderState, now: float) -> None:
+        with app.app_context():
+            self._rebuild(state, now)
+
+    def _rebuild(self, state: _RecommenderState, now: float) -> None:
+        """Dựng ma trận mới rồi thay; gọi khi đang giữ ``state.refreshing``."""
+        try:
+            engine = state.new_engine()
+            engine.load(self.loader(0))
+            # Đơn commit trong lúc dựng lại: nạp nốt trước khi thay ma trận
+            engine.load(self.loader(engine.watermark))
+            state.engine = engine
+            state.ready.set()
+            state.next_rebuild = now + state.rebuild_interval
+            state.next_refresh = time.monotonic() + state.refresh_interval
+        except Exception:
+            logger.exception("Không dựng được ma trận gợi ý")
+            state.next_refresh = time.monotonic() + state.refresh_interval
+        finally:
+            state.refreshing.release()
+
+    def record(self, booking_id: int, created: datetime, items: Sequence[Tuple[int, int, int]]) -> None:
+        self.state().engine.record(booking_id, created, items)
+
+    def for_food(self, food_id: int, limit: int) -> List[int]:
+        return self.engine().for_food(food_id, limit)
+
+    def for_cart(self, food_ids: Sequence[int], limit: int) -> List[int]:
+        return self.engine().for_cart(food_ids, limit)
+
+    def popular(self, limit: int, among: Optional[Iterable[int]] = None) -> List[int]:
+        return self.engine().popular(limit, among)
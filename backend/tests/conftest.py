@@ -0,0 +1,81 @@
+import pytest
+from flask_jwt_extended import create_access_token
+
+from app import create_app, db, AdminUser, Food
+
+
+@pytest.fixture()
+def app():
+    app = create_app(
+        {
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+            "JWT_SECRET_KEY": "test-secret",
+            "CACHE_URL": "memory://",
+        }
+    )
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture()
+def menu():
+    """Các món có sẵn trong DB khi dùng ``client``; file test cần menu khác thì ghi đè fixture này."""
+    return [
+        Food(
+            name="Test Food",
+            price=120000,
+            image="https://example.com/image.jpg",
+            description="Delicious test food",
+        )
+    ]
+
+
+@pytest.fixture()
+def client(app, menu):
+    # Rate limit có test riêng (test_ratelimit.py); ở đây tắt để test đặt bàn liên tục
+    app.extensions["ratelimit"].enabled = False
+    db.session.add_all(menu)
+    db.session.commit()
+    with app.test_client() as client:
+        yield client
+
+
+@pytest.fixture()
+def admin_headers(app):
+    user = AdminUser(email="admin@example.com", full_name="Admin", password_hash="x")
+    db.session.add(user)
+    db.session.commit()
+    return {"Authorization": f"Bearer {create_access_token(identity=str(user.id))}"}
+
+
+@pytest.fixture()
+def book(request, client):
+    """Tạo booking qua API, trả về mã đặt bàn.
+
+    ``book((food_id, quantity), ..., date_time=..., statuses=("confirmed", ...))``;
+    không truyền món thì đặt một phần món id=1. ``statuses`` được PUT lần lượt bằng
+    tài khoản admin.
+    """
+
+    def create(*orders, date_time="2099-12-31T18:00:00", statuses=()):
+        payload = {
+            "customerInfo": {"name": "Nguyen Van A", "phone": "0901234567", "email": "a@example.com"},
+            "booking": {"guests": 2, "dateTime": date_time},
+            "orders": [
+                {"foodId": food_id, "quantity": quantity} for food_id, quantity in (orders or [(1, 1)])
+            ],
+        }
+        response = client.post("/api/bookings", json=payload)
+        assert response.status_code == 201
+        code = response.get_json()["id"]
+        if statuses:
+            headers = request.getfixturevalue("admin_headers")
+            for status in statuses:
+                assert client.put(f"/api/bookings/{code}", json={"status": status}, headers=headers).status_code == 200
+        return code
+
+    return create
@@ -1,34 +1,3 @@
-import pytest
-
-from app import app, db, Food
-
-
-@pytest.fixture()
-def client():
-    app.config.update(
-        TESTING=True,
-        SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
-        JWT_SECRET_KEY="test-secret",
-    )
-    with app.app_context():
-        db.create_all()
-        db.session.add(
-            Food(
-                name="Test Food",
-                price=120000,
-                image="https://example.com/image.jpg",
-                description="Delicious test food",
-            )
-        )
-        db.session.commit()
-
-    with app.test_client() as client:
-        yield client
-
-    with app.app_context():
-        db.drop_all()
-
-
 def test_get_foods(client):
     response = client.get("/api/foods")
     assert response.status_code == 200
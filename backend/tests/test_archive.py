@@ -0,0 +1,52 @@
+from datetime import datetime
+
+import archive
+from app import db, Booking, BookingItem, Tombstone
+
+
+def test_archive_moves_finished_bookings_in_batches(app, client, book):
+    done = [book((1, 2), date_time="2020-01-01T18:00:00", statuses=("confirmed", "completed")) for _ in range(3)]
+    cancelled = book((1, 2), date_time="2020-01-02T18:00:00", statuses=("cancelled",))
+    old_pending = book((1, 2), date_time="2020-01-03T18:00:00")
+    recent = book((1, 2), date_time="2099-12-31T18:00:00", statuses=("confirmed", "completed"))
+
+    before = {code: client.get(f"/api/bookings/{code}").get_json() for code in done}
+    stats_before = client.get("/api/stats").get_json()
+
+    moved = archive.archive_bookings(datetime(2021, 1, 1), batch_size=2)
+    assert moved == 4
+    assert archive.table_sizes() == {"bookings": 2, "booking_items": 2, "booking_archive": 4}
+    assert {code for (code,) in db.session.query(Booking.code)} == {old_pending, recent}
+    assert db.session.query(BookingItem).count() == 2
+
+    # Tra cứu theo mã rơi xuống archive, cùng nội dung như trước khi chuyển
+    for code, data in before.items():
+        assert client.get(f"/api/bookings/{code}").get_json() == data
+    assert client.get(f"/api/bookings/{cancelled}").get_json()["status"] == "cancelled"
+    assert client.get("/api/bookings/BKMISSING").status_code == 404
+
+    stats = client.get("/api/stats").get_json()
+    assert stats["totalBookings"] == stats_before["totalBookings"] == 6
+    assert stats["totalRevenue"] == stats_before["totalRevenue"] == 4 * 240000
+    assert db.session.query(Tombstone).filter_by(entity="booking").count() == 4
+
+
+def test_archive_cli(app, client, book):
+    book((1, 2), date_time="2020-01-01T18:00:00", statuses=("cancelled",))
+    result = app.test_cli_runner().invoke(args=["archive-bookings", "--days", "30"])
+    assert "Đã chuyển 1 đơn" in result.output
+    assert "booking_archive=1" in result.output
+
+
+def test_archive_again_after_new_bookings(app, client, book):
+    first = book((1, 2), date_time="2020-01-01T18:00:00", statuses=("cancelled",))
+    archived_id = db.session.scalar(db.select(Booking.id).filter_by(code=first))
+    assert archive.archive_bookings(datetime(2021, 1, 1)) == 1
+
+    # Bảng nóng đã rỗng: id cũ không được cấp lại cho đơn mới
+    second = book((1, 2), date_time="2020-01-01T19:00:00", statuses=("cancelled",))
+    assert db.session.scalar(db.select(Booking.id).filter_by(code=second)) > archived_id
+    assert archive.archive_bookings(datetime(2021, 1, 1)) == 1
+    assert archive.table_sizes()["booking_archive"] == 2
+    assert client.get(f"/api/bookings/{first}").get_json()["status"] == "cancelled"
+    assert client.get(f"/api/bookings/{second}").get_json()["status"] == "cancelled"
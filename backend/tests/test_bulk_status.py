@@ -0,0 +1,63 @@
+from sqlalchemy import event
+
+from app import db, Booking
+
+
+def test_bulk_status_by_codes(app, client, admin_headers, book):
+    first, second, third = book(), book(), book()
+    client.put(f"/api/bookings/{third}", json={"status": "completed"}, headers=admin_headers)
+    broker = app.extensions["events"]["broker"]
+    seq = broker.last_seq
+
+    updates = []
+    listener = lambda conn, cursor, statement, *args: updates.append(statement)
+    event.listen(db.engine, "before_cursor_execute", listener)
+    response = client.post(
+        "/api/bookings/bulk-status",
+        json={"status": "confirmed", "codes": [first, second, third, "BKMISSING"], "note": "Xác nhận tối nay"},
+        headers=admin_headers,
+    )
+    event.remove(db.engine, "before_cursor_execute", listener)
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["updated"] == 2
+    assert data["results"] == {
+        first: "updated", second: "updated", third: "invalid_transition", "BKMISSING": "not_found",
+    }
+    assert len([s for s in updates if s.lstrip().startswith("UPDATE bookings")]) == 1
+
+    booking = client.get(f"/api/bookings/{first}").get_json()
+    assert booking["status"] == "confirmed"
+    assert [entry["status"] for entry in booking["statusTimeline"]] == ["pending", "confirmed"]
+    assert booking["statusTimeline"][-1]["note"] == "Xác nhận tối nay"
+    assert [item.data["id"] for item in broker.since(seq)] == [first, second]
+
+    again = client.post("/api/bookings/bulk-status", json={"status": "confirmed", "codes": [first]}, headers=admin_headers)
+    assert again.get_json()["results"] == {first: "unchanged"}
+
+
+def test_bulk_status_by_filter(client, admin_headers, book):
+    early = book(date_time="2099-12-31T18:00:00")
+    late = book(date_time="2099-12-31T23:00:00")
+    client.post("/api/bookings/bulk-status", json={"status": "confirmed", "codes": [early, late]}, headers=admin_headers)
+
+    response = client.post(
+        "/api/bookings/bulk-status",
+        json={"status": "completed", "filter": {"status": "confirmed", "before": "2099-12-31T22:00:00"}},
+        headers=admin_headers,
+    )
+    assert response.get_json()["results"] == {early: "updated"}
+    assert db.session.scalar(db.select(Booking.status).filter_by(code=late)) == "confirmed"
+
+
+def test_bulk_status_validation(client, admin_headers, book):
+    code = book()
+    assert client.post("/api/bookings/bulk-status", json={"status": "confirmed", "codes": [code]}).status_code == 401
+    for payload in (
+        {"status": "confirmed"},
+        {"status": "confirmed", "codes": [code], "filter": {}},
+        {"status": "done", "codes": [code]},
+        {"status": "confirmed", "codes": []},
+    ):
+        assert client.post("/api/bookings/bulk-status", json=payload, headers=admin_headers).status_code == 400
@@ -0,0 +1,98 @@
+import time
+
+import pytest
+
+from app import db, Food
+from cache import DictClient, MemoryBackend, NetworkBackend, SQLiteBackend
+
+
+@pytest.fixture(params=["memory", "sqlite", "network"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryBackend(max_bytes=1024)
+    if request.param == "sqlite":
+        return SQLiteBackend(str(tmp_path / "cache.db"), max_bytes=1024)
+    return NetworkBackend(DictClient())
+
+
+def test_backend_versions_and_ttl(backend):
+    backend.set("stats", "summary", b"old", ttl=60)
+    backend.set("menu", "all", b"menu", ttl=60)
+    assert backend.get("stats", "summary") == b"old"
+
+    # Tăng version chỉ bỏ namespace đó
+    backend.bump("stats")
+    assert backend.get("stats", "summary") is None
+    assert backend.get("menu", "all") == b"menu"
+
+    backend.set("stats", "summary", b"new", ttl=0.05)
+    assert backend.get("stats", "summary") == b"new"
+    time.sleep(1.1 if isinstance(backend, NetworkBackend) else 0.1)
+    assert backend.get("stats", "summary") is None
+
+    backend.set("menu", "other", b"x", ttl=60)
+    backend.delete("menu", "other")
+    assert backend.get("menu", "other") is None
+
+
+def test_set_after_invalidate_keeps_stale_value_out(backend):
+    # Worker A miss và bắt đầu tính lại; worker B ghi DB rồi invalidate
+    version, value = backend.lookup("stats", "summary")
+    assert value is None
+    backend.bump("stats")
+    backend.set("stats", "summary", b"stale", ttl=60, version=version)
+    assert backend.get("stats", "summary") is None
+
+    version, _ = backend.lookup("stats", "summary")
+    backend.set("stats", "summary", b"fresh", ttl=60, version=version)
+    assert backend.lookup("stats", "summary") == (version, b"fresh")
+
+
+def test_sqlite_invalidation_reaches_other_workers(tmp_path):
+    path = str(tmp_path / "cache.db")
+    worker_a, worker_b = SQLiteBackend(path), SQLiteBackend(path)
+    worker_a.set("stats", "summary", b"1", ttl=60)
+    assert worker_b.get("stats", "summary") == b"1"
+
+    worker_b.bump("stats")
+    assert worker_a.get("stats", "summary") is None
+
+
+def test_eviction_keeps_size_bounded(tmp_path):
+    memory = MemoryBackend(max_bytes=1000)
+    evicted = sum(memory.set("chat", str(i), b"x" * 100, ttl=60) for i in range(20))
+    assert evicted == 10 and memory.info()["bytes"] <= 1000
+    assert memory.get("chat", "0") is None and memory.get("chat", "19") == b"x" * 100
+
+    sqlite = SQLiteBackend(str(tmp_path / "cache.db"), max_bytes=1000)
+    evicted = sum(sqlite.set("chat", str(i), b"x" * 100, ttl=60) for i in range(64))
+    assert evicted > 0 and sqlite.info()["bytes"] <= 1000 + 100 * SQLiteBackend.EVICT_CHECK_EVERY
+
+
+def test_stats_cached_until_write_invalidates(client, admin_headers, book):
+    assert client.get("/api/stats").get_json()["totalBookings"] == 0
+    # Ghi thẳng vào DB (không qua API) thì cache vẫn trả giá trị cũ
+    db.session.add(Food(name="Hidden", price=1000, image="https://example.com/b.jpg"))
+    db.session.commit()
+    assert client.get("/api/stats").get_json()["totalFoods"] == 1
+
+    book()
+    stats = client.get("/api/stats").get_json()
+    assert stats["totalBookings"] == 1 and stats["totalFoods"] == 2
+
+    # Principal admin được cache sau lần đầu
+    assert client.get("/api/admin/cache", headers=admin_headers).status_code == 200
+    report = client.get("/api/admin/cache", headers=admin_headers).get_json()
+    assert report["backend"]["backend"] == "memory"
+    assert report["namespaces"]["admin"]["hit"] == 1
+    assert report["namespaces"]["stats"] == {
+        "hit": 1, "miss": 2, "set": 2, "invalidation": 1, "hitRatio": 0.333,
+    }
+
+
+def test_admin_registration_invalidates_principals(app, client):
+    response = client.post(
+        "/api/auth/register", json={"fullName": "Admin", "email": "admin@example.com", "password": "secret123"}
+    )
+    assert response.status_code == 201
+    assert app.extensions["cache"].counters[("admin", "invalidation")] == 1
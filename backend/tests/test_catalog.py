@@ -0,0 +1,62 @@
+import pytest
+from sqlalchemy import event
+
+from app import db, Food, recommender
+
+
+@pytest.fixture()
+def menu():
+    return [Food(name=f"Món {n}", price=100000 + n, image="https://example.com/x.jpg") for n in range(1, 6)]
+
+
+@pytest.fixture()
+def count_queries():
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(db.engine, "before_cursor_execute", record)
+
+
+def test_ids_lookup_keeps_order_and_uses_catalog(client, count_queries):
+    db.session.get(Food, 4).is_active = False
+    db.session.commit()
+    client.get("/api/foods")  # dựng catalog
+
+    count_queries.clear()
+    data = client.get("/api/foods?ids=3,1,3").get_json()
+    assert [item["id"] for item in data] == [3, 1]
+    assert len(count_queries) == 1  # chỉ query catalog_version()
+
+    # Món đã ẩn hoặc không tồn tại không có trong catalog: thêm đúng một query
+    count_queries.clear()
+    assert [item["id"] for item in client.get("/api/foods?ids=4,99,2").get_json()] == [4, 2]
+    assert len(count_queries) == 2
+
+    assert client.get("/api/foods?ids=1,abc").status_code == 400
+    assert client.get("/api/foods?ids=" + ",".join(map(str, range(1, 200)))).status_code == 400
+
+
+def test_detail_returns_often_ordered_with(app, client, book):
+    book((1, 1), (2, 1), (3, 1))
+    book((1, 1), (3, 1))
+    book((2, 1), (5, 1))
+    recommender.start(app)
+    assert app.extensions["recommendations"].ready.wait(5)
+
+    data = client.get("/api/foods/1/detail").get_json()
+    assert data["food"]["id"] == 1
+    assert [item["id"] for item in data["oftenOrderedWith"]] == [3, 2, 5]
+
+    filled = client.get("/api/foods/4/detail?limit=2").get_json()["oftenOrderedWith"]
+    assert len(filled) == 2 and 4 not in {item["id"] for item in filled}
+    assert client.get("/api/foods/999/detail").status_code == 404
+
+
+def test_booking_hydrates_all_foods_in_one_query(client, count_queries, book):
+    book((1, 1), (2, 1), (3, 1), (4, 1), (5, 1))
+    food_selects = [s for s in count_queries if s.lstrip().startswith("SELECT") and "FROM foods" in s]
+    assert len(food_selects) == 1
@@ -0,0 +1,59 @@
+import gzip
+import json
+
+import pytest
+
+from app import db, Food
+from compression import choose_encoding
+
+
+@pytest.fixture()
+def menu():
+    return [
+        Food(name=f"Món {i}", price=100000 + i, image="https://example.com/a.jpg",
+             description="Món ăn đặc biệt của nhà hàng " * 3)
+        for i in range(30)
+    ]
+
+
+def test_choose_encoding():
+    assert choose_encoding("gzip, deflate, br") in {"br", "gzip"}
+    assert choose_encoding("gzip;q=0.5, identity") == "gzip"
+    assert choose_encoding("br;q=0, gzip;q=0") is None
+    assert choose_encoding(None) is None
+
+
+def test_menu_is_compressed_once_and_reused(app, client):
+    plain = client.get("/api/foods")
+    assert "Content-Encoding" not in plain.headers
+
+    first = client.get("/api/foods", headers={"Accept-Encoding": "gzip"})
+    assert first.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in first.headers["Vary"]
+    assert json.loads(gzip.decompress(first.data)) == plain.get_json()
+
+    cached = app.extensions["catalog"].payload
+    client.get("/api/foods", headers={"Accept-Encoding": "gzip"})
+    assert app.extensions["catalog"].payload is cached
+    assert set(cached._compressed) == {"gzip"}
+
+
+def test_menu_etag_and_version_change(client):
+    etag = client.get("/api/foods").headers["ETag"]
+    assert client.get("/api/foods", headers={"If-None-Match": etag}).status_code == 304
+
+    db.session.add(Food(name="Món mới", price=90000, image="https://example.com/b.jpg"))
+    db.session.commit()
+    response = client.get("/api/foods", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert len(response.get_json()) == 31
+
+
+def test_dynamic_json_is_compressed_above_threshold(app, client):
+    response = client.get("/api/foods/1", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+
+    app.config["COMPRESS_MIN_SIZE"] = 64
+    response = client.get("/api/foods/1", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(response.data))["name"] == "Món 0"
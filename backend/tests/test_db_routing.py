@@ -0,0 +1,91 @@
+from datetime import datetime
+
+import pytest
+
+from app import create_app, db, Food
+
+
+def make_app(tmp_path, cache_url="memory://"):
+    return create_app(
+        {
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'primary.db'}",
+            "DATABASE_REPLICA_URLS": f"sqlite:///{tmp_path / 'replica.db'}",
+            "JWT_SECRET_KEY": "test-secret",
+            "CACHE_URL": cache_url,
+        }
+    )
+
+
+@pytest.fixture()
+def replica_app(tmp_path):
+    """Primary và replica là hai file SQLite riêng biệt."""
+    app = make_app(tmp_path)
+    with app.app_context():
+        db.create_all()
+        replica = app.extensions["db_routing"]["engines"]["replica_0"]
+        db.metadata.create_all(replica)
+        db.session.add(Food(name="Primary Food", price=100000, image="https://example.com/a.jpg"))
+        db.session.commit()
+        # Replica "trễ": cùng id nhưng dữ liệu cũ hơn
+        with replica.begin() as conn:
+            conn.execute(
+                Food.__table__.insert(),
+                {"id": 1, "name": "Replica Food", "price": 100000, "image": "https://example.com/a.jpg",
+                 "is_active": True, "created_at": datetime.utcnow()},
+            )
+        yield app
+        db.session.remove()
+    replica.dispose()
+
+
+def booking_payload():
+    return {
+        "customerInfo": {"name": "Nguyen Van A", "phone": "0901234567", "email": "a@example.com"},
+        "booking": {"guests": 2, "dateTime": "2099-12-31T18:00:00"},
+        "orders": [{"foodId": 1, "quantity": 1}],
+    }
+
+
+def test_reads_go_to_replica(replica_app):
+    client = replica_app.test_client()
+    assert client.get("/api/foods").get_json()[0]["name"] == "Replica Food"
+
+
+def test_read_your_writes_after_booking(replica_app):
+    client = replica_app.test_client()
+    created = client.post("/api/bookings", json=booking_payload())
+    assert created.status_code == 201
+
+    # Booking chỉ có trên primary: lần đọc ngay sau khi ghi phải thấy nó
+    response = client.get(f"/api/bookings/{created.get_json()['id']}")
+    assert response.status_code == 200
+    assert client.get("/api/foods").get_json()[0]["name"] == "Primary Food"
+
+
+def test_stickiness_expires(replica_app):
+    replica_app.extensions["db_routing"]["sticky_seconds"] = 0
+    client = replica_app.test_client()
+    client.post("/api/bookings", json=booking_payload())
+    assert client.get("/api/foods").get_json()[0]["name"] == "Replica Food"
+
+
+def test_read_your_writes_across_workers(tmp_path, replica_app):
+    # Hai worker gunicorn: hai app riêng, chung DB và cache SQLite; client
+    # cross-origin không gửi lại cookie mtp_rw
+    cache_url = f"sqlite:///{tmp_path / 'cache.db'}"
+    worker_a, worker_b = make_app(tmp_path, cache_url), make_app(tmp_path, cache_url)
+
+    created = worker_a.test_client().post("/api/bookings", json=booking_payload())
+    assert created.status_code == 201
+    reader = worker_b.test_client(use_cookies=False)
+    assert reader.get(f"/api/bookings/{created.get_json()['id']}").status_code == 200
+    assert reader.get("/api/foods").get_json()[0]["name"] == "Primary Food"
+
+    # Client khác (IP khác) vẫn đọc replica
+    other = worker_b.test_client(use_cookies=False)
+    response = other.get("/api/foods", environ_base={"REMOTE_ADDR": "10.0.0.9"})
+    assert response.get_json()[0]["name"] == "Replica Food"
+    for app in (worker_a, worker_b):
+        for engine in app.extensions["db_routing"]["engines"].values():
+            engine.dispose()
@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db, Booking, Food, Tombstone
+
+
+@pytest.fixture()
+def menu():
+    # Mỗi test tự tạo món với updated_at cần thiết
+    return []
+
+
+def _food(name, updated_at):
+    food = Food(name=name, price=100000, image="https://example.com/x.jpg", updated_at=updated_at)
+    db.session.add(food)
+    db.session.commit()
+    return food
+
+
+def test_foods_delta_returns_changes_and_tombstones(client, admin_headers):
+    old = datetime.utcnow() - timedelta(hours=2)
+    _food("Cũ", old)
+    kept = _food("Mới", datetime.utcnow())
+    hidden = _food("Ẩn", datetime.utcnow())
+    hidden.is_active = False
+    removed = _food("Xóa", old)
+    db.session.commit()
+    assert client.delete(f"/api/foods/{removed.id}", headers=admin_headers).status_code == 200
+
+    since = (datetime.utcnow() - timedelta(hours=1)).isoformat() + "Z"
+    data = client.get(f"/api/foods?updated_since={since}").get_json()
+    assert {item["id"] for item in data["items"]} == {kept.id, hidden.id}
+    assert data["deleted"] == [str(removed.id)]
+    assert datetime.fromisoformat(data["cursor"]) <= datetime.utcnow()
+
+    # Không có updated_since: vẫn là danh sách menu như cũ
+    assert isinstance(client.get("/api/foods").get_json(), list)
+
+
+def test_bookings_delta_tracks_status_changes_and_deletes(client, admin_headers, book):
+    _food("Test Food", datetime.utcnow())
+    first, second = book(), book()
+    db.session.execute(db.update(Booking).values(updated_at=datetime.utcnow() - timedelta(hours=1)))
+    db.session.commit()
+
+    since = (datetime.utcnow() - timedelta(minutes=5)).isoformat()
+    assert client.get(f"/api/bookings?updated_since={since}").get_json()["items"] == []
+
+    client.put(f"/api/bookings/{first}", json={"status": "confirmed"}, headers=admin_headers)
+    client.delete(f"/api/bookings/{second}", headers=admin_headers)
+    data = client.get(f"/api/bookings?updated_since={since}").get_json()
+    assert [item["id"] for item in data["items"]] == [first]
+    assert data["items"][0]["statusTimeline"][-1]["status"] == "confirmed"
+    assert data["deleted"] == [second]
+
+
+def test_invalid_and_expired_cursor(client):
+    assert client.get("/api/foods?updated_since=yesterday").status_code == 400
+    too_old = (datetime.utcnow() - timedelta(days=365)).isoformat()
+    response = client.get(f"/api/bookings?updated_since={too_old}")
+    assert response.status_code == 410
+    assert response.get_json()["resync"] is True
+
+
+def test_prune_tombstones(app):
+    db.session.add(Tombstone(entity="food", entity_key="1", deleted_at=datetime.utcnow() - timedelta(days=90)))
+    db.session.add(Tombstone(entity="food", entity_key="2"))
+    db.session.commit()
+    result = app.test_cli_runner().invoke(args=["prune-tombstones"])
+    assert "1 tombstone" in result.output
+    assert db.session.scalars(db.select(Tombstone.entity_key)).all() == ["2"]
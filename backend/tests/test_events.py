@@ -0,0 +1,95 @@
+import json
+
+import pytest
+from itsdangerous import TimestampSigner
+
+from events import MemoryBroker, SQLiteBroker
+
+
+@pytest.fixture(autouse=True)
+def short_streams(app):
+    app.config["EVENTS_MAX_STREAM_SECONDS"] = 0.2
+
+
+def _events(body: str):
+    parsed = []
+    for block in body.split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":") and ": " in line)
+        if "event" in fields:
+            parsed.append((fields.get("id"), fields["event"], json.loads(fields["data"])))
+    return parsed
+
+
+@pytest.mark.parametrize("make_broker", [lambda tmp: MemoryBroker(3), lambda tmp: SQLiteBroker(str(tmp / "e.db"), 3)])
+def test_broker_resume_and_gap(tmp_path, make_broker):
+    broker = make_broker(tmp_path)
+    assert broker.since(0) == []
+    first = broker.publish("a", {"n": 1})
+    broker.publish("b", {"n": 2})
+    assert [event.type for event in broker.since(first.seq)] == ["b"]
+    assert broker.wait(broker.last_seq, 0.01) == []
+    if isinstance(broker, MemoryBroker):
+        for n in range(3):
+            broker.publish("c", {"n": n})
+        assert broker.since(first.seq) is None  # đã rơi khỏi buffer
+
+
+def _ticket(client, headers):
+    response = client.post("/api/bookings/events/ticket", headers=headers)
+    assert response.status_code == 200
+    return response.get_json()["ticket"]
+
+
+def test_stream_requires_admin(client, admin_headers):
+    assert client.get("/api/bookings/events").status_code == 403
+    assert client.post("/api/bookings/events/ticket").status_code == 401
+    assert client.get("/api/bookings/events?ticket=garbage").status_code == 403
+    # JWT không được dùng thay ticket trên URL
+    token = admin_headers["Authorization"].split(" ", 1)[1]
+    assert client.get(f"/api/bookings/events?ticket={token}").status_code == 403
+    ticket = _ticket(client, admin_headers)
+    response = client.get(f"/api/bookings/events?ticket={ticket}")
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    assert _events(response.get_data(as_text=True))[0][1] == "ready"
+
+    # Ticket chỉ mở được stream, không thay được JWT ở API khác
+    assert client.get("/api/admin/jobs", headers={"Authorization": f"Bearer {ticket}"}).status_code in (401, 422)
+
+
+def test_ticket_expires(app, client, admin_headers, monkeypatch):
+    ticket = _ticket(client, admin_headers)
+    app.config["EVENTS_TICKET_SECONDS"] = 0
+    monkeypatch.setattr(TimestampSigner, "get_timestamp", lambda self: 10**10)
+    assert client.get(f"/api/bookings/events?ticket={ticket}").status_code == 403
+
+
+def test_resume_with_last_event_id(client, admin_headers, book):
+    ticket = _ticket(client, admin_headers)
+    with client.get(f"/api/bookings/events?ticket={ticket}") as response:
+        ready_id = _events(response.get_data(as_text=True))[0][0]
+
+    code = book()
+    client.put(f"/api/bookings/{code}", json={"status": "confirmed"}, headers=admin_headers)
+    client.delete(f"/api/bookings/{code}", headers=admin_headers)
+
+    with client.get("/api/bookings/events", headers=dict(admin_headers, **{"Last-Event-ID": ready_id})) as body:
+        events = _events(body.get_data(as_text=True))
+    assert [event[1] for event in events] == ["booking.created", "booking.status_changed", "booking.deleted"]
+    assert events[0][2] == {
+        "id": code, "status": "pending", "statusLabel": events[0][2]["statusLabel"],
+        "bookingDatetime": "2099-12-31T18:00:00", "totalAmount": 120000, "createdAt": events[0][2]["createdAt"],
+    }
+    assert events[1][2]["status"] == "confirmed"
+    assert events[2][2] == {"id": code}
+
+    stale = client.get("/api/bookings/events", headers=dict(admin_headers, **{"Last-Event-ID": "other:1"}))
+    assert _events(stale.get_data(as_text=True))[0][1] == "reset"
+
+
+def test_stream_slots_are_released(app, client, admin_headers):
+    app.config["EVENTS_MAX_STREAM_SECONDS"] = 0
+    ticket = _ticket(client, admin_headers)
+    for _ in range(app.config["EVENTS_MAX_STREAMS"] + 2):
+        with client.get(f"/api/bookings/events?ticket={ticket}") as response:
+            assert response.status_code == 200
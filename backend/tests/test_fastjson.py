@@ -0,0 +1,40 @@
+import json
+from datetime import datetime
+
+import pytest
+
+import fastjson
+from app import Booking, BookingItem, encode_bookings, serialize_booking
+
+
+def make_booking(n):
+    booking = Booking(
+        code=f"BK{n:08d}", customer_name="Nguyễn Văn A", customer_phone="0901234567",
+        customer_email="a@example.com", guests=2, booking_datetime=datetime(2099, 12, 31, 18, 30),
+        note="Gần cửa sổ", status="pending", total_amount=240000,
+        created_at=datetime(2026, 1, 2, 3, 4, 5, 678901), updated_at=None,
+    )
+    booking.update_status("pending", "Đơn mới được tạo từ website")
+    booking.items.append(BookingItem(food_id=1, food_name="Phở bò", price=120000, quantity=2))
+    return booking
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_encode_bookings_matches_serialize_booking(monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(fastjson, "orjson", None)
+    bookings = [make_booking(n) for n in range(3)]
+    assert json.loads(encode_bookings(bookings)) == [serialize_booking(b) for b in bookings]
+    assert json.loads(encode_bookings([])) == []
+
+
+def test_dumps_with_raw_handles_empty_object():
+    assert json.loads(fastjson.dumps_with_raw({}, "timeline", None)) == {"timeline": []}
+
+
+def test_app_uses_orjson_provider(app):
+    if fastjson.orjson is None:
+        pytest.skip("orjson chưa được cài")
+    assert isinstance(app.json, fastjson.OrjsonProvider)
+    with app.test_request_context():
+        assert app.json.dumps({"b": 1, "a": "ă"}) == '{"b":1,"a":"ă"}'
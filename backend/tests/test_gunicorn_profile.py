@@ -0,0 +1,34 @@
+from gunicorn_profile import available_cpus, recommended_event_streams, recommended_threads, recommended_workers
+
+from app import db, reset_after_fork
+
+
+def test_cgroup_quota_caps_cpus(tmp_path):
+    (tmp_path / "cpu.max").write_text("50000 100000\n")
+    assert available_cpus(str(tmp_path)) == 1.0  # làm tròn lên tối thiểu 1 CPU
+
+    (tmp_path / "cpu.max").write_text("max 100000\n")
+    assert available_cpus(str(tmp_path)) >= 1.0
+
+
+def test_worker_sizing(monkeypatch):
+    monkeypatch.setenv("GUNICORN_MAX_WORKERS", "8")
+    assert recommended_workers("sync", 2) == 5
+    assert recommended_workers("sync", 16) == 8
+    # gthread nhiều thread: ít process hơn
+    assert recommended_workers("gthread", 2, threads=4) == 3
+    assert recommended_workers("gthread", 2, threads=1) == 5
+    assert recommended_workers("gthread", 16, threads=4) == 8
+    assert recommended_threads("gthread") == 4
+    assert recommended_threads("sync") == 1
+    # Chừa một thread cho request thường: tab admin thứ hai vẫn mở được stream
+    assert recommended_event_streams(4) == 3
+    assert recommended_event_streams(1) == 1
+
+
+def test_reset_after_fork_drops_inherited_state(app):
+    app.extensions["groq"] = {"client": object()}
+    with app.app_context():
+        db.session.execute(db.text("SELECT 1"))
+    reset_after_fork(app)
+    assert "groq" not in app.extensions
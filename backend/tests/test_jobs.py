@@ -0,0 +1,182 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import inspect
+
+from app import create_app, db, ChatLog
+from extensions import jobs
+from jobs import jobs_table
+
+
+@pytest.fixture()
+def app(tmp_path):
+    # Worker chạy job trên thread riêng: DB chính cũng phải là file
+    app = create_app(
+        {
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'app.db'}",
+            "JWT_SECRET_KEY": "test-secret",
+            "CACHE_URL": "memory://",
+            "JOBS_DATABASE_URL": f"sqlite:///{tmp_path / 'jobs.db'}",
+            "JOBS_RETRY_BASE_SECONDS": 0,
+            "RATELIMIT_ENABLED": False,
+        }
+    )
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture()
+def task():
+    calls = []
+
+    def register(name, fail_times=0, max_attempts=5):
+        @jobs.task(name, max_attempts=max_attempts)
+        def handler(payload):
+            calls.append(payload)
+            if len(calls) <= fail_times:
+                raise RuntimeError(f"lỗi lần {len(calls)}")
+        return calls
+
+    names = set(jobs.tasks)
+    yield register
+    for name in set(jobs.tasks) - names:
+        jobs.tasks.pop(name)
+
+
+def test_chat_log_is_written_by_worker(app):
+    client = app.test_client()
+    response = client.post("/api/ai/chat", json={"message": "xin chào", "foods": []})
+    assert response.status_code == 200
+    assert ChatLog.query.count() == 0
+    assert jobs.stats()["types"] == {"chat_log.save": {"queued": 1}}
+
+    assert jobs.work(app, once=True) == 1
+    assert [log.role for log in ChatLog.query.order_by(ChatLog.id)] == ["user", "assistant"]
+    assert jobs.stats()["types"] == {"chat_log.save": {"done": 1}}
+
+
+def test_retry_with_backoff_then_fail(app, task):
+    flaky = task("test.flaky", fail_times=1)
+    jobs.enqueue("test.flaky", {"n": 1})
+    assert jobs.work(app, once=True) == 2
+    assert flaky == [{"n": 1}, {"n": 1}]
+
+    task("test.broken", fail_times=99, max_attempts=3)
+    job_id = jobs.enqueue("test.broken", {})
+    assert jobs.work(app, once=True) == 3
+    with jobs.state().engine.connect() as conn:
+        row = conn.execute(jobs_table.select().where(jobs_table.c.id == job_id)).mappings().one()
+    assert (row["status"], row["attempts"]) == ("failed", 3)
+    assert "lỗi lần" in row["last_error"]
+    assert jobs.stats()["failed"] == 1
+
+
+def test_concurrency_limit_and_expired_lease(app, task):
+    task("test.slow")
+    task("test.fast")
+    jobs.state().limits = {"test.slow": 1}
+    first = jobs.enqueue("test.slow", {})
+    second = jobs.enqueue("test.slow", {})
+    fast = jobs.enqueue("test.fast", {})
+
+    assert jobs.claim("w1")["id"] == first
+    assert jobs.claim("w2")["id"] == fast  # test.slow đã đủ 1 job đang chạy
+    assert jobs.claim("w3") is None
+    assert jobs.stats()["running"] == 2
+
+    # Worker w1 chết: hết lease thì slot test.slow được trả, job quay lại hàng
+    # đợi sau backoff (xếp sau job cùng loại đã chờ sẵn) và được chạy lại
+    with jobs.state().engine.begin() as conn:
+        conn.execute(
+            jobs_table.update().where(jobs_table.c.id == first)
+            .values(locked_until=datetime.utcnow() - timedelta(seconds=1))
+        )
+    assert jobs.claim("w4")["id"] == second
+    with jobs.state().engine.begin() as conn:
+        conn.execute(jobs_table.update().where(jobs_table.c.id == second).values(status="done"))
+    reclaimed = jobs.claim("w5")
+    assert (reclaimed["id"], reclaimed["attempts"]) == (first, 2)
+
+
+def test_expired_lease_counts_as_attempt(app, task):
+    calls = task("test.stuck", max_attempts=2)
+    job_id = jobs.enqueue("test.stuck", {})
+
+    def expire():
+        with jobs.state().engine.begin() as conn:
+            conn.execute(
+                jobs_table.update().where(jobs_table.c.id == job_id)
+                .values(locked_until=datetime.utcnow() - timedelta(seconds=1))
+            )
+
+    def row():
+        with jobs.state().engine.connect() as conn:
+            return conn.execute(jobs_table.select().where(jobs_table.c.id == job_id)).mappings().one()
+
+    # Lease hết hạn: chờ backoff như một lần lỗi
+    stale = jobs.claim("w1")
+    expire()
+    jobs.state().retry_base = 60
+    assert jobs.claim("w2") is None
+    assert row()["status"] == "queued" and row()["run_at"] > datetime.utcnow()
+    assert "lease" in row()["last_error"]
+
+    # Worker cũ chạy xong muộn: không ghi đè trạng thái
+    assert jobs.run_job(stale) is False
+    assert row()["status"] == "queued" and calls == [{}]
+
+    # Hết max_attempts thì failed, không quay lại hàng đợi nữa
+    with jobs.state().engine.begin() as conn:
+        conn.execute(jobs_table.update().where(jobs_table.c.id == job_id).values(run_at=datetime.utcnow()))
+    assert jobs.claim("w3")["attempts"] == 2
+    expire()
+    assert jobs.claim("w4") is None
+    assert (row()["status"], row()["attempts"]) == ("failed", 2)
+    assert row()["finished_at"] is not None
+
+
+def test_eager_mode_and_admin_stats(app, client, admin_headers, task):
+    calls = task("test.eager")
+    app.extensions["jobs"].eager = True
+    assert jobs.enqueue("test.eager", {"x": 1}) is None
+    assert calls == [{"x": 1}]
+
+    assert client.get("/api/admin/jobs").status_code == 401
+    data = client.get("/api/admin/jobs", headers=admin_headers).get_json()
+    assert data["queued"] == 0 and "oldestQueuedSeconds" in data
+
+
+def shared_app(tmp_path):
+    url = f"sqlite:///{tmp_path / 'app.db'}"
+    return create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": url, "JOBS_DATABASE_URL": url,
+                       "JWT_SECRET_KEY": "test-secret", "CACHE_URL": "memory://"})
+
+
+def test_shared_database_table_comes_from_migration(tmp_path):
+    app = shared_app(tmp_path)
+    with app.app_context():
+        state = app.extensions["jobs"]
+        assert state.shared
+        # Không tự create_all trong DB chính: schema đi qua flask db upgrade
+        assert not inspect(state.engine).has_table("jobs")
+        result = app.test_cli_runner().invoke(args=["db", "upgrade"])
+        assert result.exception is None
+        assert jobs.stats()["queued"] == 0
+        indexes = inspect(state.engine).get_indexes("jobs")
+        assert "ix_jobs_status_run_at" in {index["name"] for index in indexes}
+        state.engine.dispose()
+        db.engine.dispose()
+
+
+def test_init_db_creates_shared_jobs_table(tmp_path):
+    # init-db đánh dấu head mà không chạy migration nào
+    app = shared_app(tmp_path)
+    with app.app_context():
+        assert "✅" in app.test_cli_runner().invoke(args=["init-db"]).output
+        assert jobs.stats()["queued"] == 0
+        app.extensions["jobs"].engine.dispose()
+        db.engine.dispose()
@@ -0,0 +1,53 @@
+import json
+import logging
+import queue
+
+from flask import g
+
+from applog import JsonFormatter, NonBlockingQueueHandler, RequestContextFilter, SamplingFilter
+
+
+def _record(name="mtp.test", level=logging.INFO, msg="hello %s", args=("world",), **extra):
+    record = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+
+def test_json_formatter_includes_request_context(app):
+    with app.test_request_context("/api/foods"):
+        g.request_id = "abc123"
+        record = _record(latency_ms=12.5)
+        RequestContextFilter().filter(record)
+
+    data = json.loads(JsonFormatter().format(record))
+    assert data["message"] == "hello world"
+    assert data["level"] == "INFO"
+    assert data["request_id"] == "abc123"
+    assert data["method"] == "GET"
+    assert data["latency_ms"] == 12.5
+
+
+def test_sampling_keeps_warnings():
+    sampler = SamplingFilter({"mtp.access": 0.0})
+    assert not sampler.filter(_record("mtp.access"))
+    assert not sampler.filter(_record("mtp.access.child"))
+    assert sampler.filter(_record("mtp.access", level=logging.ERROR))
+    assert sampler.filter(_record("mtp.app"))
+    assert not sampler.filter(_record("mtp.app", sample_rate=0.0))
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = NonBlockingQueueHandler(queue.Queue(1))
+    handler.handle(_record())
+    handler.handle(_record())
+    assert handler.queue.qsize() == 1
+    assert handler.dropped == 1
+    assert handler.queue.get_nowait().getMessage() == "hello world"
+
+
+def test_request_id_header(app):
+    client = app.test_client()
+    assert client.get("/api/foods", headers={"X-Request-ID": "req-1"}).headers["X-Request-ID"] == "req-1"
+    generated = client.get("/api/foods", headers={"X-Request-ID": "bad id!"}).headers["X-Request-ID"]
+    assert len(generated) == 32
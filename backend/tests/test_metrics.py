@@ -0,0 +1,74 @@
+import logging
+
+import pytest
+
+from app import db, Food
+from metrics import Histogram, Registry, SnapshotDir
+
+
+@pytest.fixture(autouse=True)
+def metrics_token(app):
+    app.config["METRICS_TOKEN"] = "s3cret"
+
+
+def test_histogram_render_is_cumulative():
+    histogram = Histogram("latency", "help", ("endpoint",), (0.1, 1))
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.5, "/a")
+    histogram.observe(5, "/a")
+    lines = list(histogram.render())
+    assert 'latency_bucket{endpoint="/a",le="0.1"} 1' in lines
+    assert 'latency_bucket{endpoint="/a",le="1"} 2' in lines
+    assert 'latency_bucket{endpoint="/a",le="+Inf"} 3' in lines
+    assert 'latency_count{endpoint="/a"} 3' in lines
+
+
+def test_requests_and_sql_are_recorded(app, client):
+    client.get("/api/foods")
+    client.get("/api/foods/999")
+
+    registry = app.extensions["metrics"]
+    assert registry.requests.value("/api/foods", "GET", "200") == 1
+    assert registry.requests.value("/api/foods/<int:food_id>", "GET", "404") == 1
+    assert registry.sql_queries.count("/api/foods") == 1
+
+    body = client.get("/metrics", headers={"Authorization": "Bearer s3cret"}).get_data(as_text=True)
+    assert 'mtp_http_requests_total{endpoint="/api/foods",method="GET",status="200"} 1' in body
+    assert "mtp_db_queries_per_request_bucket" in body
+
+
+def test_metrics_token(app, client):
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer s3cret"}).status_code == 200
+    # Không cấu hình token: đóng hẳn thay vì công khai
+    app.config["METRICS_TOKEN"] = None
+    assert client.get("/metrics").status_code == 403
+
+
+def test_snapshots_aggregate_workers(tmp_path):
+    worker_a, worker_b = Registry(), Registry()
+    worker_a.requests.inc("/api/foods", "GET", "200", amount=3)
+    worker_a.latency.observe(0.02, "/api/foods", "GET")
+    worker_b.requests.inc("/api/foods", "GET", "200", amount=2)
+    worker_b.latency.observe(2.0, "/api/foods", "GET")
+
+    # Worker b đã ghi snapshot (hoặc đã recycle); worker a nhận scrape
+    SnapshotDir(str(tmp_path)).flush(worker_b)
+    merged = SnapshotDir(str(tmp_path)).collect(worker_a)
+    assert merged.requests.value("/api/foods", "GET", "200") == 5
+    assert merged.latency.count("/api/foods", "GET") == 2
+
+
+def test_n_plus_one_warning(app, client, caplog):
+    @app.get("/test/n-plus-one")
+    def n_plus_one():
+        for food_id in range(10):
+            db.session.execute(db.select(Food).where(Food.id == food_id)).all()
+        return {"ok": True}
+
+    with caplog.at_level(logging.WARNING, logger="mtp.metrics"):
+        client.get("/test/n-plus-one")
+
+    registry = app.extensions["metrics"]
+    assert registry.query_warnings.value("/test/n-plus-one", "n_plus_one") == 1
+    assert "Nghi N+1" in caplog.text
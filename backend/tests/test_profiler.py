@@ -0,0 +1,60 @@
+import marshal
+import time
+
+
+def test_disabled_by_default_records_nothing(app, client):
+    client.get("/api/foods")
+    assert app.extensions["profiler"].endpoints == {}
+
+
+def test_header_requires_admin(app, client, admin_headers):
+    client.get("/api/foods", headers={"X-Profile": "cprofile"})
+    assert app.extensions["profiler"].endpoints == {}
+
+    headers = dict(admin_headers, **{"X-Profile": "cprofile"})
+    client.get("/api/foods", headers=headers)
+    assert app.extensions["profiler"].endpoints["/api/foods"].requests == 1
+
+    response = client.get("/api/admin/profiler/pstats", headers=admin_headers)
+    assert response.status_code == 200
+    assert marshal.loads(response.data)
+    text = client.get("/api/admin/profiler/text?endpoint=/api/foods",
+                      headers=admin_headers)
+    assert "function calls" in text.get_data(as_text=True)
+
+
+def test_sampled_requests_produce_collapsed_stacks(app, client, admin_headers):
+    @app.get("/test/slow")
+    def slow():
+        time.sleep(0.05)
+        return {"ok": True}
+
+    response = client.put("/api/admin/profiler", json={"sampleRate": 1, "mode": "sampling",
+                                                        "intervalMs": 2}, headers=admin_headers)
+    assert response.status_code == 200
+    client.get("/test/slow")
+
+    body = client.get("/api/admin/profiler/collapsed", headers=admin_headers).get_data(as_text=True)
+    line = next(line for line in body.splitlines() if line.startswith("/test/slow;"))
+    assert "slow" in line
+    assert int(line.rsplit(" ", 1)[1]) > 0
+
+    assert client.put("/api/admin/profiler", json={"sampleRate": 2}, headers=admin_headers).status_code == 400
+    client.delete("/api/admin/profiler", headers=admin_headers)
+    assert "/test/slow" not in client.get("/api/admin/profiler", headers=admin_headers).get_json()["endpoints"]
+
+
+def test_config_is_shared_through_cache(app, client, admin_headers):
+    client.put("/api/admin/profiler", json={"sampleRate": 0.5, "mode": "cprofile"}, headers=admin_headers)
+    assert app.extensions["cache"].backend.get("profiler", "config") is not None
+
+    # Worker khác: còn cấu hình cũ cho tới lần đồng bộ kế tiếp
+    state = app.extensions["profiler"]
+    state.sample_rate, state.mode = 0.0, "sampling"
+    client.get("/api/foods")
+    assert state.sample_rate == 0.0
+
+    state.synced_at = 0.0
+    summary = client.get("/api/admin/profiler", headers=admin_headers).get_json()
+    assert (summary["sampleRate"], summary["mode"]) == (0.5, "cprofile")
+    assert summary["worker"] > 0
@@ -0,0 +1,68 @@
+import pytest
+
+from ratelimit import ConcurrencyLimiter, MemoryStore, SQLiteStore, parse_rate
+
+
+@pytest.fixture()
+def client(client):
+    # Client chung tắt rate limit; file này test chính nó nên bật lại
+    client.application.extensions["ratelimit"].enabled = True
+    return client
+
+
+def login(client, ip):
+    return client.post(
+        "/api/auth/login",
+        json={"email": "nobody@example.com", "password": "x"},
+        headers={"X-Forwarded-For": ip},
+    )
+
+
+def test_parse_rate():
+    assert parse_rate("10/minute") == (10 / 60, 10)
+    assert parse_rate("5/second;burst=20") == (5, 20)
+    assert parse_rate("off") is None
+
+
+def test_token_bucket_refills():
+    store = MemoryStore()
+    assert store.consume("k", rate=1, capacity=2, now=0) == (True, 0.0)
+    assert store.consume("k", rate=1, capacity=2, now=0)[0]
+    allowed, retry_after = store.consume("k", rate=1, capacity=2, now=0)
+    assert not allowed and retry_after == pytest.approx(1.0)
+    assert store.consume("k", rate=1, capacity=2, now=1.0)[0]
+
+
+def test_sqlite_store_is_shared(tmp_path):
+    path = str(tmp_path / "ratelimit.db")
+    worker_a, worker_b = SQLiteStore(path), SQLiteStore(path)
+    assert worker_a.consume("k", rate=0.1, capacity=1, now=100)[0]
+    assert not worker_b.consume("k", rate=0.1, capacity=1, now=100)[0]
+
+    # post_fork/recycle của một worker không được trả lại quota đã dùng
+    worker_b.reset()
+    assert not worker_b.consume("k", rate=0.1, capacity=1, now=100)[0]
+
+
+def test_login_rate_limited_per_ip(client):
+    for _ in range(5):
+        assert login(client, "10.0.0.1").status_code == 401
+
+    previous_id = login(client, "10.0.0.1").headers["X-Request-ID"]
+    response = login(client, "10.0.0.1")
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    # Limiter chạy sau logging/metrics: 429 vẫn được đếm và có request id mới
+    assert response.headers["X-Request-ID"] != previous_id
+    registry = client.application.extensions["metrics"]
+    assert registry.requests.value("/api/auth/login", "POST", "429") == 2
+
+    # IP khác (X-Forwarded-For từ nginx) có bucket riêng
+    assert login(client, "10.0.0.2").status_code == 401
+
+
+def test_concurrency_limit_sheds_load(app, client):
+    app.extensions["ratelimit"].concurrency["bookings"] = ConcurrencyLimiter(0)
+    response = client.post("/api/bookings", json={})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
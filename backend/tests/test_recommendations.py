@@ -0,0 +1,81 @@
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import Food, fallback_ai_response, recommender
+from recommendations import CoOccurrence, Recommender
+
+
+@pytest.fixture()
+def menu():
+    return [Food(name=f"Món {n}", price=100000 + n, image="https://example.com/x.jpg") for n in range(1, 7)]
+
+
+def test_weights_follow_quantity_and_recency():
+    now = datetime.utcnow()
+    engine = CoOccurrence(half_life_seconds=86400, origin=now.timestamp())
+    # Món 2 được đặt nhiều nhưng từ lâu, món 3 ít hơn nhưng gần đây
+    engine.load([(1, 1, 1, 1, now - timedelta(days=10)), (2, 1, 2, 4, now - timedelta(days=10))])
+    engine.load([(3, 2, 1, 1, now), (4, 2, 3, 1, now), (5, 2, 4, 3, now)])
+    assert engine.watermark == 5
+    assert engine.for_food(1, 3) == [4, 3, 2]
+    assert engine.for_cart([1, 3], 2) == [4, 2]
+    assert engine.popular(2) == [4, 1]
+
+
+def test_record_and_load_count_each_order_once():
+    now = datetime.utcnow()
+    engine = CoOccurrence()
+    engine.record(7, now, [(10, 1, 1), (11, 2, 1)])
+    # refresh() sau đó đọc lại đúng đơn này từ DB: không cộng lần hai
+    engine.load([(10, 7, 1, 1, now), (11, 7, 2, 1, now)])
+    engine.record(7, now, [(10, 1, 1), (11, 2, 1)])
+    assert engine.orders == 1
+    assert engine.watermark == 11
+
+    pruned = CoOccurrence(max_neighbors=2)
+    pruned.load([(n, 1, n, 1, now) for n in range(1, 8)])
+    assert len(pruned.pairs[1]) <= 4
+
+
+def test_recommendation_endpoints(app, client, book):
+    book((1, 1), (2, 1), (3, 2))
+    book((1, 1), (3, 1))
+
+    # Lần dựng đầu chạy trên thread nền (post_fork gọi start()), đơn mới sau
+    # đó được thêm ngay khi tạo
+    recommender.start(app)
+    assert app.extensions["recommendations"].ready.wait(5)
+    assert [row["id"] for row in client.get("/api/foods/1/recommendations?limit=2").get_json()] == [3, 2]
+    book((1, 1), (5, 5))
+    data = client.get("/api/foods/1/recommendations?limit=3").get_json()
+    assert [row["id"] for row in data] == [5, 3, 2]
+    assert client.get("/api/foods/1/detail").get_json()["oftenOrderedWith"] == data
+
+    cart = client.get("/api/foods/recommendations?cart=1,3&limit=2").get_json()
+    assert [row["id"] for row in cart] == [5, 2]
+    assert client.get("/api/foods/recommendations?cart=x").status_code == 400
+    assert client.get("/api/foods/999/recommendations").status_code == 404
+
+    with app.test_request_context():
+        foods = [{"id": n, "name": f"Món {n}", "price": 100000 + n} for n in range(1, 7)]
+        reply = fallback_ai_response("Gợi ý món ăn kèm Món 5", foods)
+        assert reply.splitlines()[1].startswith("- Món 1")
+
+
+def test_first_build_does_not_block_requests(app):
+    release = threading.Event()
+
+    def slow_loader(after_item_id):
+        release.wait(5)
+        return [(1, 1, 1, 1, datetime.now()), (2, 1, 2, 1, datetime.now())]
+
+    slow = Recommender(app, loader=slow_loader)
+    state = app.extensions["recommendations"]
+    # Chưa dựng xong: trả ngay ma trận rỗng để view dùng danh sách dự phòng
+    assert slow.for_food(1, 3) == []
+    assert not state.ready.is_set()
+    release.set()
+    assert state.ready.wait(5)
+    assert slow.for_food(1, 3) == [2]
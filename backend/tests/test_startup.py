@@ -0,0 +1,35 @@
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from app import create_app
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+# Ngân sách khởi động: import + create_app() của một worker mới
+STARTUP_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", "2.0"))
+CREATE_APP_BUDGET_SECONDS = float(os.getenv("CREATE_APP_BUDGET_SECONDS", "0.1"))
+
+
+def test_import_does_not_touch_database():
+    # DB không tồn tại: import vẫn phải thành công vì không kết nối lúc khởi động
+    env = dict(os.environ, DATABASE_URL="mysql+pymysql://mtp:x@127.0.0.1:1/mtp_food")
+    code = (
+        "import time; t = time.perf_counter(); import app; "
+        "print(time.perf_counter() - t)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+    assert float(result.stdout.strip().splitlines()[-1]) < STARTUP_BUDGET_SECONDS
+
+
+def test_create_app_is_cheap():
+    create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:"})
+    started = time.perf_counter()
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:"})
+    assert time.perf_counter() - started < CREATE_APP_BUDGET_SECONDS
+    assert "client" not in app.extensions.get("groq", {})
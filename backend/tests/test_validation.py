@@ -0,0 +1,106 @@
+import copy
+import random
+
+import pytest
+from marshmallow import Schema, ValidationError, fields
+
+from app import BookingInfoSchema, BookingSchema, CustomerInfoSchema, FoodSchema, OrderItemSchema
+from validation import compile_schema
+
+BOOKING = {
+    "customerInfo": {"name": "Nguyen Van A", "phone": "0901234567", "email": "a@example.com"},
+    "booking": {"guests": 2, "dateTime": "2099-12-31T18:00:00", "note": "Gần cửa sổ"},
+    "orders": [{"foodId": 1, "quantity": 2}, {"foodId": "3"}],
+}
+FOOD = {"name": "Phở bò", "price": 45000, "image": "https://example.com/pho.jpg", "description": "", "isActive": True}
+
+# Giá trị thử cho từng vị trí: sai kiểu, biên, chuỗi số, null...
+ODD_VALUES = [
+    None, True, False, 0, 1, -1, 20, 21, 40, 41, 2.5, "", " ", "2", " 12 ", "1.5", "abc", "x" * 121, "x" * 501,
+    [], [1], {}, {"a": 1}, "0901234567", "0901234567\n", "090123456", "a@example.com", "a@localhost",
+    "a@bücher.de", '"quoted user"@example.com', "a@@example.com", "a@", "@example.com", "a b@example.com",
+    "2099-12-31T18:00:00", "2099-12-31T18:00:00+07:00", "2099-12-31", "31/12/2099", "true", "off", "yes", 10**400,
+]
+
+
+def outcome(loader, data, **kwargs):
+    try:
+        return "ok", loader(data, **kwargs)
+    except ValidationError as error:
+        return "error", error.messages
+
+
+def assert_parity(schema_cls, data, **kwargs):
+    expected = outcome(schema_cls().load, data, **kwargs)
+    assert outcome(compile_schema(schema_cls).load, data, **kwargs) == expected, data
+
+
+@pytest.mark.parametrize(
+    "schema_cls, data",
+    [
+        (BookingSchema, BOOKING),
+        (BookingSchema, {}),
+        (BookingSchema, []),
+        (BookingSchema, "booking"),
+        (BookingSchema, {**BOOKING, "orders": []}),
+        (BookingSchema, {**BOOKING, "orders": {"foodId": 1}}),
+        (BookingSchema, {**BOOKING, "orders": [None, 5, {"quantity": 0}, {"foodId": 1, "extra": 1}]}),
+        (BookingSchema, {**BOOKING, "customerInfo": None, "booking": [], "coupon": "X"}),
+        (BookingSchema, {**BOOKING, "customerInfo": {}, "orders": []}),
+        (CustomerInfoSchema, {"name": "A", "phone": "123", "email": "not-an-email"}),
+        (BookingInfoSchema, {"guests": "0", "dateTime": ""}),
+        (OrderItemSchema, {"foodId": "1", "quantity": "20"}),
+        (FoodSchema, FOOD),
+        (FoodSchema, {"name": "P", "price": -1, "image": "x", "isActive": "maybe"}),
+    ],
+)
+def test_compiled_matches_marshmallow(schema_cls, data):
+    assert_parity(schema_cls, data)
+
+
+@pytest.mark.parametrize("data", [{}, {"price": "1000"}, {"isActive": "false", "unknown": 1}, {"name": None}])
+def test_partial_food_update_matches_marshmallow(data):
+    assert_parity(FoodSchema, data, partial=True)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_mutated_payloads_match_marshmallow(seed):
+    rng = random.Random(seed)
+    for _ in range(200):
+        booking = copy.deepcopy(BOOKING)
+        for _ in range(rng.randint(1, 3)):
+            section = rng.choice(["customerInfo", "booking", "orders"])
+            target = booking[section][0] if section == "orders" else booking[section]
+            key = rng.choice(sorted(target) + ["extra"])
+            if rng.random() < 0.2:
+                target.pop(key, None)
+            else:
+                target[key] = rng.choice(ODD_VALUES)
+        assert_parity(BookingSchema, booking)
+
+        food = dict(FOOD, **{rng.choice(sorted(FOOD)): rng.choice(ODD_VALUES)})
+        assert_parity(FoodSchema, food, partial=rng.random() < 0.5)
+
+
+def test_unsupported_fields_fail_at_compile_time():
+    class UrlSchema(Schema):
+        link = fields.Url()
+
+    with pytest.raises(TypeError):
+        compile_schema(UrlSchema)
+
+
+def test_untested_marshmallow_version_is_refused(monkeypatch):
+    monkeypatch.setattr("validation.version", lambda name: "4.0.0")
+    with pytest.raises(TypeError, match="marshmallow 4.0.0"):
+        compile_schema(FoodSchema)
+
+
+def test_booking_endpoint_uses_same_error_messages(app):
+    client = app.test_client()
+    payload = {**BOOKING, "orders": [{"foodId": 1, "quantity": 99}]}
+    response = client.post("/api/bookings", json=payload)
+    assert response.status_code == 400
+    assert response.get_json() == {"error": {"orders": {"0": {"quantity": [
+        "Must be greater than or equal to 1 and less than or equal to 20."
+    ]}}}}
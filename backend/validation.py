@@ -0,0 +1,417 @@
+from __future__ import annotations
+
+import numbers
+from collections.abc import Mapping
+from datetime import datetime
+from importlib.metadata import version
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from marshmallow import Schema, ValidationError, fields, validate
+from marshmallow.decorators import POST_LOAD, PRE_LOAD, VALIDATES, VALIDATES_SCHEMA
+from marshmallow.error_store import merge_errors
+from marshmallow.exceptions import SCHEMA
+from marshmallow.utils import EXCLUDE, INCLUDE, RAISE, is_collection, missing
+
+# ============================================
+# COMPILED VALIDATION
+# ============================================
+# schema.load() của marshmallow dựng ErrorStore, closure getter, kwargs và
+# chạy validator qua And(...) cho từng field ở mỗi request. compile_schema()
+# đọc schema một lần lúc import và sinh sẵn hàm kiểm tra cho từng field;
+# đường hợp lệ chỉ tạo dict kết quả, đối tượng lỗi chỉ được tạo khi dữ liệu sai.
+#
+# Luật và thông báo lỗi lấy từ chính schema (error_messages, validator,
+# load_default, @validates_schema) nên kết quả giống hệt schema.load():
+# cùng dict trả về, cùng ValidationError.messages. Hỗ trợ Str/Email/Int/
+# Bool/DateTime/Nested/List; field hoặc hook khác báo TypeError lúc compile
+# để không âm thầm lệch luật (tests/test_validation.py kiểm tra parity).
+#
+# Đọc cả API nội bộ của marshmallow (Schema._hooks, tag của decorator,
+# merge_errors, DESERIALIZATION_FUNCS) nên chỉ nhận các bản đã chạy parity
+# test; nâng marshmallow thì chạy lại test rồi mới nới TESTED_MARSHMALLOW
+# (và requirements.txt).
+TESTED_MARSHMALLOW = ((3, 21), (3, 22))  # [từ, tới)
+
+FieldLoader = Callable[[Any, bool], Any]
+Check = Callable[[Any], Optional[List]]
+
+
+class _Fail(Exception):
+    """Lỗi của một giá trị; chỉ được tạo khi dữ liệu sai."""
+
+    def __init__(self, messages: Union[List, Dict]):
+        self.messages = messages
+
+
+def _messages(message, **kwargs) -> Union[List, Dict]:
+    # Giống Field.make_error() + ValidationError(): format rồi bọc thành list
+    if isinstance(message, (str, bytes)):
+        return [message.format(**kwargs)]
+    return message
+
+
+# ============================================
+# VALIDATORS
+# ============================================
+def _length_check(validator: validate.Length) -> Check:
+    low, high, equal = validator.min, validator.max, validator.equal
+
+    def error(value, message):
+        return [(validator.error or message).format(input=value, min=low, max=high, equal=equal)]
+
+    if equal is not None:
+        def check(value):
+            if len(value) != equal:
+                return error(value, validator.message_equal)
+        return check
+
+    low_message = validator.message_min if high is None else validator.message_all
+    high_message = validator.message_max if low is None else validator.message_all
+
+    def check(value):
+        length = len(value)
+        if low is not None and length < low:
+            return error(value, low_message)
+        if high is not None and length > high:
+            return error(value, high_message)
+    return check
+
+
+def _range_check(validator: validate.Range) -> Check:
+    low, high = validator.min, validator.max
+    low_inclusive, high_inclusive = validator.min_inclusive, validator.max_inclusive
+    low_message = validator.message_min if high is None else validator.message_all
+    high_message = validator.message_max if low is None else validator.message_all
+
+    def check(value):
+        if low is not None and (value < low if low_inclusive else value <= low):
+            return [(validator.error or low_message).format(input=value, min=low, max=high)]
+        if high is not None and (value > high if high_inclusive else value >= high):
+            return [(validator.error or high_message).format(input=value, min=low, max=high)]
+    return check
+
+
+def _regexp_check(validator: validate.Regexp) -> Check:
+    match = validator.regex.match
+
+    def check(value):
+        if match(value) is None:
+            return [validator.error.format(input=value, regex=validator.regex.pattern)]
+    return check
+
+
+def _email_check(validator: validate.Email) -> Check:
+    user_match = validator.USER_REGEX.match
+    domain_match = validator.DOMAIN_REGEX.match
+    whitelist = validator.DOMAIN_WHITELIST
+
+    def domain_ok(domain: str) -> bool:
+        if domain in whitelist or domain_match(domain):
+            return True
+        try:
+            return bool(domain_match(domain.encode("idna").decode("ascii")))
+        except UnicodeError:
+            return False
+
+    def check(value):
+        if value and "@" in value:
+            user, _, domain = value.rpartition("@")
+            if user_match(user) and domain_ok(domain):
+                return None
+        return [validator.error.format(input=value)]
+    return check
+
+
+def _generic_check(validator: Callable, failed_message: str) -> Check:
+    # Validator tự viết: gọi như And() của marshmallow
+    def check(value):
+        try:
+            if validator(value) is False and not isinstance(validator, validate.Validator):
+                return [failed_message]
+        except ValidationError as error:
+            return [error.messages] if isinstance(error.messages, dict) else list(error.messages)
+    return check
+
+
+_VALIDATOR_COMPILERS = {
+    validate.Length: _length_check,
+    validate.Range: _range_check,
+    validate.Regexp: _regexp_check,
+    validate.Email: _email_check,
+}
+
+
+def _compile_check(validator, field: fields.Field) -> Check:
+    compiler = _VALIDATOR_COMPILERS.get(type(validator))
+    if compiler is None:
+        return _generic_check(validator, field.error_messages["validator_failed"])
+    return compiler(validator)
+
+
+# ============================================
+# FIELDS
+# ============================================
+def _string(field: fields.String) -> FieldLoader:
+    invalid = field.error_messages["invalid"]
+
+    def convert(value, partial):
+        if value.__class__ is str:
+            return value
+        if isinstance(value, str):
+            return str(value)
+        if isinstance(value, bytes):
+            try:
+                return value.decode("utf-8")
+            except UnicodeDecodeError:
+                raise _Fail(_messages(field.error_messages["invalid_utf8"]))
+        raise _Fail(_messages(invalid))
+    return convert
+
+
+def _integer(field: fields.Integer) -> FieldLoader:
+    strict = field.strict
+
+    def convert(value, partial):
+        if value.__class__ is int:
+            return value
+        if value is True or value is False or (strict and not isinstance(value, numbers.Integral)):
+            raise _Fail(_messages(field.error_messages["invalid"], input=value))
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise _Fail(_messages(field.error_messages["invalid"], input=value))
+        except OverflowError:
+            raise _Fail(_messages(field.error_messages["too_large"], input=value))
+    return convert
+
+
+def _boolean(field: fields.Boolean) -> FieldLoader:
+    truthy, falsy = field.truthy, field.falsy
+
+    def convert(value, partial):
+        if not truthy:
+            return bool(value)
+        try:
+            if value in truthy:
+                return True
+            if value in falsy:
+                return False
+        except TypeError:
+            pass
+        raise _Fail(_messages(field.error_messages["invalid"], input=value))
+    return convert
+
+
+def _datetime(field: fields.DateTime) -> FieldLoader:
+    data_format = field.format or field.DEFAULT_FORMAT
+    parse = field.DESERIALIZATION_FUNCS.get(data_format) or (lambda value: datetime.strptime(value, data_format))
+    obj_type = field.OBJ_TYPE
+
+    def convert(value, partial):
+        if value:
+            try:
+                return parse(value)
+            except (TypeError, AttributeError, ValueError):
+                pass
+        raise _Fail(_messages(field.error_messages["invalid"], input=value, obj_type=obj_type))
+    return convert
+
+
+def _nested(field: fields.Nested) -> FieldLoader:
+    if field.many or field.only or field.exclude:
+        raise TypeError(f"Nested({field.name}) với many/only/exclude chưa được hỗ trợ")
+    compiled = CompiledSchema(field.schema, unknown=field.unknown)
+    return compiled.load_nested
+
+
+def _list(field: fields.List) -> FieldLoader:
+    inner = _compile_field(field.inner)
+    invalid = field.error_messages["invalid"]
+
+    def convert(value, partial):
+        if value.__class__ is not list and not is_collection(value):
+            raise _Fail(_messages(invalid))
+        result = []
+        errors = None
+        for index, each in enumerate(value):
+            try:
+                result.append(inner(each, partial))
+            except _Fail as fail:
+                if errors is None:
+                    errors = {}
+                errors[index] = fail.messages
+        if errors:
+            raise _Fail(errors)
+        return result
+    return convert
+
+
+# Theo đúng type (không theo lớp con): Url, UUID, NaiveDateTime... có luật riêng
+_FIELD_COMPILERS = {
+    fields.String: _string,
+    fields.Email: _string,
+    fields.Integer: _integer,
+    fields.Boolean: _boolean,
+    fields.DateTime: _datetime,
+    fields.Nested: _nested,
+    fields.List: _list,
+}
+
+
+def _compile_field(field: fields.Field) -> FieldLoader:
+    """Hàm ``load(value, partial)`` của một field: null, ép kiểu rồi validator."""
+    compiler = _FIELD_COMPILERS.get(type(field))
+    if compiler is None:
+        raise TypeError(f"Field {type(field).__name__} ({field.name}) chưa được hỗ trợ")
+    convert = compiler(field)
+    checks = tuple(_compile_check(validator, field) for validator in field.validators)
+    allow_none = field.allow_none
+    null_message = field.error_messages["null"]
+
+    if not checks:
+        def load(value, partial):
+            if value is None:
+                if allow_none:
+                    return None
+                raise _Fail(_messages(null_message))
+            return convert(value, partial)
+        return load
+
+    def load(value, partial):
+        if value is None:
+            if allow_none:
+                return None
+            raise _Fail(_messages(null_message))
+        value = convert(value, partial)
+        errors = None
+        for check in checks:
+            messages = check(value)
+            if messages is not None:
+                errors = messages if errors is None else errors + messages
+        if errors is not None:
+            raise _Fail(errors)
+        return value
+    return load
+
+
+# ============================================
+# SCHEMAS
+# ============================================
+_UNSUPPORTED_HOOKS = (
+    (PRE_LOAD, False), (PRE_LOAD, True), (POST_LOAD, False), (POST_LOAD, True), (VALIDATES_SCHEMA, True), VALIDATES,
+)
+
+
+class CompiledSchema:
+    """Bản biên dịch của một Schema marshmallow; ``load()`` thay cho ``schema.load()``."""
+
+    def __init__(self, schema: Schema, unknown: Optional[str] = None):
+        hooks = schema._hooks
+        unsupported = [tag for tag in _UNSUPPORTED_HOOKS if hooks.get(tag)]
+        if unsupported:
+            raise TypeError(f"{type(schema).__name__}: hook {unsupported} chưa được hỗ trợ")
+        self.name = type(schema).__name__
+        self.unknown = unknown or schema.unknown
+        self.type_message = schema.error_messages["type"]
+        self.unknown_message = schema.error_messages["unknown"]
+        # (key kết quả, key dữ liệu, hàm load, thông báo required hoặc None, load_default)
+        self.fields: Tuple = tuple(
+            (
+                field.attribute or name,
+                field.data_key if field.data_key is not None else name,
+                _compile_field(field),
+                field.error_messages["required"] if field.required else None,
+                field.load_default,
+            )
+            for name, field in schema.load_fields.items()
+        )
+        self.known = frozenset(entry[1] for entry in self.fields)
+        # @validates_schema: (method đã bind, skip_on_field_errors, pass_original)
+        validators = []
+        for attr_name in hooks.get((VALIDATES_SCHEMA, False), ()):
+            method = getattr(schema, attr_name)
+            options = method.__marshmallow_hook__[(VALIDATES_SCHEMA, False)]
+            validators.append((method, options["skip_on_field_errors"], options.get("pass_original", False)))
+        self.validators: Tuple = tuple(validators)
+
+    def __repr__(self) -> str:
+        return f"<CompiledSchema {self.name}>"
+
+    def load(self, data, partial: bool = False) -> Dict:
+        """Như ``schema.load(data, partial=partial)``: trả dict hoặc raise ValidationError."""
+        result, errors = self._run(data, partial)
+        if errors:
+            raise ValidationError(errors, data=data, valid_data=result)
+        return result
+
+    def load_nested(self, data, partial: bool) -> Dict:
+        result, errors = self._run(data, partial)
+        if errors:
+            raise _Fail(errors)
+        return result
+
+    def _run(self, data, partial: bool) -> Tuple[Dict, Optional[Dict]]:
+        result: Dict = {}
+        errors: Optional[Dict] = None
+        if data.__class__ is not dict and not isinstance(data, Mapping):
+            errors = {SCHEMA: _messages(self.type_message)}
+        else:
+            get = data.get
+            for key, data_key, load, required, default in self.fields:
+                value = get(data_key, missing)
+                if value is missing:
+                    if partial:
+                        continue
+                    if required is not None:
+                        if errors is None:
+                            errors = {}
+                        errors[data_key] = _messages(required)
+                    elif default is not missing:
+                        result[key] = default() if callable(default) else default
+                    continue
+                try:
+                    result[key] = load(value, partial)
+                except _Fail as fail:
+                    if errors is None:
+                        errors = {}
+                    errors[data_key] = fail.messages
+            if self.unknown != EXCLUDE and not self.known.issuperset(data):
+                for key in data:
+                    if key in self.known:
+                        continue
+                    if self.unknown == INCLUDE:
+                        result[key] = data[key]
+                    elif self.unknown == RAISE:
+                        if errors is None:
+                            errors = {}
+                        errors[key] = _messages(self.unknown_message)
+
+        field_errors = bool(errors)
+        for validator, skip_on_field_errors, pass_original in self.validators:
+            if field_errors and skip_on_field_errors:
+                continue
+            try:
+                if pass_original:
+                    validator(result, data, partial=partial, many=False)
+                else:
+                    validator(result, partial=partial, many=False)
+            except ValidationError as error:
+                messages = error.messages
+                if error.field_name != SCHEMA or not isinstance(messages, dict):
+                    messages = {error.field_name: messages}
+                errors = merge_errors(errors or {}, messages)
+        return result, errors
+
+
+def compile_schema(schema: Union[Schema, type]) -> CompiledSchema:
+    """Biên dịch một Schema (class hoặc instance) để validate nhanh ở đường nóng."""
+    installed = tuple(int(part) for part in version("marshmallow").split(".")[:2])
+    low, high = TESTED_MARSHMALLOW
+    if not low <= installed < high:
+        raise TypeError(
+            f"compile_schema chưa được kiểm tra với marshmallow {version('marshmallow')} "
+            f"(hỗ trợ {'.'.join(map(str, low))}.x); chạy tests/test_validation.py rồi cập nhật TESTED_MARSHMALLOW"
+        )
+    if isinstance(schema, type):
+        schema = schema()
+    return CompiledSchema(schema)
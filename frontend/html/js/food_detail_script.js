@@ -6,7 +6,7 @@ const API_URL = window.API_URL || 'http://localhost:5000/api';
 const BASE_URL = window.BASE_URL || 'http://localhost:5000';
 let currentFood = null;
 let quantity = 1;
-let allFoods = [];
+let relatedFoods = [];
 
 // ============================================
 // LOAD FOOD DETAIL
@@ -21,15 +21,15 @@ async function loadFoodDetail() {
     }
     
     try {
-        const response = await fetch(`${API_URL}/foods`);
-        allFoods = await response.json();
-        
-        currentFood = allFoods.find(f => f.id === foodId);
-        
-        if (!currentFood) {
+        // Một request nhỏ: món + gợi ý "hay được đặt cùng"
+        const response = await fetch(`${API_URL}/foods/${foodId}/detail`);
+        if (!response.ok) {
             showError();
             return;
         }
+        const data = await response.json();
+        currentFood = data.food;
+        relatedFoods = data.oftenOrderedWith || [];
         
         displayFood();
         displayRelatedFoods();
@@ -63,12 +63,10 @@ function displayFood() {
 // DISPLAY RELATED FOODS
 // ============================================
 function displayRelatedFoods() {
-    const related = allFoods.filter(f => f.id !== currentFood.id).slice(0, 3);
-    
-    const html = related.map(food => `
+    const html = relatedFoods.map(food => `
         <div class="col-md-4">
             <div class="related-card" onclick="goToFood(${food.id})">
-                <img src="${food.image}" alt="${food.name}">
+                <img src="${food.image.startsWith('http') ? food.image : BASE_URL + food.image}" alt="${food.name}">
                 <div class="related-card-body">
                     <h6 class="related-card-title">${food.name}</h6>
                     <div class="related-card-price">${food.price.toLocaleString('vi-VN')}đ</div>
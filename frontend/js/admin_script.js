@@ -9,6 +9,9 @@ let token = localStorage.getItem('mtp_admin_token') || '';
 let adminProfile = JSON.parse(localStorage.getItem('mtp_admin_profile') || 'null');
 let bookingsCache = [];
 let currentBookingFilter = 'all';
+let bookingEvents = null;
+let bookingEventsRetry = null;
+let lastBookingEventId = '';
 
 // ============================================
 // AUTH HELPERS
@@ -168,6 +171,7 @@ async function createAdminFromModal(event) {
 }
 
 function logoutAdmin(silent = false) {
+    disconnectBookingEvents();
     token = '';
     adminProfile = null;
     localStorage.removeItem('mtp_admin_token');
@@ -211,7 +215,9 @@ function showSection(section, evt) {
 }
 
 function refreshData() {
-    Promise.all([loadStats(), loadFoods(), loadBookings()]).catch(err => console.error(err));
+    Promise.all([loadStats(), loadFoods(), loadBookings()])
+        .then(connectBookingEvents)
+        .catch(err => console.error(err));
 }
 
 // ============================================
@@ -582,7 +588,10 @@ async function updateBookingStatus(id, status) {
         });
         if (!response.ok) throw new Error('Update failed');
         alert('Cập nhật trạng thái thành công!');
-        loadBookings();
+        const updated = await response.json();
+        bookingsCache = bookingsCache.map(item => (item.id === updated.id ? updated : item));
+        renderBookings(currentBookingFilter);
+        loadStats();
     } catch (error) {
         console.error(error);
         alert('Không thể cập nhật trạng thái');
@@ -593,6 +602,102 @@ function filterBookings(status) {
     renderBookings(status);
 }
 
+// ============================================
+// REAL-TIME BOOKING EVENTS (SSE)
+// ============================================
+// Nhận event booking mới / đổi trạng thái / bị xóa thay vì tải lại toàn bộ
+// danh sách. EventSource không gửi được header nên mỗi lần kết nối xin một
+// ticket ngắn hạn (không đưa JWT lên URL); EventSource tự reconnect và gửi
+// Last-Event-ID, ticket hết hạn thì xin ticket mới và gửi lastEventId.
+async function connectBookingEvents() {
+    if (bookingEvents || !token || !window.EventSource) return;
+    let ticket;
+    try {
+        const response = await apiFetch('/bookings/events/ticket', { method: 'POST' });
+        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+        ({ ticket } = await response.json());
+    } catch (error) {
+        console.error(error);
+        scheduleBookingEvents();
+        return;
+    }
+    // Đã đăng xuất hoặc đã có kết nối khác trong lúc chờ ticket
+    if (bookingEvents || !token) return;
+
+    const params = new URLSearchParams({ ticket });
+    if (lastBookingEventId) params.set('lastEventId', lastBookingEventId);
+    bookingEvents = new EventSource(`${API_URL}/bookings/events?${params}`);
+    const on = (type, handler) => bookingEvents.addEventListener(type, event => {
+        if (event.lastEventId) lastBookingEventId = event.lastEventId;
+        if (handler) handler(event);
+    });
+
+    on('ready');
+    // Event chỉ có thông tin tóm tắt: tải chi tiết đơn mới
+    on('booking.created', async event => {
+        const { id } = JSON.parse(event.data);
+        try {
+            const response = await apiFetch(`/bookings/${encodeURIComponent(id)}`);
+            if (!response.ok) throw new Error(`HTTP ${response.status}`);
+            const booking = await response.json();
+            bookingsCache = [booking, ...bookingsCache.filter(item => item.id !== booking.id)];
+            renderBookings(currentBookingFilter);
+        } catch (error) {
+            console.error(error);
+            loadBookings();
+        }
+        loadStats();
+    });
+    on('booking.status_changed', event => {
+        applyBookingChange(JSON.parse(event.data));
+        loadStats();
+    });
+    on('booking.deleted', event => {
+        const { id } = JSON.parse(event.data);
+        bookingsCache = bookingsCache.filter(item => item.id !== id);
+        renderBookings(currentBookingFilter);
+        loadStats();
+    });
+    // Server không còn event cần thiết (restart, worker khác): tải lại một lần
+    on('reset', () => loadBookings());
+    // Server từ chối khi nối lại (ticket hết hạn, 503 đủ stream): EventSource
+    // dừng hẳn, tự kết nối lại với ticket mới
+    bookingEvents.onerror = () => {
+        if (bookingEvents && bookingEvents.readyState === EventSource.CLOSED) {
+            bookingEvents = null;
+            scheduleBookingEvents();
+        }
+    };
+}
+
+function scheduleBookingEvents() {
+    clearTimeout(bookingEventsRetry);
+    bookingEventsRetry = setTimeout(connectBookingEvents, 3000);
+}
+
+function disconnectBookingEvents() {
+    clearTimeout(bookingEventsRetry);
+    lastBookingEventId = '';
+    if (bookingEvents) {
+        bookingEvents.close();
+        bookingEvents = null;
+    }
+}
+
+function applyBookingChange(change) {
+    const booking = bookingsCache.find(item => item.id === change.id);
+    if (!booking) return;
+    const timeline = booking.statusTimeline || [];
+    const last = timeline[timeline.length - 1];
+    if (!last || last.time !== change.timelineEntry.time) {
+        booking.statusTimeline = [...timeline, change.timelineEntry];
+    }
+    booking.status = change.status;
+    booking.statusLabel = change.statusLabel;
+    booking.updatedAt = change.updatedAt;
+    renderBookings(currentBookingFilter);
+}
+
 // ============================================
 // INIT
 // ============================================